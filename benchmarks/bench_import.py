@@ -0,0 +1,62 @@
+"""Benchmark cold import and first validation.
+
+Usage: python -m benchmarks.bench_import [--repeat N]
+
+Each statement runs in a fresh interpreter, so it includes importing
+pydantic and building the schemas of the models it needs.
+"""
+
+import argparse
+import subprocess
+import sys
+
+STATEMENTS = {
+    "import reasoner_pydantic": "import reasoner_pydantic",
+    "import Message": "from reasoner_pydantic import Message",
+    "import Response": "from reasoner_pydantic import Response",
+    "import Workflow": "from reasoner_pydantic import Workflow",
+    "import MetaKnowledgeGraph": "from reasoner_pydantic import MetaKnowledgeGraph",
+    "import components": "from reasoner_pydantic import components",
+    "first Message validation": (
+        "from reasoner_pydantic import Message; "
+        "Message.model_validate({'query_graph': {'nodes': {}, 'edges': {}}})"
+    ),
+    "first Response validation": (
+        "from reasoner_pydantic import Response; "
+        "Response.model_validate({'message': {}, 'workflow': [{'id': 'bind'}]})"
+    ),
+}
+
+TIMER = """
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+
+def time_statement(statement: str) -> float:
+    """Run statement in a new interpreter and get its duration"""
+    output = subprocess.run(
+        [sys.executable, "-c", TIMER.format(statement=statement)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = min(time_statement("import pydantic") for _ in range(args.repeat))
+    print(f"{'import pydantic':<28} {baseline * 1000:8.1f} ms")
+    for name, statement in STATEMENTS.items():
+        seconds = min(time_statement(statement) for _ in range(args.repeat))
+        print(f"{name:<28} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
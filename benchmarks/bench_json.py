@@ -0,0 +1,53 @@
+"""Benchmark loading models from JSON bytes and dumping them back.
+
+Usage: python -m benchmarks.bench_json [--size small|medium|large] [--repeat N]
+
+Compares pydantic's own JSON handling, used by load_json and dump_json,
+with parsing or writing plain values with each available JSON backend.
+"""
+
+import argparse
+import json
+import timeit
+
+from reasoner_pydantic import Response, jsonio
+
+from benchmarks.generator import make_message
+from benchmarks.run import SIZES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=SIZES, default="large")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = json.dumps({"message": make_message(SIZES[args.size])}).encode()
+    response = Response.load_json(data)
+    benchmarks = {
+        "Response.model_validate_json": lambda: Response.model_validate_json(data),
+        "Response.load_json": lambda: Response.load_json(data),
+        "Response.model_dump_json": lambda: response.model_dump_json(),
+        "Response.dump_json": lambda: response.dump_json(),
+    }
+    for name, backend in jsonio.BACKENDS.items():
+        benchmarks.update(
+            {
+                f"{name}.loads": lambda backend=backend: backend.loads(data),
+                f"{name}.loads + model_validate": lambda backend=backend: (
+                    Response.model_validate(backend.loads(data))
+                ),
+                f"model_dump + {name}.dumps": lambda backend=backend: backend.dumps(
+                    response.model_dump(mode="json")
+                ),
+            }
+        )
+
+    print(f"{len(data) / 2**20:.1f} MiB of JSON")
+    for name, func in benchmarks.items():
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{name:<36} {seconds * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark validation of long workflows.
+
+Usage: python -m benchmarks.bench_workflow [--steps N] [--repeat N]
+"""
+
+import argparse
+import timeit
+
+from reasoner_pydantic import Query, Workflow
+
+STEPS = [
+    {"id": "fill", "parameters": {"denylist": ["ARAX"]}},
+    {"id": "bind", "runner_parameters": {"denylist": ["ARAGORN"]}},
+    {
+        "id": "overlay_compute_ngd",
+        "parameters": {"qnode_keys": ["n0", "n1"], "virtual_relation_label": "NGD1"},
+    },
+    {
+        "id": "sort_results_score",
+        "parameters": {"ascending_or_descending": "descending"},
+    },
+    {"id": "filter_results_top_n", "parameters": {"max_results": 50}},
+]
+
+
+def make_workflow(n_steps: int) -> list[dict]:
+    """Build a workflow with n_steps steps cycling through STEPS"""
+    return [STEPS[i % len(STEPS)] for i in range(n_steps)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    workflow = make_workflow(args.steps)
+    query = {"message": {}, "workflow": workflow}
+
+    for name, func in (
+        ("Workflow.model_validate", lambda: Workflow.model_validate(workflow)),
+        ("Query.model_validate", lambda: Query.model_validate(query)),
+    ):
+        seconds = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{name:<28} {args.steps} steps: {seconds * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Seeded generator of synthetic TRAPI messages."""
+
+import random
+from dataclasses import asdict, dataclass
+from typing import Any
+
+CATEGORIES = [
+    "biolink:Gene",
+    "biolink:Protein",
+    "biolink:Disease",
+    "biolink:SmallMolecule",
+    "biolink:PhenotypicFeature",
+    "biolink:Pathway",
+]
+PREFIXES = ["NCBIGene", "UniProtKB", "MONDO", "CHEBI", "HP", "REACT"]
+PREDICATES = [
+    "biolink:treats",
+    "biolink:affects",
+    "biolink:interacts_with",
+    "biolink:gene_associated_with_condition",
+    "biolink:has_phenotype",
+    "biolink:participates_in",
+]
+ATTRIBUTE_TYPES = [
+    "biolink:publications",
+    "biolink:p_value",
+    "biolink:score",
+    "biolink:evidence_count",
+    "biolink:original_predicate",
+]
+SOURCES = [f"infores:kp{i}" for i in range(8)]
+
+
+@dataclass
+class GeneratorConfig:
+    """Shape of a generated message"""
+
+    nodes: int = 1000
+    edges: int = 2000
+    attributes_per_edge: int = 3
+    results: int = 500
+    analyses_per_result: int = 2
+    auxiliary_graphs: int = 50
+    # Depth of sub-attributes nested under each edge attribute
+    depth: int = 1
+    seed: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _attribute(rng: random.Random, depth: int) -> dict[str, Any]:
+    attribute_type = rng.choice(ATTRIBUTE_TYPES)
+    if attribute_type == "biolink:publications":
+        value: Any = [f"PMID:{rng.randrange(10**7)}" for _ in range(rng.randint(1, 4))]
+    elif attribute_type == "biolink:original_predicate":
+        value = {"predicate": rng.choice(PREDICATES), "negated": False}
+    elif attribute_type == "biolink:evidence_count":
+        value = rng.randint(1, 100)
+    else:
+        value = rng.random()
+    attribute: dict[str, Any] = {
+        "attribute_type_id": attribute_type,
+        "value": value,
+        "attribute_source": rng.choice(SOURCES),
+    }
+    if depth > 0:
+        attribute["attributes"] = [_attribute(rng, depth - 1)]
+    return attribute
+
+
+def make_message(config: GeneratorConfig) -> dict[str, Any]:
+    """Generate a TRAPI message dict, identical for identical configs"""
+    rng = random.Random(config.seed)
+
+    node_ids = []
+    nodes = {}
+    for i in range(config.nodes):
+        category_index = i % len(CATEGORIES)
+        node_id = f"{PREFIXES[category_index]}:{i}"
+        node_ids.append(node_id)
+        nodes[node_id] = {
+            "name": f"node {i}",
+            "categories": [CATEGORIES[category_index], "biolink:NamedThing"],
+            "attributes": [],
+        }
+
+    edge_ids = []
+    edges = {}
+    for i in range(config.edges):
+        edge_id = f"e{config.seed}_{i}"
+        edge_ids.append(edge_id)
+        edges[edge_id] = {
+            "subject": rng.choice(node_ids),
+            "object": rng.choice(node_ids),
+            "predicate": rng.choice(PREDICATES),
+            "sources": [
+                {
+                    "resource_id": rng.choice(SOURCES),
+                    "resource_role": "primary_knowledge_source",
+                },
+                {
+                    "resource_id": "infores:aggregator",
+                    "resource_role": "aggregator_knowledge_source",
+                },
+            ],
+            "attributes": [
+                _attribute(rng, config.depth) for _ in range(config.attributes_per_edge)
+            ],
+        }
+
+    auxiliary_graphs = {}
+    for i in range(config.auxiliary_graphs):
+        auxiliary_graphs[f"aux{i}"] = {
+            "edges": rng.sample(edge_ids, min(len(edge_ids), rng.randint(2, 5))),
+            "attributes": [],
+        }
+    aux_ids = list(auxiliary_graphs)
+
+    results = []
+    for i in range(config.results):
+        edge = edges[edge_ids[i % len(edge_ids)]]
+        analyses = []
+        for j in range(config.analyses_per_result):
+            analysis: dict[str, Any] = {
+                "resource_id": f"infores:ara{j}",
+                "score": rng.random(),
+                "edge_bindings": {
+                    "e0": [{"id": edge_ids[i % len(edge_ids)], "attributes": []}]
+                },
+            }
+            if aux_ids and rng.random() < 0.2:
+                analysis["support_graphs"] = [rng.choice(aux_ids)]
+            analyses.append(analysis)
+        results.append(
+            {
+                "node_bindings": {
+                    "n0": [{"id": edge["subject"], "attributes": []}],
+                    "n1": [{"id": edge["object"], "attributes": []}],
+                },
+                "analyses": analyses,
+            }
+        )
+
+    return {
+        "query_graph": {
+            "nodes": {
+                "n0": {"categories": ["biolink:NamedThing"]},
+                "n1": {"categories": ["biolink:NamedThing"]},
+            },
+            "edges": {"e0": {"subject": "n0", "object": "n1"}},
+        },
+        "knowledge_graph": {"nodes": nodes, "edges": edges},
+        "results": results,
+        "auxiliary_graphs": auxiliary_graphs,
+    }
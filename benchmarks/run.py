@@ -0,0 +1,184 @@
+"""Run the performance benchmark suite.
+
+Usage:
+    python -m benchmarks.run [--size small|medium|large] [--output FILE]
+                             [--baseline FILE] [--tolerance RATIO]
+
+Timings are written as JSON. With --baseline, each benchmark is compared
+against a stored run and the exit status is 1 if any of them got slower by
+more than the tolerance.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import pydantic
+
+from reasoner_pydantic import Message, QueryGraph, Results
+
+from benchmarks.generator import GeneratorConfig, make_message
+
+SIZES = {
+    "small": GeneratorConfig(nodes=200, edges=400, results=100, auxiliary_graphs=10),
+    "medium": GeneratorConfig(),
+    "large": GeneratorConfig(
+        nodes=10_000, edges=20_000, results=5_000, auxiliary_graphs=500
+    ),
+}
+
+
+def timed(
+    func: Callable[[Any], Any], setup: Callable[[], Any], repeat: int
+) -> dict[str, Any]:
+    """Time func(setup()) repeat times, excluding the setup"""
+    timings = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "repeat": repeat,
+    }
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Get the peak traced allocation size while running func"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(config: GeneratorConfig, repeat: int, fan_in: int) -> dict[str, Any]:
+    data = make_message(config)
+    data_json = json.dumps(data)
+    messages = [
+        make_message(GeneratorConfig(**{**config.to_dict(), "seed": config.seed + i}))
+        for i in range(fan_in)
+    ]
+
+    def validate_raw(d):
+        return Message.model_validate(d, context={"normalize": False})
+
+    def validated():
+        return Message.model_validate(data)
+
+    def empty():
+        # Messages can only be merged if their query graphs match
+        return Message(query_graph=QueryGraph.model_validate(data["query_graph"]))
+
+    benchmarks = {
+        "model_validate": timed(Message.model_validate, lambda: data, repeat),
+        "model_validate_json": timed(
+            Message.model_validate_json, lambda: data_json, repeat
+        ),
+        "normalize": timed(lambda m: m.normalize(), lambda: validate_raw(data), repeat),
+        "message_update_fan_in": timed(
+            lambda ms: [ms[0].update(m) for m in ms[1:]],
+            lambda: [empty()] + [Message.model_validate(m) for m in messages],
+            repeat,
+        ),
+        "results_update": timed(
+            lambda rs: rs[0].update(rs[1]),
+            lambda: (
+                Results.model_validate(messages[0]["results"]),
+                Results.model_validate(messages[-1]["results"]),
+            ),
+            repeat,
+        ),
+        "hash": timed(hash, validated, repeat),
+        "model_dump": timed(lambda m: m.model_dump(), validated, repeat),
+        "model_dump_json": timed(lambda m: m.model_dump_json(), validated, repeat),
+        "model_dump_json_exclude_none": timed(
+            lambda m: m.model_dump_json(exclude_none=True), validated, repeat
+        ),
+    }
+    memory = {
+        "model_validate_peak_bytes": peak_memory(lambda: Message.model_validate(data)),
+        "message_update_fan_in_peak_bytes": peak_memory(
+            lambda: [
+                merged.update(Message.model_validate(m))
+                for merged in [empty()]
+                for m in messages
+            ]
+        ),
+    }
+    return {"benchmarks": benchmarks, "memory": memory}
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Print a comparison against a baseline run and return the regressions"""
+    regressions = []
+    for name, timing in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        ratio = timing["min"] / baseline["benchmarks"][name]["min"]
+        flag = ""
+        if ratio > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<24} {ratio:6.2f}x baseline{flag}")
+    for name, size in current["memory"].items():
+        if name in baseline["memory"]:
+            ratio = size / baseline["memory"][name]
+            print(f"{name:<40} {ratio:6.2f}x baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fan-in", type=int, default=4)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=1.2)
+    args = parser.parse_args()
+
+    config = GeneratorConfig(**{**SIZES[args.size].to_dict(), "seed": args.seed})
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "pydantic": pydantic.VERSION,
+            "platform": platform.platform(),
+        },
+        "config": {**config.to_dict(), "fan_in": args.fan_in},
+        **run(config, args.repeat, args.fan_in),
+    }
+
+    for name, timing in report["benchmarks"].items():
+        print(f"{name:<24} min {timing['min'] * 1000:10.2f} ms")
+    for name, size in report["memory"].items():
+        print(f"{name:<40} {size / 2**20:10.2f} MiB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["config"] != report["config"]:
+            print("warning: baseline was run with a different config")
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,7 @@ from .results import Result, NodeBinding, EdgeBinding, Results, Analysis
 from .auxgraphs import AuxiliaryGraphs, AuxiliaryGraph
 from .message import (
     Message,
+    MessageDelta,
     Query,
     Response,
     AsyncQuery,
@@ -32,6 +33,7 @@ from .shared import (
     BiolinkPredicate,
     BiolinkQualifier,
     CURIE,
+    LogBuffer,
     LogEntry,
     LogLevel,
 )
@@ -40,49 +42,101 @@ from .metakg import (
     MetaNode,
     MetaKnowledgeGraph,
     MetaAttribute,
+    MetaKGRegistry,
 )
 from .utils import (
     HashableSequence,
     HashableMapping,
     HashableSet,
 )
+from . import jsonio, profiling, support
 
-components = [
-    Attribute,
-    BiolinkEntity,
-    BiolinkPredicate,
-    BiolinkQualifier,
-    CURIE,
-    Edge,
-    EdgeBinding,
-    KnowledgeGraph,
-    RetrievalSource,
-    LogEntry,
-    Message,
-    Node,
-    NodeBinding,
-    QEdge,
-    QNode,
-    Query,
-    QueryGraph,
-    AsyncQuery,
-    Result,
-    Response,
-    AsyncQueryResponse,
-    AsyncQueryStatusResponse,
-    LogLevel,
-    AttributeConstraint,
-    MetaEdge,
-    MetaNode,
-    MetaKnowledgeGraph,
-    MetaAttribute,
-    Results,
-    AuxiliaryGraph,
-    AuxiliaryGraphs,
-    Operation,
-    Workflow,
-    Analysis,
-    HashableSequence,
-    HashableMapping,
-    HashableSet,
+# OpenAPI components by schema name, see schema.py
+_COMPONENTS = {
+    "Attribute": Attribute,
+    "BiolinkEntity": BiolinkEntity,
+    "BiolinkPredicate": BiolinkPredicate,
+    "BiolinkQualifier": BiolinkQualifier,
+    "CURIE": CURIE,
+    "Edge": Edge,
+    "EdgeBinding": EdgeBinding,
+    "KnowledgeGraph": KnowledgeGraph,
+    "RetrievalSource": RetrievalSource,
+    "LogEntry": LogEntry,
+    "Message": Message,
+    "Node": Node,
+    "NodeBinding": NodeBinding,
+    "QEdge": QEdge,
+    "QNode": QNode,
+    "Query": Query,
+    "QueryGraph": QueryGraph,
+    "AsyncQuery": AsyncQuery,
+    "Result": Result,
+    "Response": Response,
+    "AsyncQueryResponse": AsyncQueryResponse,
+    "AsyncQueryStatusResponse": AsyncQueryStatusResponse,
+    "LogLevel": LogLevel,
+    "AttributeConstraint": AttributeConstraint,
+    "MetaEdge": MetaEdge,
+    "MetaNode": MetaNode,
+    "MetaKnowledgeGraph": MetaKnowledgeGraph,
+    "MetaAttribute": MetaAttribute,
+    "Results": Results,
+    "AuxiliaryGraph": AuxiliaryGraph,
+    "AuxiliaryGraphs": AuxiliaryGraphs,
+    "Operation": Operation,
+    "Workflow": Workflow,
+    "Analysis": Analysis,
+    "HashableSequence": HashableSequence,
+    "HashableMapping": HashableMapping,
+    "HashableSet": HashableSet,
+}
+
+components = list(_COMPONENTS.values())
+
+__all__ = [
+    "Attribute",
+    "BiolinkEntity",
+    "BiolinkPredicate",
+    "BiolinkQualifier",
+    "CURIE",
+    "Edge",
+    "EdgeBinding",
+    "KnowledgeGraph",
+    "RetrievalSource",
+    "LogEntry",
+    "Message",
+    "Node",
+    "NodeBinding",
+    "QEdge",
+    "QNode",
+    "Query",
+    "QueryGraph",
+    "AsyncQuery",
+    "Result",
+    "Response",
+    "AsyncQueryResponse",
+    "AsyncQueryStatusResponse",
+    "LogLevel",
+    "AttributeConstraint",
+    "MetaEdge",
+    "MetaNode",
+    "MetaKnowledgeGraph",
+    "MetaAttribute",
+    "Results",
+    "AuxiliaryGraph",
+    "AuxiliaryGraphs",
+    "Operation",
+    "Workflow",
+    "Analysis",
+    "HashableSequence",
+    "HashableMapping",
+    "HashableSet",
+    "MessageDelta",
+    "LogBuffer",
+    "MetaKGRegistry",
+    "jsonio",
+    "profiling",
+    "support",
+    "components",
 ]
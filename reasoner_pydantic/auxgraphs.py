@@ -4,7 +4,7 @@ from typing import Annotated, Any
 from pydantic import ConfigDict, Field
 
 from .base_model import BaseModel
-from .utils import HashableMapping, HashableSet
+from .utils import HashableMapping, HashableSet, deep_digest
 from .shared import Attribute, EdgeIdentifier
 
 
@@ -18,6 +18,15 @@ class AuxiliaryGraph(BaseModel):
 
     model_config = ConfigDict(title="auxiliary graph", extra="allow")
 
+    def get_digest(self) -> str:
+        """
+        Get a digest of the edges and attributes, the same in every process
+
+        Graphs with the same normalized edges and attributes have the same
+        digest, whatever their key. Extra fields are not included.
+        """
+        return deep_digest((sorted(self.edges), self.attributes))
+
 
 class AuxiliaryGraphs(HashableMapping[str, AuxiliaryGraph]):
     """Auxiliary Graphs"""
@@ -29,6 +38,24 @@ class AuxiliaryGraphs(HashableMapping[str, AuxiliaryGraph]):
             raise TypeError("AuxiliaryGraphs may only be updated with AuxiliaryGraphs.")
         self.root.update(other.root)
 
+    def get_conflicts(self, other: "AuxiliaryGraphs") -> dict[str, str]:
+        """
+        Get new keys for the graphs of other whose key is used here for a
+        graph with other content
+
+        The new key is made of the key and the digest of the graph, so the
+        same graph gets the same key in every process.
+        """
+        conflicts: dict[str, str] = {}
+        for aux_id, auxiliary_graph in other.items():
+            existing = self.root.get(aux_id, None)
+            if existing is None or existing is auxiliary_graph:
+                continue
+            digest = auxiliary_graph.get_digest()
+            if existing.get_digest() != digest:
+                conflicts[aux_id] = f"{aux_id}-{digest}"
+        return conflicts
+
     def values(self):
         return self.root.values()
 
@@ -1,4 +1,4 @@
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Optional, TypeVar
 
 from pydantic import (
     model_validator,
@@ -6,8 +6,11 @@ from pydantic import (
     RootModel as PydanticRootModel,
 )
 
+from .jsonio import JSONInput, dump_model, load_model
 from .utils import make_hashable
 
+Model = TypeVar("Model", bound="BaseModel")
+
 
 class BaseModel(PydanticBaseModel):
     """
@@ -49,6 +52,17 @@ class BaseModel(PydanticBaseModel):
             self.model_extra[k] = make_hashable(v)
         return self
 
+    @classmethod
+    def load_json(
+        cls: type[Model], data: JSONInput, context: Optional[dict[str, Any]] = None
+    ) -> Model:
+        """Validate a model from JSON bytes or text"""
+        return load_model(cls, data, context)
+
+    def dump_json(self, exclude_none: bool = False) -> bytes:
+        """Serialize to JSON bytes"""
+        return dump_model(self, exclude_none)
+
     def to_dict(self) -> dict[Any, Any]:
         """DEPRECATED: use model_dump() instead."""
         return self.model_dump()
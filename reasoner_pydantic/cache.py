@@ -0,0 +1,338 @@
+"""In-process cache of responses to queries.
+
+    cache = ResponseCache(max_bytes=512 * 2**20, ttl=3600)
+    response = cache.get_or_compute(query, run_query)
+
+Queries are keyed by the fingerprint of their query graph (see
+QueryGraph.fingerprint), their workflow and their log level. Workflow
+parameters and results given with the query are keyed with canonical query
+graph keys as well, so queries differing only in key names or list order
+share an entry. Responses are
+stored as JSON with canonical keys and validated again for each caller,
+so changing a returned response never affects the cache. Query graphs with
+only an approximate fingerprint are never cached.
+"""
+
+import abc
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, Optional
+
+from .message import Message, Query, Response
+from .qgraph import APPROXIMATE_FINGERPRINT_PREFIX
+from .utils import deep_digest
+from .workflow import Workflow
+
+# Cached responses keep the edge IDs they were stored with
+_LOAD_CONTEXT = {"normalize": False}
+
+# Query graph node keys and edge or path keys to canonical keys
+KeyMapping = tuple[dict[str, str], dict[str, str]]
+
+# Workflow parameters naming query graph nodes or edges
+_NODE_KEY_PARAMETERS = {
+    "qnode_keys",
+    "end_node_keys",
+    "intermediate_node_key",
+    "subject_qnode_key",
+    "object_qnode_key",
+}
+_EDGE_KEY_PARAMETERS = {"qedge_keys", "rel_edge_key"}
+
+
+class CacheBackend(abc.ABC):
+    """Storage of cache entries as bytes"""
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the data stored for key, None if there is none"""
+
+    @abc.abstractmethod
+    def set(self, key: str, data: bytes) -> None:
+        """Store data for key"""
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove the data stored for key, if any"""
+
+    def entries(self) -> Iterator[tuple[str, int, float]]:
+        """Get the key, size and storage time of entries already stored"""
+        return iter(())
+
+
+class MemoryBackend(CacheBackend):
+    """Backend keeping entries in a dict"""
+
+    def __init__(self):
+        self._data: dict[str, bytes] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._data.get(key)
+
+    def set(self, key: str, data: bytes) -> None:
+        self._data[key] = data
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class DiskBackend(CacheBackend):
+    """Backend keeping each entry in a file of a directory"""
+
+    suffix = ".json"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, data: bytes) -> None:
+        # Write to a temporary file first so readers never see partial data
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def entries(self) -> Iterator[tuple[str, int, float]]:
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix):
+                    stat = entry.stat()
+                    yield entry.name[: -len(self.suffix)], stat.st_size, stat.st_mtime
+
+
+def query_cache_key(query: Query) -> tuple[Optional[str], KeyMapping]:
+    """
+    Get the cache key of a query
+
+    Also returns the mappings of its query graph keys to canonical keys.
+    The key is None if the query graph only has an approximate fingerprint,
+    then its responses aren't cached.
+    """
+    mapping: KeyMapping = ({}, {})
+    parts: list[Optional[str]] = [None, None, None, None]
+    message = query.message
+    if message.query_graph is not None:
+        parts[0], node_keys, edge_keys = message.query_graph.fingerprint()
+        if parts[0].startswith(APPROXIMATE_FINGERPRINT_PREFIX):
+            return None, mapping
+        mapping = (node_keys, edge_keys)
+    if message.knowledge_graph is not None or message.results is not None:
+        # Messages given with the query must match exactly, up to the keys
+        # the results are bound to
+        parts[1] = _bindings_digest(message, mapping)
+    if query.workflow is not None:
+        parts[2] = _canonical_workflow(query.workflow, mapping)
+    if query.log_level is not None:
+        parts[3] = str(query.log_level)
+    key = hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+    return key, mapping
+
+
+class ResponseCache:
+    """
+    Cache of responses to queries, with LRU eviction by size and expiry
+
+    Entries are evicted, least recently used first, once the stored data
+    exceeds max_bytes. With a ttl, entries expire that many seconds after
+    they were stored. Queries with bypass_cache set are always computed,
+    and their responses replace the cached ones.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 2**20,
+        ttl: Optional[float] = None,
+        backend: Optional[CacheBackend] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.clock = clock
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Size and storage time of each entry, least recently used first
+        self._entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        for key, size, stored_at in sorted(
+            self.backend.entries(), key=lambda entry: entry[2]
+        ):
+            self._entries[key] = (size, stored_at)
+            self.current_bytes += size
+        with self._lock:
+            self._evict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: Query) -> Optional[Response]:
+        """Get a copy of the cached response to a query, if any"""
+        if query.bypass_cache:
+            return None
+        key, mapping = query_cache_key(query)
+        if key is None:
+            return None
+        return self._get(key, mapping)
+
+    def put(self, query: Query, response: Response) -> None:
+        """Cache the response to a query"""
+        key, mapping = query_cache_key(query)
+        if key is not None:
+            self._put(key, mapping, response)
+
+    def get_or_compute(
+        self, query: Query, compute: Callable[[Query], Response]
+    ) -> Response:
+        """Get the cached response to a query, or compute and cache it"""
+        key, mapping = query_cache_key(query)
+        if key is None:
+            return compute(query)
+        if not query.bypass_cache:
+            response = self._get(key, mapping)
+            if response is not None:
+                return response
+        response = compute(query)
+        self._put(key, mapping, response)
+        return response
+
+    def invalidate(self, query: Query) -> None:
+        """Remove the cached response to a query"""
+        key, _ = query_cache_key(query)
+        if key is None:
+            return
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _get(self, key: str, mapping: KeyMapping) -> Optional[Response]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key)
+                entry = None
+            data = self.backend.get(key) if entry is not None else None
+            if data is None:
+                if entry is not None:
+                    # Removed from the backend by someone else
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        response = Response.load_json(data, _LOAD_CONTEXT)
+        _rebind_keys(response, _inverse(mapping))
+        return response
+
+    def _put(self, key: str, mapping: KeyMapping, response: Response) -> None:
+        data = response.dump_json()
+        if _rebind_needed(mapping):
+            canonical = Response.load_json(data, _LOAD_CONTEXT)
+            _rebind_keys(canonical, mapping)
+            data = canonical.dump_json()
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self.backend.set(key, data)
+            self._entries[key] = (len(data), self.clock())
+            self.current_bytes += len(data)
+            self._evict()
+
+    def _expired(self, entry: tuple[int, float]) -> bool:
+        return self.ttl is not None and self.clock() - entry[1] > self.ttl
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[0]
+            self.backend.delete(key)
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+
+def _rename(value: Any, keys: dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return keys.get(value, value)
+    if isinstance(value, list):
+        return [keys.get(v, v) for v in value]
+    return value
+
+
+def _bindings_digest(message: Message, mapping: KeyMapping) -> str:
+    """Digest the graphs and results of a message, with canonical keys"""
+    bound = Message.model_construct(
+        knowledge_graph=message.knowledge_graph,
+        results=copy.deepcopy(message.results),
+        auxiliary_graphs=message.auxiliary_graphs,
+    )
+    bound.rebind_keys(*mapping)
+    return deep_digest(bound, digest_size=32)
+
+
+def _canonical_workflow(workflow: Workflow, mapping: KeyMapping) -> str:
+    """Get the JSON of a workflow, with canonical keys in its parameters"""
+    node_keys, edge_keys = mapping
+    operations = workflow.model_dump(mode="json")
+    for operation in operations:
+        parameters = operation.get("parameters")
+        if not isinstance(parameters, dict):
+            continue
+        for name, value in parameters.items():
+            if name in _NODE_KEY_PARAMETERS:
+                parameters[name] = _rename(value, node_keys)
+            elif name in _EDGE_KEY_PARAMETERS:
+                parameters[name] = _rename(value, edge_keys)
+    return json.dumps(operations, sort_keys=True)
+
+
+def _inverse(mapping: KeyMapping) -> KeyMapping:
+    node_keys, edge_keys = mapping
+    return (
+        {v: k for k, v in node_keys.items()},
+        {v: k for k, v in edge_keys.items()},
+    )
+
+
+def _rebind_needed(mapping: KeyMapping) -> bool:
+    return any(k != v for keys in mapping for k, v in keys.items())
+
+
+def _rebind_keys(response: Response, mapping: KeyMapping) -> None:
+    if _rebind_needed(mapping):
+        response.message.rebind_keys(*mapping)
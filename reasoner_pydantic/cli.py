@@ -0,0 +1,189 @@
+"""Command line tools.
+
+    python -m reasoner_pydantic merge responses.jsonl -o merged.json \\
+        --stats stats.jsonl --workers 8
+
+merge reads a JSONL file with one Response per line, e.g. archived KP
+responses. Worker processes validate and normalize the records, the main
+process merges their messages in input order, as Message.update does in
+production, and merges their logs. Per-record statistics are written as
+JSONL and a throughput summary is printed to stderr.
+"""
+
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Any, Iterator, Optional, Sequence
+
+from . import jsonio
+from .message import Response
+
+# Workers send back normalized responses, with edge IDs that don't depend
+# on the process
+_NORMALIZED = {"normalize": False}
+
+
+def _load_record(line: bytes) -> tuple[Optional[bytes], dict[str, Any]]:
+    """
+    Validate and normalize one response, in a worker
+
+    The response is sent back as JSON, models of this package can't be
+    pickled.
+    """
+    stats: dict[str, Any] = {"bytes": len(line)}
+    start = time.perf_counter()
+    try:
+        response = Response.load_json(line)
+    except ValueError as e:
+        stats["status"] = "invalid"
+        stats["error"] = str(e)
+        return None, stats
+    except Exception as e:
+        # e.g. an auxiliary graph referring to a missing edge
+        stats["status"] = "error"
+        stats["error"] = f"{type(e).__name__}: {e}"
+        return None, stats
+    stats["validate_seconds"] = time.perf_counter() - start
+    knowledge_graph = response.message.knowledge_graph
+    stats["nodes"] = len(knowledge_graph.nodes) if knowledge_graph else 0
+    stats["edges"] = len(knowledge_graph.edges) if knowledge_graph else 0
+    stats["results"] = len(response.message.results or ())
+    return response.dump_json(), stats
+
+
+def _read_records(stream: IO[bytes]) -> Iterator[tuple[int, bytes]]:
+    for line_number, line in enumerate(stream, 1):
+        if line.strip():
+            yield line_number, line
+
+
+def _loaded_records(
+    records: Iterator[tuple[int, bytes]], workers: int
+) -> Iterator[tuple[int, Optional[bytes], dict[str, Any]]]:
+    """Load records in a pool, in input order, with a bounded read-ahead"""
+    if workers <= 1:
+        for line_number, line in records:
+            yield (line_number, *_load_record(line))
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        pending: deque[tuple[int, Future]] = deque()
+        for line_number, line in records:
+            pending.append((line_number, pool.submit(_load_record, line)))
+            if len(pending) >= 2 * workers:
+                line_number, future = pending.popleft()
+                yield (line_number, *future.result())
+        while pending:
+            line_number, future = pending.popleft()
+            yield (line_number, *future.result())
+
+
+def merge(
+    stream: IO[bytes],
+    workers: int = 1,
+    stats_file: Optional[IO[str]] = None,
+) -> tuple[Optional[Response], dict[str, Any]]:
+    """
+    Merge the responses of a JSONL stream
+
+    Get the merged response, None if no record is valid, and a summary of
+    the run. Records that can't be validated or merged are skipped, with
+    their error in the statistics.
+    """
+    merged: Optional[Response] = None
+    summary = {"records": 0, "merged": 0, "bytes": 0}
+    start = time.perf_counter()
+    for line_number, data, stats in _loaded_records(_read_records(stream), workers):
+        summary["records"] += 1
+        summary["bytes"] += stats["bytes"]
+        if data is not None:
+            decode_start = time.perf_counter()
+            response = Response.load_json(data, _NORMALIZED)
+            merge_start = time.perf_counter()
+            stats["decode_seconds"] = merge_start - decode_start
+            try:
+                if merged is None:
+                    merged = response
+                else:
+                    merged.message.update(response.message, normalize=False)
+                    merged.logs.merge(response.logs)
+            except NotImplementedError as e:
+                stats["status"] = "unmerged"
+                stats["error"] = str(e)
+            except Exception as e:
+                stats["status"] = "error"
+                stats["error"] = f"{type(e).__name__}: {e}"
+            else:
+                stats["status"] = "ok"
+                summary["merged"] += 1
+            stats["merge_seconds"] = time.perf_counter() - merge_start
+        if stats_file is not None:
+            stats_file.write(jsonio.dumps({"line": line_number, **stats}).decode())
+            stats_file.write("\n")
+    summary["seconds"] = time.perf_counter() - start
+    return merged, summary
+
+
+def _run_merge(args: argparse.Namespace) -> int:
+    stats_file = open(args.stats, "w") if args.stats else None
+    try:
+        if args.input == "-":
+            merged, summary = merge(sys.stdin.buffer, args.workers, stats_file)
+        else:
+            with open(args.input, "rb") as stream:
+                merged, summary = merge(stream, args.workers, stats_file)
+    finally:
+        if stats_file is not None:
+            stats_file.close()
+
+    seconds = summary["seconds"]
+    print(
+        f"{summary['merged']} of {summary['records']} records merged in "
+        f"{seconds:.2f} s, {summary['records'] / seconds:.1f} records/s, "
+        f"{summary['bytes'] / seconds / 1e6:.1f} MB/s",
+        file=sys.stderr,
+    )
+    if merged is None:
+        print("No valid response to merge", file=sys.stderr)
+        return 1
+
+    data = merged.dump_json(exclude_none=args.exclude_none)
+    if args.output == "-":
+        sys.stdout.buffer.write(data)
+    else:
+        with open(args.output, "wb") as f:
+            f.write(data)
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="reasoner-pydantic",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge_parser = commands.add_parser(
+        "merge", help="validate, normalize and merge a JSONL file of responses"
+    )
+    merge_parser.add_argument("input", help="JSONL file, - for stdin")
+    merge_parser.add_argument(
+        "-o", "--output", default="-", help="merged response file, - for stdout"
+    )
+    merge_parser.add_argument("--stats", help="per-record statistics JSONL file")
+    merge_parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="validating processes, 1 to validate in the main process "
+        "(default: %(default)s)",
+    )
+    merge_parser.add_argument(
+        "--exclude-none", action="store_true", help="omit null fields in the output"
+    )
+    merge_parser.set_defaults(run=_run_merge)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
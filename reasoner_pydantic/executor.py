@@ -0,0 +1,316 @@
+"""In-process workflow executor."""
+
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+from .message import Message
+from .results import Analysis, Result
+from .shared import Attribute
+from .utils import make_hashable
+from .workflow import (
+    AscOrDescEnum,
+    FilterKgraphDiscreteKedgeAttributeParameters,
+    FilterKgraphDiscreteKnodeAttributeParameters,
+    Workflow,
+)
+
+# Knowledge graph operations take the message and the parameters of their
+# step. The NumPy filters return the number of removed edges, which is
+# not used.
+KgraphOperation = Callable[[Message, Any], Optional[int]]
+
+# Key used for results that have no value to sort on, so they always go last
+MISSING = (1, 0.0)
+
+
+@dataclass
+class StepReport:
+    """Outcome of one workflow step"""
+
+    index: int
+    id: str
+    status: str
+    # For steps sharing a pass, the time of the whole pass on the first one
+    # and 0 on the others
+    seconds: float = 0.0
+    # Indices of the steps that shared a single pass with this one
+    fused: tuple[int, ...] = field(default_factory=tuple)
+
+
+def _numeric(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return None
+
+
+def _attribute_value(
+    attributes: Optional[Iterable[Attribute]], name: str
+) -> Optional[float]:
+    """Get a numeric attribute value by attribute_type_id or original name"""
+    for attribute in attributes or ():
+        if name in (attribute.attribute_type_id, attribute.original_attribute_name):
+            value = _numeric(attribute.value)
+            if value is not None:
+                return value
+    return None
+
+
+def _sort_key(values: list[float], direction: AscOrDescEnum) -> tuple[int, float]:
+    """Reduce the values of one result to a sort key, best value first"""
+    if not values:
+        return MISSING
+    if direction == AscOrDescEnum.descending:
+        return (0, -max(values))
+    return (0, min(values))
+
+
+def _matches(value: Any, remove_value: Any) -> bool:
+    if value == remove_value:
+        return True
+    if isinstance(value, Iterable) and not isinstance(value, str):
+        return remove_value in value
+    return False
+
+
+class WorkflowExecutor:
+    """
+    Apply the locally implemented operations of a workflow to a message
+
+    Runs of result operations (sort_results_* followed by
+    filter_results_top_n) are fused: sort keys for all steps of the run are
+    computed in one pass over the results, and a trailing top-n selects from
+    the keys without a full sort. Steps without a local implementation are
+    reported as not_implemented and skipped.
+    """
+
+    RESULT_OPERATIONS = {
+        "sort_results_score",
+        "sort_results_edge_attribute",
+        "sort_results_node_attribute",
+        "filter_results_top_n",
+    }
+
+    def __init__(self):
+        self.kgraph_operations: dict[str, KgraphOperation] = {
+            "filter_kgraph_orphans": self.filter_kgraph_orphans,
+            "filter_kgraph_discrete_kedge_attribute": (
+                self.filter_kgraph_discrete_kedge_attribute
+            ),
+            "filter_kgraph_discrete_knode_attribute": (
+                self.filter_kgraph_discrete_knode_attribute
+            ),
+        }
+        try:
+            from . import filters
+        except ImportError:
+            # The continuous filters need NumPy
+            pass
+        else:
+            self.kgraph_operations.update(
+                {
+                    "filter_kgraph_continuous_kedge_attribute": (
+                        filters.filter_kgraph_continuous_kedge_attribute
+                    ),
+                    "filter_kgraph_percentile": filters.filter_kgraph_percentile,
+                    "filter_kgraph_std_dev": filters.filter_kgraph_std_dev,
+                    "filter_kgraph_top_n": filters.filter_kgraph_top_n,
+                }
+            )
+
+    def supports(self, operation_id: str) -> bool:
+        return (
+            operation_id in self.RESULT_OPERATIONS
+            or operation_id in self.kgraph_operations
+        )
+
+    def run(self, workflow: Workflow, message: Message) -> list[StepReport]:
+        """Apply a validated workflow to a message in place"""
+        steps = [operation.root for operation in workflow]
+        reports: list[StepReport] = []
+        i = 0
+        while i < len(steps):
+            step = steps[i]
+            if step.id in self.RESULT_OPERATIONS:
+                j = i
+                while j < len(steps) and steps[j].id in self.RESULT_OPERATIONS:
+                    j += 1
+                start = time.perf_counter()
+                self._run_result_operations(message, steps[i:j])
+                seconds = time.perf_counter() - start
+                fused = tuple(range(i, j))
+                # The time of the pass goes to its first step, so the seconds
+                # of all reports add up to the time of the run
+                reports.extend(
+                    StepReport(
+                        k, steps[k].id, "done", seconds if k == i else 0.0, fused
+                    )
+                    for k in fused
+                )
+                i = j
+                continue
+
+            operation = self.kgraph_operations.get(step.id)
+            if operation is None:
+                reports.append(StepReport(i, step.id, "not_implemented"))
+            else:
+                start = time.perf_counter()
+                operation(message, step.parameters)
+                reports.append(
+                    StepReport(i, step.id, "done", time.perf_counter() - start)
+                )
+            i += 1
+        return reports
+
+    def _run_result_operations(self, message: Message, steps: list[Any]) -> None:
+        """Run a sequence of result sorts and top-n filters in one pass"""
+        if not message.results:
+            return
+        results: list[Result] = message.results.root
+        sorts = [step for step in steps if step.id != "filter_results_top_n"]
+
+        # One pass over the results computes the keys of every sort step
+        keys: list[list[tuple[int, float]]] = [[] for _ in sorts]
+        for result in results:
+            for step_keys, step in zip(keys, sorts):
+                step_keys.append(self._result_key(message, result, step))
+
+        order = list(range(len(results)))
+        # Sort keys since the last selection, newest (most significant) first
+        pending: list[list[tuple[int, float]]] = []
+        sort_num = 0
+        for step in steps:
+            if step.id != "filter_results_top_n":
+                pending.insert(0, keys[sort_num])
+                sort_num += 1
+                continue
+            max_results = step.parameters.max_results if step.parameters else None
+            if max_results is None:
+                continue
+            if pending:
+                order = heapq.nsmallest(
+                    max_results, order, key=self._composite_key(pending, order)
+                )
+                pending = []
+            else:
+                order = order[:max_results]
+        if pending:
+            order.sort(key=self._composite_key(pending, order))
+
+        message.results.root = [results[k] for k in order]
+
+    @staticmethod
+    def _composite_key(pending: list[list[tuple[int, float]]], order: list[int]):
+        # Ties keep their current relative order, as with repeated stable sorts
+        rank = {k: position for position, k in enumerate(order)}
+        return lambda k: (*(step_keys[k] for step_keys in pending), rank[k])
+
+    def _result_key(
+        self, message: Message, result: Result, step: Any
+    ) -> tuple[int, float]:
+        parameters = step.parameters
+        values: list[float] = []
+        if step.id == "sort_results_score":
+            values = [
+                analysis.score
+                for analysis in result.analyses
+                if analysis.score is not None
+            ]
+        elif step.id == "sort_results_edge_attribute":
+            edges = message.knowledge_graph.edges if message.knowledge_graph else {}
+            qedge_keys = parameters.qedge_keys
+            for analysis in result.analyses:
+                if not isinstance(analysis, Analysis):
+                    continue
+                for qedge_key, edge_bindings in analysis.edge_bindings.items():
+                    if qedge_keys is not None and qedge_key not in qedge_keys:
+                        continue
+                    for eb in edge_bindings:
+                        edge = edges.get(eb.id)
+                        if edge is None:
+                            continue
+                        value = _attribute_value(
+                            edge.attributes, parameters.edge_attribute
+                        )
+                        if value is not None:
+                            values.append(value)
+        elif step.id == "sort_results_node_attribute":
+            nodes = message.knowledge_graph.nodes if message.knowledge_graph else {}
+            qnode_keys = parameters.qnode_keys
+            for qnode_key, node_bindings in result.node_bindings.items():
+                if qnode_keys is not None and qnode_key not in qnode_keys:
+                    continue
+                for nb in node_bindings:
+                    node = nodes.get(nb.id)
+                    if node is None:
+                        continue
+                    value = _attribute_value(node.attributes, parameters.node_attribute)
+                    if value is not None:
+                        values.append(value)
+        return _sort_key(values, parameters.ascending_or_descending)
+
+    @staticmethod
+    def filter_kgraph_orphans(message: Message, _parameters: Any = None) -> None:
+        """Remove nodes that have no edges and are not bound in any result"""
+        if message.knowledge_graph is None:
+            return
+        connected = message.get_bound_node_ids()
+        for edge in message.knowledge_graph.edges.values():
+            connected.add(edge.subject)
+            connected.add(edge.object)
+        message.remove_kg_nodes(
+            [
+                node_id
+                for node_id in message.knowledge_graph.nodes
+                if node_id not in connected
+            ]
+        )
+
+    @staticmethod
+    def filter_kgraph_discrete_kedge_attribute(
+        message: Message, parameters: FilterKgraphDiscreteKedgeAttributeParameters
+    ) -> None:
+        """Remove edges whose attribute has the given value"""
+        if message.knowledge_graph is None:
+            return
+        candidates = None
+        if parameters.qedge_keys is not None:
+            candidates = message.get_bound_edge_ids(parameters.qedge_keys)
+        remove_value = make_hashable(parameters.remove_value)
+        removed = []
+        for edge_id, edge in message.knowledge_graph.edges.items():
+            if candidates is not None and edge_id not in candidates:
+                continue
+            for attribute in edge.attributes or ():
+                if parameters.edge_attribute in (
+                    attribute.attribute_type_id,
+                    attribute.original_attribute_name,
+                ) and _matches(attribute.value, remove_value):
+                    removed.append(edge_id)
+                    break
+        message.remove_kg_edges(removed, parameters.qnode_keys)
+
+    @staticmethod
+    def filter_kgraph_discrete_knode_attribute(
+        message: Message, parameters: FilterKgraphDiscreteKnodeAttributeParameters
+    ) -> None:
+        """Remove nodes whose attribute has the given value"""
+        if message.knowledge_graph is None:
+            return
+        candidates = None
+        if parameters.qnode_keys is not None:
+            candidates = message.get_bound_node_ids(parameters.qnode_keys)
+        remove_value = make_hashable(parameters.remove_value)
+        removed = []
+        for node_id, node in message.knowledge_graph.nodes.items():
+            if candidates is not None and node_id not in candidates:
+                continue
+            for attribute in node.attributes or ():
+                if parameters.node_attribute in (
+                    attribute.attribute_type_id,
+                    attribute.original_attribute_name,
+                ) and _matches(attribute.value, remove_value):
+                    removed.append(node_id)
+                    break
+        message.remove_kg_nodes(removed)
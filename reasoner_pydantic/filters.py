@@ -0,0 +1,153 @@
+"""Attribute-based knowledge graph filters.
+
+These implement the filter_kgraph_* workflow operations that select edges by
+a numeric attribute. Attribute values are extracted from the knowledge graph
+into a NumPy array once, and the removal mask is computed in a vectorized way.
+
+NumPy is an optional dependency: pip install reasoner-pydantic[numpy]
+"""
+
+from typing import Optional
+
+import numpy as np
+
+from .message import Message
+from .shared import EdgeIdentifier
+from .utils import HashableSequence
+from .workflow import (
+    AboveOrBelowEnum,
+    FilterKgraphContinuousKedgeAttributeParameters,
+    FilterKgraphPercentileParameters,
+    FilterKgraphStdDevParameters,
+    FilterKgraphTopNParameters,
+    PlusOrMinusEnum,
+    TopOrBottomEnum,
+)
+
+
+def edge_attribute_values(
+    message: Message,
+    edge_attribute: str,
+    qedge_keys: Optional[HashableSequence[str]] = None,
+) -> tuple[list[EdgeIdentifier], np.ndarray]:
+    """
+    Extract a numeric edge attribute into an array
+
+    The attribute is matched on attribute_type_id or original_attribute_name.
+    Edges without a numeric value for it are left out. If qedge_keys are
+    given, only edges bound to those query edges are considered.
+    """
+    if message.knowledge_graph is None:
+        return [], np.empty(0)
+    candidates = None
+    if qedge_keys is not None:
+        candidates = message.get_bound_edge_ids(qedge_keys)
+
+    edge_ids: list[EdgeIdentifier] = []
+    values: list[float] = []
+    for edge_id, edge in message.knowledge_graph.edges.items():
+        if candidates is not None and edge_id not in candidates:
+            continue
+        if not edge.attributes:
+            continue
+        for attribute in edge.attributes:
+            if edge_attribute not in (
+                attribute.attribute_type_id,
+                attribute.original_attribute_name,
+            ):
+                continue
+            value = attribute.value
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                edge_ids.append(edge_id)
+                values.append(value)
+                break
+    return edge_ids, np.fromiter(values, dtype=np.float64, count=len(values))
+
+
+def filter_kgraph_continuous_kedge_attribute(
+    message: Message, parameters: FilterKgraphContinuousKedgeAttributeParameters
+) -> int:
+    """Remove edges whose attribute is above or below a fixed threshold"""
+    edge_ids, values = edge_attribute_values(
+        message, parameters.edge_attribute, parameters.qedge_keys
+    )
+    mask = _threshold_mask(
+        values, parameters.threshold, parameters.remove_above_or_below
+    )
+    return _remove_masked(message, edge_ids, mask, parameters.qnode_keys)
+
+
+def filter_kgraph_percentile(
+    message: Message, parameters: FilterKgraphPercentileParameters
+) -> int:
+    """Remove edges whose attribute is above or below a percentile"""
+    edge_ids, values = edge_attribute_values(
+        message, parameters.edge_attribute, parameters.qedge_keys
+    )
+    if not edge_ids:
+        return 0
+    threshold = np.percentile(values, parameters.threshold)
+    mask = _threshold_mask(values, threshold, parameters.remove_above_or_below)
+    return _remove_masked(message, edge_ids, mask, parameters.qnode_keys)
+
+
+def filter_kgraph_std_dev(
+    message: Message, parameters: FilterKgraphStdDevParameters
+) -> int:
+    """Remove edges whose attribute is above or below mean +/- num_sigma * std"""
+    edge_ids, values = edge_attribute_values(
+        message, parameters.edge_attribute, parameters.qedge_keys
+    )
+    if not edge_ids:
+        return 0
+    deviation = parameters.num_sigma * values.std()
+    if parameters.plus_or_minus_std_dev == PlusOrMinusEnum.plus:
+        threshold = values.mean() + deviation
+    else:
+        threshold = values.mean() - deviation
+    mask = _threshold_mask(values, threshold, parameters.remove_above_or_below)
+    return _remove_masked(message, edge_ids, mask, parameters.qnode_keys)
+
+
+def filter_kgraph_top_n(
+    message: Message, parameters: FilterKgraphTopNParameters
+) -> int:
+    """
+    Keep max_edges edges, removing the rest from the top or the bottom
+
+    With remove_top_or_bottom=top the edges with the highest values are
+    removed, so the max_edges lowest are kept, and vice versa.
+    """
+    edge_ids, values = edge_attribute_values(
+        message, parameters.edge_attribute, parameters.qedge_keys
+    )
+    n_remove = len(edge_ids) - parameters.max_edges
+    if n_remove <= 0:
+        return 0
+    mask = np.zeros(len(edge_ids), dtype=bool)
+    if parameters.remove_top_or_bottom == TopOrBottomEnum.top:
+        # argpartition is O(n), we only need the split, not a full ordering
+        mask[np.argpartition(-values, n_remove - 1)[:n_remove]] = True
+    else:
+        mask[np.argpartition(values, n_remove - 1)[:n_remove]] = True
+    return _remove_masked(message, edge_ids, mask, parameters.qnode_keys)
+
+
+def _threshold_mask(
+    values: np.ndarray, threshold: float, remove_above_or_below: AboveOrBelowEnum
+) -> np.ndarray:
+    if remove_above_or_below == AboveOrBelowEnum.above:
+        return values > threshold
+    return values < threshold
+
+
+def _remove_masked(
+    message: Message,
+    edge_ids: list[EdgeIdentifier],
+    mask: np.ndarray,
+    qnode_keys: HashableSequence[str],
+) -> int:
+    """Remove the masked edges from the message, returning how many were removed"""
+    removed = [edge_ids[i] for i in np.flatnonzero(mask)]
+    message.remove_kg_edges(removed, qnode_keys)
+    return len(removed)
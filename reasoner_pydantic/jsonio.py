@@ -0,0 +1,102 @@
+"""Loading and dumping JSON bytes.
+
+    query = Query.load_json(request_body)
+    response_body = response.dump_json(exclude_none=True)
+
+Models are validated straight from the JSON bytes and serialized straight to
+bytes by pydantic-core, which is faster than parsing with any other library
+and validating the result (see benchmarks/bench_json.py). Other JSON, e.g. a
+payload only passed along, is handled by orjson when it is installed and by
+the json module of the standard library otherwise.
+
+orjson is an optional dependency: pip install reasoner-pydantic[orjson]
+"""
+
+import json
+from typing import Any, Callable, Optional, TypeVar, Union
+
+from pydantic import BaseModel as PydanticBaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+Model = TypeVar("Model", bound=PydanticBaseModel)
+
+JSONInput = Union[bytes, bytearray, memoryview, str]
+
+
+class JSONBackend:
+    """JSON library used for values that aren't models"""
+
+    def __init__(
+        self,
+        name: str,
+        loads: Callable[[JSONInput], Any],
+        dumps: Callable[[Any], bytes],
+    ):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self) -> str:
+        return f"JSONBackend({self.name!r})"
+
+
+def _stdlib_loads(data: JSONInput) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+BACKENDS = {"json": JSONBackend("json", _stdlib_loads, _stdlib_dumps)}
+if orjson is not None:
+    BACKENDS["orjson"] = JSONBackend("orjson", orjson.loads, orjson.dumps)
+
+_backend = BACKENDS["orjson" if orjson is not None else "json"]
+
+
+def get_backend() -> JSONBackend:
+    return _backend
+
+
+def set_backend(name: str) -> None:
+    """Select the JSON library by name, "orjson" or "json" """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown or unavailable JSON backend {name!r}, "
+            f"available: {', '.join(BACKENDS)}"
+        )
+    _backend = BACKENDS[name]
+
+
+def loads(data: JSONInput) -> Any:
+    """Parse JSON with the selected backend"""
+    return _backend.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    """Write compact JSON with the selected backend"""
+    return _backend.dumps(value)
+
+
+def load_model(
+    model_type: type[Model],
+    data: JSONInput,
+    context: Optional[dict[str, Any]] = None,
+) -> Model:
+    """Validate a model from JSON"""
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return model_type.model_validate_json(data, context=context)
+
+
+def dump_model(model: PydanticBaseModel, exclude_none: bool = False) -> bytes:
+    """Serialize a model to JSON bytes, same as model_dump_json() but encoded"""
+    return model.__pydantic_serializer__.to_json(model, exclude_none=exclude_none)
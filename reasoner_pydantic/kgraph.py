@@ -2,7 +2,7 @@
 
 from typing import Annotated, Any, Optional
 
-from pydantic import ConfigDict, Field
+from pydantic import ConfigDict, Field, SerializeAsAny
 
 from .shared import (
     Attribute,
@@ -14,6 +14,7 @@ from .shared import (
     ResourceRoleEnum,
 )
 from .base_model import BaseModel
+from .profiling import phase
 from .utils import HashableMapping, HashableSet
 
 
@@ -140,6 +141,29 @@ class Edge(BaseModel):
             else:
                 self.sources = other.sources
 
+    def get_digest_key(self) -> tuple:
+        """
+        Get the fields identifying the edge, as plain values
+
+        Edges with the same hash have the same key. Unlike the hash, the key
+        doesn't depend on the process, so it can be digested anywhere.
+        """
+        qualifiers = None
+        if self.qualifiers is not None:
+            qualifiers = tuple(
+                sorted(
+                    (qualifier.qualifier_type_id, qualifier.qualifier_value)
+                    for qualifier in self.qualifiers
+                )
+            )
+        return (
+            self.subject,
+            self.object,
+            self.predicate,
+            qualifiers,
+            self.get_primary_knowedge_source(),
+        )
+
     def get_primary_knowedge_source(self):
         for source in self.sources:
             if source.resource_role == "primary_knowledge_source":
@@ -149,10 +173,13 @@ class Edge(BaseModel):
 class KnowledgeGraph(BaseModel):
     """Knowledge graph."""
 
-    nodes: HashableMapping[CURIE, Node] = Field(
+    # Mappings are serialized by their own class, so the disk-backed ones of
+    # kgstore (MappedNodes, MappedEdges) can convert their storage. In-memory
+    # mappings are serialized by pydantic-core as with plain fields.
+    nodes: SerializeAsAny[HashableMapping[CURIE, Node]] = Field(
         default_factory=lambda: HashableMapping[CURIE, Node]()
     )
-    edges: HashableMapping[EdgeIdentifier, Edge] = Field(
+    edges: SerializeAsAny[HashableMapping[EdgeIdentifier, Edge]] = Field(
         default_factory=lambda: HashableMapping[EdgeIdentifier, Edge]()
     )
 
@@ -162,16 +189,18 @@ class KnowledgeGraph(BaseModel):
         if not isinstance(other, KnowledgeGraph):
             raise TypeError("KnowledgeGraph may only be updated with KnowledgeGraph.")
 
-        for key, value in other.nodes.items():
-            existing = self.nodes.get(key, None)
-            if existing:
-                existing.update(value)
-            else:
-                self.nodes[key] = value
-
-        for key, value in other.edges.items():
-            existing = self.edges.get(key, None)
-            if existing:
-                existing.update(value)
-            else:
-                self.edges[key] = value
+        with phase("KnowledgeGraph.update.nodes", len(other.nodes)):
+            for key, value in other.nodes.items():
+                existing = self.nodes.get(key, None)
+                if existing:
+                    existing.update(value)
+                else:
+                    self.nodes[key] = value
+
+        with phase("KnowledgeGraph.update.edges", len(other.edges)):
+            for key, value in other.edges.items():
+                existing = self.edges.get(key, None)
+                if existing:
+                    existing.update(value)
+                else:
+                    self.edges[key] = value
@@ -0,0 +1,212 @@
+"""Disk-backed storage for knowledge graphs larger than memory.
+
+    from reasoner_pydantic.kgstore import mapped_knowledge_graph
+
+    message.knowledge_graph = mapped_knowledge_graph(cache_size=100_000)
+    for other in responses:
+        message.update(other)
+
+The nodes and edges of a mapped knowledge graph are kept as JSON records
+in memory-mapped files, with an in-memory index of record offsets. Models
+are only built when they are accessed. A bounded cache holds the models
+in use, and models leaving the cache are written back, so changes made in
+place, e.g. by Edge.update, are kept. A model that is kept aside while
+other items are accessed may be written back before it's changed, so get
+it again rather than holding on to it.
+
+The files are scratch space for one process and cannot be reopened.
+"""
+
+import collections
+import copy
+import mmap
+import os
+import tempfile
+from typing import IO, Any, Iterator, Optional, TypeVar
+
+from pydantic import BaseModel as PydanticBaseModel
+from pydantic import model_serializer
+
+from .jsonio import dump_model, load_model
+from .kgraph import Edge, KnowledgeGraph, Node
+from .shared import CURIE, EdgeIdentifier
+from .utils import HashableMapping
+
+Model = TypeVar("Model", bound=PydanticBaseModel)
+
+
+class MappedStore(collections.abc.MutableMapping[str, Model]):
+    """Mapping of keys to models, stored in a memory-mapped file"""
+
+    def __init__(
+        self,
+        model_type: type[Model],
+        path: Optional[str] = None,
+        cache_size: int = 10_000,
+    ):
+        self.model_type = model_type
+        self.cache_size = cache_size
+        # Bytes taken by records that were replaced or deleted
+        self.garbage_bytes = 0
+        self._path = path
+        self._file: IO[bytes] = open(path, "w+b") if path else tempfile.TemporaryFile()
+        # Offset and length of the record of each key, None if not written yet
+        self._index: dict[str, Optional[tuple[int, int]]] = {}
+        self._end = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._cache: collections.OrderedDict[str, Model] = collections.OrderedDict()
+
+    def __getitem__(self, key: str) -> Model:
+        cache = self._cache
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+        value = load_model(self.model_type, self._read(self._index[key]))
+        self._cache_value(key, value)
+        return value
+
+    def __setitem__(self, key: str, value: Model) -> None:
+        if key not in self._index:
+            self._index[key] = None
+        self._cache_value(key, value)
+        self._cache.move_to_end(key)
+
+    def __delitem__(self, key: str) -> None:
+        record = self._index.pop(key)
+        self._cache.pop(key, None)
+        if record is not None:
+            self.garbage_bytes += record[1]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __deepcopy__(self, memo: dict) -> dict[str, Model]:
+        # Copies are kept in memory
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def _cache_value(self, key: str, value: Model) -> None:
+        cache = self._cache
+        cache[key] = value
+        while len(cache) > self.cache_size:
+            self._write_back(*cache.popitem(last=False))
+
+    def _read(self, record: Optional[tuple[int, int]]) -> bytes:
+        offset, length = record
+        if self._mmap is None or offset + length > len(self._mmap):
+            self._remap()
+        return self._mmap[offset : offset + length]
+
+    def _remap(self) -> None:
+        self._file.flush()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _write_back(self, key: str, value: Model) -> None:
+        data = dump_model(value)
+        record = self._index[key]
+        if record is not None:
+            if record[1] == len(data) and self._read(record) == data:
+                return
+            self.garbage_bytes += record[1]
+        self._file.seek(self._end)
+        self._file.write(data)
+        self._index[key] = (self._end, len(data))
+        self._end += len(data)
+
+    def flush(self) -> None:
+        """Write all cached models to the file"""
+        for key, value in self._cache.items():
+            self._write_back(key, value)
+        self._file.flush()
+
+    def compact(self) -> None:
+        """Rewrite the file without the records that were replaced or deleted"""
+        self.flush()
+        if self._path:
+            new_file: IO[bytes] = open(self._path + ".compact", "w+b")
+        else:
+            new_file = tempfile.TemporaryFile()
+        end = 0
+        index: dict[str, Optional[tuple[int, int]]] = {}
+        for key, record in self._index.items():
+            data = self._read(record)
+            new_file.write(data)
+            index[key] = (end, len(data))
+            end += len(data)
+        self._close_file()
+        if self._path:
+            new_file.close()
+            os.replace(self._path + ".compact", self._path)
+            new_file = open(self._path, "r+b")
+        self._file = new_file
+        self._index = index
+        self._end = end
+        self.garbage_bytes = 0
+
+    def _close_file(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def close(self) -> None:
+        """Close the file, the store can't be used afterwards"""
+        self._cache.clear()
+        self._close_file()
+
+    def __enter__(self) -> "MappedStore[Model]":
+        return self
+
+    def __exit__(self, *_args: Any) -> None:
+        self.close()
+
+
+class MappedNodes(HashableMapping[CURIE, Node]):
+    """Knowledge graph nodes kept in a MappedStore"""
+
+    @model_serializer
+    def as_dict(self) -> dict[CURIE, Node]:
+        return dict(self.root.items())
+
+
+class MappedEdges(HashableMapping[EdgeIdentifier, Edge]):
+    """Knowledge graph edges kept in a MappedStore"""
+
+    @model_serializer
+    def as_dict(self) -> dict[EdgeIdentifier, Edge]:
+        return dict(self.root.items())
+
+
+def mapped_knowledge_graph(
+    knowledge_graph: Optional[KnowledgeGraph] = None,
+    directory: Optional[str] = None,
+    cache_size: int = 10_000,
+) -> KnowledgeGraph:
+    """
+    Make a knowledge graph with nodes and edges stored on disk
+
+    The nodes and edges of knowledge_graph are copied into it if given. The
+    files are created in directory, or as anonymous temporary files.
+    """
+    stores = [
+        MappedStore(
+            model_type,
+            os.path.join(directory, f"{name}.store") if directory else None,
+            cache_size,
+        )
+        for name, model_type in (("nodes", Node), ("edges", Edge))
+    ]
+    nodes = MappedNodes.model_construct(stores[0])
+    edges = MappedEdges.model_construct(stores[1])
+    if knowledge_graph is not None:
+        nodes.update(knowledge_graph.nodes)
+        edges.update(knowledge_graph.edges)
+    return KnowledgeGraph(nodes=nodes, edges=edges)
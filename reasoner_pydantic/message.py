@@ -1,29 +1,129 @@
 """Reasoner API models."""
 
-import copy
 import hashlib
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-from typing import Optional, Callable, Union
+from typing import Any, Iterable, Mapping, Optional, Callable, Union
 
 
-from .results import Results, Analysis
+from .results import Results, Result, Analysis, PathfinderAnalysis
 from .qgraph import QueryGraph, PathfinderQueryGraph
 from pydantic import (
     AnyHttpUrl,
     ValidationInfo,
     ConfigDict,
     Field,
+    PrivateAttr,
     model_validator,
 )
 
 from .base_model import BaseModel
-from .utils import HashableSequence
-from .kgraph import Edge, KnowledgeGraph
-from .shared import EdgeIdentifier, LogEntry, LogLevel
+from .profiling import phase
+from .utils import (
+    HashableMapping,
+    HashableSequence,
+    HashableSet,
+    deep_hash,
+    deep_sizeof,
+)
+from .kgraph import Edge, KnowledgeGraph, Node
+from .shared import CURIE, EdgeIdentifier, LogBuffer, LogLevel
 from .workflow import Workflow
-from .auxgraphs import AuxiliaryGraphs
+from .auxgraphs import AuxiliaryGraph, AuxiliaryGraphs
+from .support import SupportExpansion, SupportIndex, get_edge_support_graphs
 from typing import Annotated
 
+# Name of the function computing edge IDs, changes whenever their values do
+EDGE_ID_SCHEME = "blake2b-6:v1"
+
+
+def edge_digest(key: tuple) -> EdgeIdentifier:
+    """Compute the ID of an edge from Edge.get_digest_key()"""
+    return EdgeIdentifier(
+        hashlib.blake2b(
+            repr(key).encode("utf-8", "surrogatepass"), digest_size=6
+        ).hexdigest()
+    )
+
+
+# Edges being digested in parallel, set before the workers are forked so
+# they inherit them, since edges can't be pickled
+_pending_edges: list[Edge] = []
+
+
+def _edge_digests(bounds: tuple[int, int]) -> list[EdgeIdentifier]:
+    """Compute the IDs of a range of _pending_edges, in a forked worker"""
+    start, stop = bounds
+    return [edge_digest(edge.get_digest_key()) for edge in _pending_edges[start:stop]]
+
+
+def parallel_edge_digests(
+    edges: list[Edge], workers: int, chunk_size: int = 10_000
+) -> list[EdgeIdentifier]:
+    """
+    Compute the IDs of edges in chunks, by a pool of forked processes
+
+    The workers build the digest keys and digests of their chunks, and send
+    back only the IDs. They are the same as those computed serially.
+    """
+    global _pending_edges
+    _pending_edges = edges
+    try:
+        with ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("fork")
+        ) as pool:
+            chunks = pool.map(
+                _edge_digests,
+                [
+                    (start, start + chunk_size)
+                    for start in range(0, len(edges), chunk_size)
+                ],
+            )
+            return [edge_id for chunk in chunks for edge_id in chunk]
+    finally:
+        _pending_edges = []
+
+
+class MessageDelta(BaseModel):
+    """
+    Changes between two versions of a message, see Message.diff
+
+    Added or changed nodes, edges, auxiliary graphs and results are sent
+    whole. Results are keyed by Result.get_key(). result_order lists the
+    result keys in order when patching can't keep the order otherwise.
+    """
+
+    query_graph: Optional[Union[QueryGraph, PathfinderQueryGraph]] = None
+    nodes: HashableMapping[CURIE, Node] = Field(
+        default_factory=lambda: HashableMapping[CURIE, Node]()
+    )
+    edges: HashableMapping[EdgeIdentifier, Edge] = Field(
+        default_factory=lambda: HashableMapping[EdgeIdentifier, Edge]()
+    )
+    auxiliary_graphs: HashableMapping[str, AuxiliaryGraph] = Field(
+        default_factory=lambda: HashableMapping[str, AuxiliaryGraph]()
+    )
+    results: HashableMapping[str, Result] = Field(
+        default_factory=lambda: HashableMapping[str, Result]()
+    )
+    removed_nodes: HashableSet[CURIE] = Field(
+        default_factory=lambda: HashableSet[CURIE]()
+    )
+    removed_edges: HashableSet[EdgeIdentifier] = Field(
+        default_factory=lambda: HashableSet[EdgeIdentifier]()
+    )
+    removed_auxiliary_graphs: HashableSet[str] = Field(
+        default_factory=lambda: HashableSet[str]()
+    )
+    removed_results: HashableSet[str] = Field(
+        default_factory=lambda: HashableSet[str]()
+    )
+    result_order: Optional[HashableSequence[str]] = None
+
+    model_config = ConfigDict(title="message delta", extra="forbid")
+
 
 class Message(BaseModel):
     """Message."""
@@ -55,39 +155,65 @@ class Message(BaseModel):
     ] = None
     model_config = ConfigDict(title="message", extra="forbid")
 
+    # Edges under the ID normalization gave them, by the scheme in
+    # _edge_id_scheme. Edges missing here or replaced since are normalized
+    # again, the others are skipped.
+    _normalized_edges: dict[EdgeIdentifier, Edge] = PrivateAttr(default_factory=dict)
+    _edge_id_scheme: Optional[str] = PrivateAttr(default=None)
+    _support_index: Optional[SupportIndex] = PrivateAttr(default=None)
+
+    def __deepcopy__(self, memo: Optional[dict[int, Any]] = None) -> "Message":
+        # model_copy(deep=True) passes no memo, pydantic would then copy the
+        # fields and the normalized edges separately
+        return super().__deepcopy__({} if memo is None else memo)
+
     def update(self, other: object, normalize: bool = True) -> None:
         """Updates one message with information from another.
-        Can run with normalize=false, if both messages are normalized already."""
+        Edges of other that are normalized already are skipped, so
+        normalize=False is only needed to keep edge IDs as they are."""
         if not isinstance(other, Message):
             raise TypeError("Message may only be updated with another Message.")
 
         if hash(self.query_graph) != hash(other.query_graph):
             raise NotImplementedError("Query graph merging not supported yet")
-        # Make a copy because normalization will modify results
-        other = other.model_copy(deep=True)
+        self._support_index = None
+        with phase("Message.update"):
+            # Make a copy because normalization will modify results
+            with phase("Message.update.copy"):
+                other = other.model_copy(deep=True)
 
-        if other.knowledge_graph:
-            if not self.knowledge_graph:
-                self.knowledge_graph = KnowledgeGraph()
             # Normalize edges of incoming KG
             # This will place KG edge keys into the same hashing system
             # So that equivalence is determined by hash collision
-            if normalize:
+            if other.knowledge_graph and normalize:
                 other._normalize_kg_edge_ids()
-            # The knowledge graph can now be updated because edge keys will be
-            # hashed using the same method. The knowledge graph update method
-            # will handle concatenating properties when necessary.
-            self.knowledge_graph.update(other.knowledge_graph)
-        if other.results:
-            if self.results:
-                self.results.update(other.results)
-            else:
-                self.results = other.results
-        if other.auxiliary_graphs:
-            if self.auxiliary_graphs:
-                self.auxiliary_graphs.update(other.auxiliary_graphs)
-            else:
-                self.auxiliary_graphs = other.auxiliary_graphs
+            # Incoming auxiliary graphs must not replace different ones
+            # under the same key, so they get a key of their own first
+            if other.auxiliary_graphs and self.auxiliary_graphs:
+                other._rename_auxiliary_graphs(
+                    self.auxiliary_graphs.get_conflicts(other.auxiliary_graphs)
+                )
+            if other.knowledge_graph:
+                if not self.knowledge_graph:
+                    self.knowledge_graph = KnowledgeGraph()
+                # The knowledge graph can now be updated because edge keys will be
+                # hashed using the same method. The knowledge graph update method
+                # will handle concatenating properties when necessary.
+                self.knowledge_graph.update(other.knowledge_graph)
+                self._add_normalized_edges(other)
+            if other.results:
+                if self.results:
+                    self.results.update(other.results)
+                else:
+                    self.results = other.results
+            if other.auxiliary_graphs:
+                with phase(
+                    "Message.update.auxiliary_graphs", len(other.auxiliary_graphs)
+                ):
+                    if self.auxiliary_graphs:
+                        self.auxiliary_graphs.update(other.auxiliary_graphs)
+                    else:
+                        self.auxiliary_graphs = other.auxiliary_graphs
 
     @model_validator(mode="after")
     def normalize_on_parse(self, info: ValidationInfo) -> "Message":
@@ -98,79 +224,825 @@ class Message(BaseModel):
             self._normalize_kg_edge_ids()
         return self
 
-    def normalize(self) -> None:
-        self._normalize_kg_edge_ids()
+    @property
+    def edge_id_scheme(self) -> Optional[str]:
+        """Scheme of the normalized edge IDs, None if never normalized"""
+        return self._edge_id_scheme
+
+    def is_normalized(self) -> bool:
+        """Check whether all edge IDs are normalized by EDGE_ID_SCHEME"""
+        if self.knowledge_graph is None:
+            return True
+        if self._edge_id_scheme != EDGE_ID_SCHEME:
+            return False
+        normalized = self._normalized_edges
+        return all(
+            normalized.get(edge_id) is edge
+            for edge_id, edge in self.knowledge_graph.edges.items()
+        )
+
+    def normalize(
+        self,
+        force: bool = False,
+        workers: Optional[int] = None,
+        chunk_size: int = 10_000,
+    ) -> None:
+        """
+        Replace edge IDs with a digest of the edge
+
+        Only edges added or replaced since the last normalization are
+        processed. Edges changed in place, e.g. by setting their subject,
+        keep their ID unless force is set.
 
-    def _normalize_kg_edge_ids(self) -> None:
+        With workers, the digests of more than chunk_size edges are computed
+        in chunks by that many forked processes. The edge IDs are the same.
+        Where processes can't be forked, or edges aren't kept in memory,
+        they are computed here.
         """
-        Replace edge IDs with a hash of the edge object
+        if force:
+            self._normalized_edges = {}
+            self._edge_id_scheme = None
+        self._normalize_kg_edge_ids(workers, chunk_size)
+
+    def _normalize_kg_edge_ids(
+        self, workers: Optional[int] = None, chunk_size: int = 10_000
+    ) -> None:
         """
-        self._update_kg_edge_ids(
-            lambda edge: EdgeIdentifier(
-                hashlib.blake2b(
-                    hash(edge).to_bytes(16, byteorder="big", signed=True), digest_size=6
-                ).hexdigest()
-            )
-        )
+        Replace edge IDs with a digest of the edge object
+        """
+        if self.knowledge_graph is None:
+            return
+        edges = self.knowledge_graph.edges
+        normalized = {}
+        if self._edge_id_scheme == EDGE_ID_SCHEME:
+            normalized = self._normalized_edges
+        new_edge_ids = list(edges.keys())
+        pending = [
+            index
+            for index, (edge_id, edge) in enumerate(edges.items())
+            if normalized.get(edge_id) is not edge
+        ]
+        if pending:
+            with phase("Message.normalize.digests", len(pending)):
+                values = list(edges.values())
+                pending_edges = [values[index] for index in pending]
+                if (
+                    workers is not None
+                    and workers > 1
+                    and len(pending_edges) > chunk_size
+                    and type(edges.root) is dict
+                    and "fork" in multiprocessing.get_all_start_methods()
+                ):
+                    digests = parallel_edge_digests(pending_edges, workers, chunk_size)
+                else:
+                    digests = [
+                        edge_digest(edge.get_digest_key()) for edge in pending_edges
+                    ]
+            for index, edge_id in zip(pending, digests):
+                new_edge_ids[index] = edge_id
+            self._replace_kg_edge_ids(new_edge_ids)
+
+        # Edges stored elsewhere, e.g. on disk, are loaded anew on each
+        # access, so they can't be recognized later
+        if type(edges.root) is dict:
+            self._normalized_edges = dict(edges.root)
+        else:
+            self._normalized_edges = {}
+        self._edge_id_scheme = EDGE_ID_SCHEME
+
+    def _add_normalized_edges(self, other: "Message") -> None:
+        """Record the normalized edges of other, after merging its edges"""
+        if other._edge_id_scheme != EDGE_ID_SCHEME or not other._normalized_edges:
+            return
+        if self._edge_id_scheme != EDGE_ID_SCHEME:
+            self._normalized_edges = {}
+            self._edge_id_scheme = EDGE_ID_SCHEME
+        # Edges already here were updated in place and keep their own entry
+        normalized = self._normalized_edges
+        for edge_id, edge in other._normalized_edges.items():
+            normalized.setdefault(edge_id, edge)
 
     def _update_kg_edge_ids(self, update_func: Callable[[Edge], EdgeIdentifier]):
         """
         Replace edge IDs using the specified function
         """
-
         if self.knowledge_graph is None:
             return
+        self._replace_kg_edge_ids(
+            [update_func(edge) for edge in self.knowledge_graph.edges.values()]
+        )
+        # The new IDs aren't those of normalization
+        self._normalized_edges = {}
+        self._edge_id_scheme = None
 
-        # Mapping of old to new edge IDs
-        edge_id_mapping: dict[EdgeIdentifier, EdgeIdentifier] = {}
+    def _replace_kg_edge_ids(self, new_edge_ids: list[EdgeIdentifier]):
+        """
+        Replace edge IDs with new ones, given in the order of the edges
 
-        # Make a copy of the edge keys because we're about to change them
-        for edge_id in list(self.knowledge_graph.edges.keys()):
-            edge = self.knowledge_graph.edges.pop(edge_id)
-            new_edge_id = update_func(edge)
+        Edges getting the same ID are merged, the last one is kept.
+        """
+        self._support_index = None
+        edges = self.knowledge_graph.edges
 
-            edge_id_mapping[edge_id] = new_edge_id
+        # Mapping of old to new edge IDs
+        edge_id_mapping: dict[EdgeIdentifier, EdgeIdentifier] = dict(
+            zip(edges.keys(), new_edge_ids)
+        )
 
-            # Update knowledge graph
-            self.knowledge_graph.edges[new_edge_id] = edge
+        with phase("Message.update_kg_edge_ids.edges", len(edges)):
+            if type(edges.root) is dict:
+                edges.root = dict(zip(new_edge_ids, edges.root.values()))
+            else:
+                # Other storage, e.g. on disk, is updated in place
+                for edge_id, new_edge_id in edge_id_mapping.items():
+                    if edge_id != new_edge_id:
+                        edges[new_edge_id] = edges.pop(edge_id)
 
         # Update auxiliary graphs
         if self.auxiliary_graphs:
-            aux_len = len(self.auxiliary_graphs.values())
-            aux_num = 0
-            for auxiliary_graph in self.auxiliary_graphs.values():
-                aux_num += 1
-                if auxiliary_graph.edges:
-                    edges_len = len(auxiliary_graph.edges)
-                    edges_num = 0
-                    aux_edges = copy.deepcopy(auxiliary_graph.edges)
-                    for aux_edge in aux_edges:
-                        edges_num += 1
-                        auxiliary_graph.edges.discard(aux_edge)
+            with phase(
+                "Message.update_kg_edge_ids.auxiliary_graphs",
+                len(self.auxiliary_graphs),
+            ):
+                for auxiliary_graph in self.auxiliary_graphs.values():
+                    if not auxiliary_graph.edges:
+                        raise Exception("This aux graph has no edges")
+                    new_aux_edges = set()
+                    for aux_edge in auxiliary_graph.edges:
                         try:
                             new_edge_id = edge_id_mapping[aux_edge]
-                            auxiliary_graph.edges.add(new_edge_id)
-                            edge_id_mapping[new_edge_id] = new_edge_id
                         except KeyError:
                             raise Exception(
                                 f"Aux graph edge id {aux_edge} not found in edge id mapping"
                             )
-                    if edges_len != edges_num:
-                        raise Exception("Missed an aux graph edge normalization.")
-                else:
-                    raise Exception("This aux graph has no edges")
-            if aux_len != aux_num:
-                raise Exception("Missed an aux graph normalization.")
+                        new_aux_edges.add(new_edge_id)
+                        # Other aux graphs may already refer to the new ID
+                        edge_id_mapping[new_edge_id] = new_edge_id
+                    auxiliary_graph.edges.root = new_aux_edges
 
         # Update results
         if self.results:
-            for result in self.results:
-                if result and result.analyses:
+            with phase("Message.update_kg_edge_ids.results", len(self.results)):
+                for result in self.results:
+                    if not (result and result.analyses):
+                        continue
                     for analysis in result.analyses:
-                        if isinstance(analysis, Analysis):
-                            for edge_binding_list in analysis.edge_bindings.values():
-                                for eb in edge_binding_list:
-                                    eb.id = edge_id_mapping[eb.id]
+                        if not isinstance(analysis, Analysis):
+                            continue
+                        for edge_binding_list in analysis.edge_bindings.values():
+                            for eb in edge_binding_list:
+                                eb.id = edge_id_mapping[eb.id]
+            # The lookup index is keyed by the old IDs
+            self.results._index = None
+
+    def expand_support(
+        self,
+        item: Union[Result, Edge, EdgeIdentifier],
+        max_depth: Optional[int] = None,
+    ) -> SupportExpansion:
+        """
+        Get the auxiliary graphs and edges supporting a result or an edge
+
+        Support graphs of analyses, path bindings and support graphs of
+        bound edges are followed through the support graphs of the edges in
+        them. Graphs referred to directly are at depth 1, with max_depth
+        only graphs up to that depth are included. Cycles end the expansion
+        and are reported in cyclic_aux_graph_ids.
+
+        Closures of auxiliary graphs are kept, so graphs shared by many
+        results are expanded once. They are dropped when the message
+        methods change edges or auxiliary graphs; call clear_support_cache()
+        after changing support graphs in place.
+        """
+        edges = (
+            self.knowledge_graph.edges
+            if self.knowledge_graph
+            else HashableMapping[EdgeIdentifier, Edge]()
+        )
+        auxiliary_graphs = self.auxiliary_graphs or AuxiliaryGraphs()
+        index = self._support_index
+        if index is None or index.key != SupportIndex.get_key(edges, auxiliary_graphs):
+            index = self._support_index = SupportIndex(edges, auxiliary_graphs)
+        return index.expand(item, max_depth)
+
+    def clear_support_cache(self) -> None:
+        """Forget support graph closures computed by expand_support"""
+        self._support_index = None
+
+    def memory_report(
+        self, seen: Optional[set[int]] = None
+    ) -> dict[str, dict[str, int]]:
+        """
+        Estimate the retained bytes and object count of each message section
+
+        Objects shared between sections are attributed to the first section
+        that reaches them, in the order: attributes (of nodes and edges),
+        nodes, edges, analyses, results, auxiliary graphs, query graph.
+        "total" includes the message and graph containers themselves.
+        """
+        if seen is None:
+            seen = set()
+        sections: dict[str, list[object]] = {
+            "attributes": [],
+            "nodes": [],
+            "edges": [],
+            "analyses": [],
+            "results": [],
+            "auxiliary_graphs": [],
+            "query_graph": [],
+        }
+        if self.knowledge_graph is not None:
+            for node in self.knowledge_graph.nodes.values():
+                sections["attributes"].append(node.attributes)
+            for edge in self.knowledge_graph.edges.values():
+                sections["attributes"].append(edge.attributes)
+            sections["nodes"].append(self.knowledge_graph.nodes)
+            sections["edges"].append(self.knowledge_graph.edges)
+        if self.results is not None:
+            for result in self.results:
+                sections["analyses"].append(result.analyses)
+            sections["results"].append(self.results)
+        sections["auxiliary_graphs"].append(self.auxiliary_graphs)
+        sections["query_graph"].append(self.query_graph)
+
+        report: dict[str, dict[str, int]] = {}
+        total_bytes = 0
+        total_objects = 0
+        for section, objects in sections.items():
+            size, count = deep_sizeof(objects, seen)
+            # Don't count the list built above
+            size -= sys.getsizeof(objects)
+            count -= 1
+            report[section] = {"bytes": size, "objects": count}
+            total_bytes += size
+            total_objects += count
+        size, count = deep_sizeof(self, seen)
+        report["total"] = {
+            "bytes": total_bytes + size,
+            "objects": total_objects + count,
+        }
+        return report
+
+    def get_bound_edge_ids(
+        self, qedge_keys: Optional[Iterable[str]] = None
+    ) -> set[EdgeIdentifier]:
+        """
+        Get the IDs of knowledge graph edges bound in any analysis
+
+        If qedge_keys are given, only bindings to those query edges count.
+        """
+        keys = None if qedge_keys is None else set(qedge_keys)
+        bound: set[EdgeIdentifier] = set()
+        for result in self.results or []:
+            for analysis in result.analyses:
+                if not isinstance(analysis, Analysis):
+                    continue
+                for qedge_key, edge_bindings in analysis.edge_bindings.items():
+                    if keys is None or qedge_key in keys:
+                        bound.update(eb.id for eb in edge_bindings)
+        return bound
+
+    def get_bound_node_ids(
+        self, qnode_keys: Optional[Iterable[str]] = None
+    ) -> set[CURIE]:
+        """
+        Get the IDs of knowledge graph nodes bound in any result
+
+        If qnode_keys are given, only bindings to those query nodes count.
+        """
+        keys = None if qnode_keys is None else set(qnode_keys)
+        bound: set[CURIE] = set()
+        for result in self.results or []:
+            for qnode_key, node_bindings in result.node_bindings.items():
+                if keys is None or qnode_key in keys:
+                    bound.update(nb.id for nb in node_bindings)
+        return bound
+
+    def diff(self, old: "Message") -> MessageDelta:
+        """
+        Get the changes from old to this message
+
+        old must not share models with this message, e.g. keep a copy made
+        with model_copy(deep=True), since changes made in place to a shared
+        model can't be seen.
+        """
+        delta = MessageDelta()
+        new_results = _get_results_by_key(self.results)
+        old_results = _get_results_by_key(old.results)
+        if hash(self.query_graph) != hash(old.query_graph):
+            delta.query_graph = self.query_graph
+
+        for name, new_items, old_items in (
+            (
+                "nodes",
+                self.knowledge_graph.nodes if self.knowledge_graph else {},
+                old.knowledge_graph.nodes if old.knowledge_graph else {},
+            ),
+            (
+                "edges",
+                self.knowledge_graph.edges if self.knowledge_graph else {},
+                old.knowledge_graph.edges if old.knowledge_graph else {},
+            ),
+            (
+                "auxiliary_graphs",
+                self.auxiliary_graphs or {},
+                old.auxiliary_graphs or {},
+            ),
+            ("results", new_results, old_results),
+        ):
+            changed = getattr(delta, name)
+            for key, value in new_items.items():
+                previous = old_items.get(key, None)
+                # hash() of edges and results only covers what identifies them
+                if previous is None or deep_hash(value) != deep_hash(previous):
+                    changed[key] = value
+            getattr(delta, f"removed_{name}").update(
+                key for key in old_items if key not in new_items
+            )
+
+        # Patching keeps the order of old results and appends new ones
+        patched_keys = [key for key in old_results if key in new_results]
+        patched_keys.extend(key for key in new_results if key not in old_results)
+        if patched_keys != list(new_results):
+            delta.result_order = HashableSequence[str](list(new_results))
+        return delta
+
+    def apply_patch(self, delta: MessageDelta) -> None:
+        """
+        Apply changes made by diff() to the old message
+        """
+        self._support_index = None
+        if delta.query_graph is not None:
+            self.query_graph = delta.query_graph
+
+        if delta.nodes or delta.edges or delta.removed_nodes or delta.removed_edges:
+            if self.knowledge_graph is None:
+                self.knowledge_graph = KnowledgeGraph()
+            for key in delta.removed_nodes:
+                self.knowledge_graph.nodes.pop(key, None)
+            for key in delta.removed_edges:
+                self.knowledge_graph.edges.pop(key, None)
+            self.knowledge_graph.nodes.update(delta.nodes)
+            self.knowledge_graph.edges.update(delta.edges)
+
+        if delta.auxiliary_graphs or delta.removed_auxiliary_graphs:
+            if self.auxiliary_graphs is None:
+                self.auxiliary_graphs = AuxiliaryGraphs()
+            for key in delta.removed_auxiliary_graphs:
+                self.auxiliary_graphs.root.pop(key, None)
+            self.auxiliary_graphs.root.update(delta.auxiliary_graphs)
+
+        if delta.results or delta.removed_results or delta.result_order is not None:
+            results = _get_results_by_key(self.results)
+            for key in delta.removed_results:
+                results.pop(key, None)
+            results.update(delta.results)
+            order = delta.result_order if delta.result_order is not None else results
+            if self.results is None:
+                self.results = Results()
+            self.results.root = [results[key] for key in order]
+
+    def rebind_keys(
+        self,
+        node_keys: dict[str, str],
+        edge_keys: Optional[dict[str, str]] = None,
+    ) -> None:
+        """
+        Rename query graph node keys and edge or path keys, also in bindings
+
+        edge_keys applies to the paths of a pathfinder query graph. Keys
+        missing from the mappings are kept. With the mappings returned
+        by QueryGraph.fingerprint(), messages can be cached with canonical
+        keys and rebound to the keys of each query with the same fingerprint:
+
+            digest, node_keys, edge_keys = message.query_graph.fingerprint()
+            message.rebind_keys(node_keys, edge_keys)
+            ...
+            cached.rebind_keys(
+                {v: k for k, v in node_keys.items()},
+                {v: k for k, v in edge_keys.items()},
+            )
+        """
+        edge_keys = edge_keys or {}
+
+        def rename(keyed: HashableMapping, mapping: dict[str, str]) -> None:
+            keyed.root = {mapping.get(k, k): v for k, v in keyed.root.items()}
+
+        if self.query_graph is not None:
+            rename(self.query_graph.nodes, node_keys)
+            links = (
+                self.query_graph.paths
+                if isinstance(self.query_graph, PathfinderQueryGraph)
+                else self.query_graph.edges
+            )
+            rename(links, edge_keys)
+            for link in links.values():
+                link.subject = node_keys.get(link.subject, link.subject)
+                link.object = node_keys.get(link.object, link.object)
+
+        for result in self.results or []:
+            rename(result.node_bindings, node_keys)
+            for analysis in result.analyses:
+                if isinstance(analysis, PathfinderAnalysis):
+                    rename(analysis.path_bindings, edge_keys)
+                else:
+                    rename(analysis.edge_bindings, edge_keys)
+            # Analysis hashes have changed, so the set is rebuilt. set() of
+            # a set would keep the old hashes.
+            result.analyses.root = set(list(result.analyses.root))
+
+    def shard(self, n: int) -> list["Message"]:
+        """
+        Split the results into n messages of consecutive results
+
+        Each shard holds only the knowledge graph nodes and edges and the
+        auxiliary graphs that its results reference, directly or through
+        support graphs. Shards share model objects with this message.
+        """
+        if n < 1:
+            raise ValueError("Number of shards must be at least 1")
+        results = list(self.results) if self.results is not None else []
+        # Positions of the keys, to look up only what each shard references
+        # while keeping the order of this message
+        nodes = self.knowledge_graph.nodes if self.knowledge_graph else {}
+        edges = self.knowledge_graph.edges if self.knowledge_graph else {}
+        auxiliary_graphs = self.auxiliary_graphs or {}
+        node_positions = {key: i for i, key in enumerate(nodes)}
+        edge_positions = {key: i for i, key in enumerate(edges)}
+        aux_positions = {key: i for i, key in enumerate(auxiliary_graphs)}
+        shards = []
+        for i in range(n):
+            chunk = results[i * len(results) // n : (i + 1) * len(results) // n]
+            node_ids, edge_ids, aux_ids = self._get_references(chunk)
+            knowledge_graph = None
+            if self.knowledge_graph is not None:
+                knowledge_graph = KnowledgeGraph.model_construct(
+                    nodes=HashableMapping[CURIE, Node].model_construct(
+                        _select(nodes, node_ids, node_positions)
+                    ),
+                    edges=HashableMapping[EdgeIdentifier, Edge].model_construct(
+                        _select(edges, edge_ids, edge_positions)
+                    ),
+                    **(self.knowledge_graph.model_extra or {}),
+                )
+            shard_auxiliary_graphs = None
+            if self.auxiliary_graphs is not None:
+                shard_auxiliary_graphs = AuxiliaryGraphs.model_construct(
+                    _select(auxiliary_graphs, aux_ids, aux_positions)
+                )
+            shards.append(
+                Message.model_construct(
+                    query_graph=self.query_graph,
+                    knowledge_graph=knowledge_graph,
+                    results=(
+                        Results.model_construct(chunk)
+                        if self.results is not None
+                        else None
+                    ),
+                    auxiliary_graphs=shard_auxiliary_graphs,
+                )
+            )
+        return shards
+
+    @classmethod
+    def reassemble(cls, shards: Iterable["Message"]) -> "Message":
+        """
+        Merge shards made by shard() back into one message
+
+        Results are concatenated in order. Nodes and edges found in several
+        shards are merged with their update methods. Edge IDs are kept as
+        they are, without normalizing again.
+        """
+        message = cls()
+        for shard in shards:
+            if message.query_graph is None:
+                message.query_graph = shard.query_graph
+            if shard.knowledge_graph is not None:
+                if message.knowledge_graph is None:
+                    message.knowledge_graph = KnowledgeGraph()
+                for mapping, other in (
+                    (message.knowledge_graph.nodes, shard.knowledge_graph.nodes),
+                    (message.knowledge_graph.edges, shard.knowledge_graph.edges),
+                ):
+                    for key, value in other.items():
+                        existing = mapping.get(key, None)
+                        if existing is None:
+                            mapping[key] = value
+                        elif existing is not value:
+                            existing.update(value)
+            if shard.results is not None:
+                if message.results is None:
+                    message.results = Results()
+                message.results.root.extend(shard.results)
+            if shard.auxiliary_graphs is not None:
+                if message.auxiliary_graphs is None:
+                    message.auxiliary_graphs = AuxiliaryGraphs()
+                for key, auxiliary_graph in shard.auxiliary_graphs.items():
+                    message.auxiliary_graphs.root.setdefault(key, auxiliary_graph)
+        return message
+
+    def _get_references(
+        self, results: Iterable[Result]
+    ) -> tuple[set[CURIE], set[EdgeIdentifier], set[str]]:
+        """
+        Get the IDs of nodes, edges and auxiliary graphs that results use
+
+        Support graphs of analyses, path bindings and support graphs of
+        edges are followed through the auxiliary graphs.
+        """
+        node_ids: set[CURIE] = set()
+        edge_ids: set[EdgeIdentifier] = set()
+        aux_ids: set[str] = set()
+        for result in results:
+            for node_bindings in result.node_bindings.values():
+                node_ids.update(nb.id for nb in node_bindings)
+            for analysis in result.analyses:
+                if analysis.support_graphs:
+                    aux_ids.update(analysis.support_graphs)
+                if isinstance(analysis, PathfinderAnalysis):
+                    for path_bindings in analysis.path_bindings.values():
+                        aux_ids.update(pb.id for pb in path_bindings)
+                else:
+                    for edge_bindings in analysis.edge_bindings.values():
+                        edge_ids.update(eb.id for eb in edge_bindings)
+
+        edges = self.knowledge_graph.edges if self.knowledge_graph else {}
+        auxiliary_graphs = self.auxiliary_graphs or {}
+        pending_edges = list(edge_ids)
+        pending_aux = list(aux_ids)
+        while pending_edges or pending_aux:
+            while pending_aux:
+                auxiliary_graph = auxiliary_graphs.get(pending_aux.pop(), None)
+                if auxiliary_graph is None:
+                    continue
+                for edge_id in auxiliary_graph.edges:
+                    if edge_id not in edge_ids:
+                        edge_ids.add(edge_id)
+                        pending_edges.append(edge_id)
+            while pending_edges:
+                edge = edges.get(pending_edges.pop(), None)
+                if edge is None:
+                    continue
+                node_ids.add(edge.subject)
+                node_ids.add(edge.object)
+                for aux_id in get_edge_support_graphs(edge):
+                    if aux_id not in aux_ids:
+                        aux_ids.add(aux_id)
+                        pending_aux.append(aux_id)
+        return node_ids, edge_ids, aux_ids
+
+    def remove_kg_edges(
+        self,
+        edge_ids: Iterable[EdgeIdentifier],
+        qnode_keys: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Remove knowledge graph edges along with every reference to them
+
+        Edge bindings to removed edges are dropped. Analyses left without
+        any edge bindings, and results left without any analyses, are removed.
+        Auxiliary graphs that lose all of their edges are removed as well.
+
+        If qnode_keys are given, nodes connected to a removed edge that are
+        bound to one of those query nodes and left without edges are removed.
+        """
+        self._support_index = None
+        if self.knowledge_graph is None:
+            return
+        removed = {
+            edge_id for edge_id in edge_ids if edge_id in self.knowledge_graph.edges
+        }
+        if not removed:
+            return
+
+        connected: set[CURIE] = set()
+        if qnode_keys:
+            for edge_id in removed:
+                edge = self.knowledge_graph.edges[edge_id]
+                connected.add(edge.subject)
+                connected.add(edge.object)
+            connected &= self.get_bound_node_ids(qnode_keys)
+
+        for edge_id in removed:
+            del self.knowledge_graph.edges[edge_id]
+
+        if self.auxiliary_graphs:
+            emptied: set[str] = set()
+            for aux_id, auxiliary_graph in self.auxiliary_graphs.items():
+                remaining = auxiliary_graph.edges.root - removed
+                if len(remaining) == len(auxiliary_graph.edges):
+                    continue
+                auxiliary_graph.edges.root = remaining
+                if not remaining:
+                    emptied.add(aux_id)
+            if emptied:
+                self._remove_auxiliary_graphs(emptied)
+
+        if self.results:
+            kept: list[Result] = []
+            for result in self.results:
+                analyses = [
+                    analysis
+                    for analysis in result.analyses
+                    if not isinstance(analysis, Analysis)
+                    or _remove_edge_bindings(analysis, removed)
+                ]
+                if not analyses and result.analyses:
+                    continue
+                # Analysis hashes may have changed, so the set is rebuilt
+                result.analyses.root = set(analyses)
+                kept.append(result)
+            self.results.root = kept
+
+        if connected:
+            for edge in self.knowledge_graph.edges.values():
+                connected.discard(edge.subject)
+                connected.discard(edge.object)
+            self.remove_kg_nodes(connected)
+
+    def remove_kg_nodes(self, node_ids: Iterable[CURIE]) -> None:
+        """
+        Remove knowledge graph nodes along with every reference to them
+
+        Edges incident to removed nodes are removed via remove_kg_edges, and
+        results binding any removed node are dropped.
+        """
+        if self.knowledge_graph is None:
+            return
+        removed = {
+            node_id for node_id in node_ids if node_id in self.knowledge_graph.nodes
+        }
+        if not removed:
+            return
+        for node_id in removed:
+            del self.knowledge_graph.nodes[node_id]
+
+        self.remove_kg_edges(
+            [
+                edge_id
+                for edge_id, edge in self.knowledge_graph.edges.items()
+                if edge.subject in removed or edge.object in removed
+            ]
+        )
+
+        if self.results:
+            self.results.root = [
+                result
+                for result in self.results
+                if not any(
+                    node_binding.id in removed
+                    for node_bindings in result.node_bindings.values()
+                    for node_binding in node_bindings
+                )
+            ]
+
+    def deduplicate_auxiliary_graphs(self) -> dict[str, str]:
+        """
+        Merge auxiliary graphs with the same edges and attributes
+
+        The first graph of each group is kept and references to the others,
+        in analyses, path bindings and edge support_graphs attributes, point
+        to it instead. Extra fields of the removed graphs are not kept.
+        Edge IDs should be normalized first, as they are on validation.
+
+        Get the mapping of removed to kept keys.
+        """
+        if not self.auxiliary_graphs:
+            return {}
+        kept: dict[str, str] = {}
+        mapping: dict[str, str] = {}
+        with phase("Message.deduplicate_auxiliary_graphs", len(self.auxiliary_graphs)):
+            for aux_id, auxiliary_graph in self.auxiliary_graphs.items():
+                first = kept.setdefault(auxiliary_graph.get_digest(), aux_id)
+                if first != aux_id:
+                    mapping[aux_id] = first
+            self._rename_auxiliary_graphs(mapping)
+        return mapping
+
+    def _rename_auxiliary_graphs(self, mapping: dict[str, str]) -> None:
+        """
+        Move auxiliary graphs to new keys and update the references to them
+
+        A graph moved to a key in use is dropped, the graph there is kept.
+        """
+        self._support_index = None
+        if not mapping or not self.auxiliary_graphs:
+            return
+        auxiliary_graphs = self.auxiliary_graphs.root
+        for aux_id, new_aux_id in mapping.items():
+            auxiliary_graph = auxiliary_graphs.pop(aux_id, None)
+            if auxiliary_graph is not None:
+                auxiliary_graphs.setdefault(new_aux_id, auxiliary_graph)
+
+        if self.knowledge_graph:
+            for edge in self.knowledge_graph.edges.values():
+                renamed = False
+                for attribute in edge.attributes or ():
+                    if attribute.attribute_type_id != "biolink:support_graphs":
+                        continue
+                    value = attribute.value
+                    if isinstance(value, str):
+                        if value in mapping:
+                            attribute.value = mapping[value]
+                            renamed = True
+                    elif isinstance(value, Iterable) and any(
+                        v in mapping for v in value
+                    ):
+                        attribute.value = type(value)(
+                            list(dict.fromkeys(mapping.get(v, v) for v in value))
+                        )
+                        renamed = True
+                if renamed:
+                    # Attribute hashes have changed, so the set is rebuilt.
+                    # set() of a set would keep the old hashes.
+                    edge.attributes.root = set(list(edge.attributes.root))
+
+        if self.results:
+            for result in self.results:
+                for analysis in result.analyses:
+                    if analysis.support_graphs:
+                        analysis.support_graphs.root = {
+                            mapping.get(aux_id, aux_id)
+                            for aux_id in analysis.support_graphs
+                        }
+                    if isinstance(analysis, PathfinderAnalysis):
+                        for path_bindings in analysis.path_bindings.values():
+                            for pb in path_bindings:
+                                pb.id = mapping.get(pb.id, pb.id)
+                            path_bindings.root = set(list(path_bindings.root))
+                # Analysis hashes may have changed, so the set is rebuilt
+                result.analyses.root = set(list(result.analyses.root))
+
+    def _remove_auxiliary_graphs(self, aux_ids: set[str]) -> None:
+        """
+        Remove auxiliary graphs and the support graph references to them
+        """
+        self._support_index = None
+        if not self.auxiliary_graphs:
+            return
+        for aux_id in aux_ids:
+            self.auxiliary_graphs.root.pop(aux_id, None)
+        if self.results:
+            for result in self.results:
+                for analysis in result.analyses:
+                    if analysis.support_graphs:
+                        analysis.support_graphs.root -= aux_ids
+                    if isinstance(analysis, PathfinderAnalysis):
+                        for path_bindings in analysis.path_bindings.values():
+                            path_bindings.root = {
+                                pb for pb in path_bindings if pb.id not in aux_ids
+                            }
+                # Analysis hashes may have changed, so the set is rebuilt.
+                # set() of a set would keep the old hashes.
+                result.analyses.root = set(list(result.analyses.root))
+
+
+def _select(
+    mapping: Mapping[str, Any], keys: set[str], positions: dict[str, int]
+) -> dict[str, Any]:
+    """Get the items of a mapping with the given keys, in mapping order"""
+    return {
+        key: mapping[key]
+        for key in sorted(keys & positions.keys(), key=positions.__getitem__)
+    }
+
+
+def _get_results_by_key(results: Optional[Results]) -> dict[str, Result]:
+    """
+    Map results by Result.get_key()
+
+    Results that share a key are told apart by their order.
+    """
+    by_key: dict[str, Result] = {}
+    for result in results or []:
+        key = result.get_key()
+        if key in by_key:
+            n = 1
+            while f"{key}#{n}" in by_key:
+                n += 1
+            key = f"{key}#{n}"
+        by_key[key] = result
+    return by_key
+
+
+def _remove_edge_bindings(analysis: Analysis, edge_ids: set[EdgeIdentifier]) -> bool:
+    """
+    Drop edge bindings to the given edges from an analysis
+
+    Returns False if the analysis had edge bindings and none are left.
+    """
+    if not analysis.edge_bindings:
+        return True
+    for qedge_key in list(analysis.edge_bindings.keys()):
+        edge_bindings = analysis.edge_bindings[qedge_key]
+        remaining = {eb for eb in edge_bindings if eb.id not in edge_ids}
+        if len(remaining) == len(edge_bindings):
+            continue
+        if remaining:
+            edge_bindings.root = remaining
+        else:
+            del analysis.edge_bindings[qedge_key]
+    return len(analysis.edge_bindings) > 0
 
 
 class Query(BaseModel):
@@ -202,9 +1074,7 @@ class Response(BaseModel):
     """Response."""
 
     message: Message
-    logs: HashableSequence[LogEntry] = Field(
-        default_factory=lambda: HashableSequence[LogEntry]()
-    )
+    logs: LogBuffer = Field(default_factory=lambda: LogBuffer())
     status: Optional[str] = None
     description: Optional[str] = None
     workflow: Optional[Workflow] = None
@@ -222,6 +1092,26 @@ class Response(BaseModel):
             self.message.normalize()
         return self
 
+    def memory_report(self) -> dict[str, dict[str, int]]:
+        """
+        Estimate the retained bytes and object count of each response section
+
+        See Message.memory_report, this adds the logs.
+        """
+        seen: set[int] = set()
+        report = self.message.memory_report(seen)
+        total = report.pop("total")
+        size, count = deep_sizeof(self.logs, seen)
+        report["logs"] = {"bytes": size, "objects": count}
+        total["bytes"] += size
+        total["objects"] += count
+        size, count = deep_sizeof(self, seen)
+        report["total"] = {
+            "bytes": total["bytes"] + size,
+            "objects": total["objects"] + count,
+        }
+        return report
+
 
 class AsyncQueryResponse(BaseModel):
     """ "Async Query Response."""
@@ -237,7 +1127,7 @@ class AsyncQueryStatusResponse(BaseModel):
 
     status: str
     description: str
-    logs: HashableSequence[LogEntry]
+    logs: LogBuffer
     response_url: Optional[str] = None
 
     model_config = ConfigDict(title="async query status response", extra="allow")
@@ -1,10 +1,12 @@
-from pydantic import AfterValidator, ConfigDict
+from itertools import product
+from pydantic import AfterValidator, ConfigDict, PrivateAttr
 from reasoner_pydantic.shared import CURIE, KnowledgeType
-from typing import Annotated, Optional
+from typing import Annotated, Iterable, Mapping, Optional
 
-from reasoner_pydantic import BiolinkEntity, BiolinkPredicate
+from .shared import BiolinkEntity, BiolinkPredicate
 
 from .base_model import BaseModel
+from .qgraph import BaseQueryGraph, QEdge, QNode
 from .utils import HashableMapping, HashableSequence, nonzero_validator
 
 
@@ -39,7 +41,308 @@ class MetaEdge(BaseModel):
     association: Optional[BiolinkEntity] = None
     model_config = ConfigDict(extra="forbid")
 
+    def qualifier_types(self) -> frozenset[CURIE]:
+        return frozenset(
+            qualifier.qualifier_type_id for qualifier in self.qualifiers or ()
+        )
+
+
+# (subject category, predicate, object category), None matches anything
+Triple = tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def curie_prefix(curie: CURIE) -> str:
+    return curie.split(":", 1)[0]
+
+
+def qedge_qualifier_types(qedge: QEdge) -> list[frozenset[CURIE]]:
+    """
+    Get the qualifier types of each qualifier set of a QEdge
+
+    An edge must support every type of at least one of the sets. An empty
+    list means the QEdge has no qualifier constraints.
+    """
+    return [
+        frozenset(q.qualifier_type_id for q in constraint.qualifier_set)
+        for constraint in qedge.qualifier_constraints
+        if constraint.qualifier_set
+    ]
+
+
+def qualifiers_supported(
+    required: list[frozenset[CURIE]], available: Iterable[frozenset[CURIE]]
+) -> bool:
+    """Check that some available qualifier type set covers a required one"""
+    if not required:
+        return True
+    return any(
+        qualifier_types <= supported
+        for qualifier_types in required
+        for supported in available
+    )
+
+
+def qnode_categories(
+    qnode: Optional[QNode], categories_by_prefix: Mapping[str, Iterable[str]]
+) -> list[Optional[str]]:
+    """
+    Get the categories to look a QNode up with
+
+    Without categories, those implied by the ID prefixes are used. None
+    stands for any category.
+    """
+    if qnode is None:
+        return [None]
+    if qnode.categories:
+        return list(qnode.categories)
+    if qnode.ids:
+        categories: set[str] = set()
+        for curie in qnode.ids:
+            categories.update(categories_by_prefix.get(curie_prefix(curie), ()))
+        return list(categories)
+    return [None]
+
+
+def qedge_triples(
+    qedge: QEdge,
+    qgraph: BaseQueryGraph,
+    categories_by_prefix: Mapping[str, Iterable[str]],
+) -> Iterable[Triple]:
+    """Enumerate the (subject, predicate, object) combinations a QEdge asks for"""
+    return product(
+        qnode_categories(qgraph.nodes.get(qedge.subject), categories_by_prefix),
+        qedge.predicates or [None],
+        qnode_categories(qgraph.nodes.get(qedge.object), categories_by_prefix),
+    )
+
+
+class MetaKGIndex:
+    """
+    Compiled lookup tables for a MetaKnowledgeGraph
+
+    Triples are indexed under every wildcard pattern, so any combination of
+    known and unknown subject, predicate and object is a single dict lookup.
+    """
+
+    def __init__(self, metakg: "MetaKnowledgeGraph"):
+        self.edges_by_triple: dict[Triple, list[MetaEdge]] = {}
+        self.edges_by_qualifier_type: dict[CURIE, list[MetaEdge]] = {}
+        self.qualifier_types_by_triple: dict[Triple, set[frozenset[CURIE]]] = {}
+        self.categories_by_prefix: dict[str, set[str]] = {}
+        self.prefixes_by_category: dict[str, frozenset[str]] = {}
+
+        for edge in metakg.edges:
+            qualifier_types = edge.qualifier_types()
+            for triple in product(
+                (edge.subject, None), (edge.predicate, None), (edge.object, None)
+            ):
+                self.edges_by_triple.setdefault(triple, []).append(edge)
+                self.qualifier_types_by_triple.setdefault(triple, set()).add(
+                    qualifier_types
+                )
+            for qualifier_type in qualifier_types:
+                self.edges_by_qualifier_type.setdefault(qualifier_type, []).append(edge)
+
+        for category, node in metakg.nodes.items():
+            self.prefixes_by_category[category] = frozenset(node.id_prefixes)
+            for prefix in node.id_prefixes:
+                self.categories_by_prefix.setdefault(prefix, set()).add(category)
+
+    def get_edges(
+        self,
+        subject: Optional[str] = None,
+        predicate: Optional[str] = None,
+        object: Optional[str] = None,
+    ) -> list[MetaEdge]:
+        return self.edges_by_triple.get((subject, predicate, object), [])
+
+    def supports_triple(
+        self, triple: Triple, qualifier_types: list[frozenset[CURIE]]
+    ) -> bool:
+        supported = self.qualifier_types_by_triple.get(triple)
+        if not supported:
+            return False
+        return qualifiers_supported(qualifier_types, supported)
+
+    def supports_qnode(self, qnode: QNode) -> bool:
+        if qnode.categories and not any(
+            category in self.prefixes_by_category for category in qnode.categories
+        ):
+            return False
+        if not qnode.ids:
+            return True
+        for curie in qnode.ids:
+            categories = self.categories_by_prefix.get(curie_prefix(curie), ())
+            if categories and (
+                not qnode.categories
+                or any(category in categories for category in qnode.categories)
+            ):
+                return True
+        return False
+
+    def supports_qedge(self, qedge: QEdge, qgraph: BaseQueryGraph) -> bool:
+        qualifier_types = qedge_qualifier_types(qedge)
+        return any(
+            self.supports_triple(triple, qualifier_types)
+            for triple in qedge_triples(qedge, qgraph, self.categories_by_prefix)
+        )
+
 
 class MetaKnowledgeGraph(BaseModel):
     nodes: HashableMapping[str, MetaNode]
     edges: HashableSequence[MetaEdge]
+
+    _index: Optional[MetaKGIndex] = PrivateAttr(default=None)
+
+    def compile(self) -> MetaKGIndex:
+        """(Re)build the lookup index, call this after modifying nodes or edges"""
+        self._index = MetaKGIndex(self)
+        return self._index
+
+    @property
+    def index(self) -> MetaKGIndex:
+        """Lookup index, compiled on first use"""
+        if self._index is None:
+            return self.compile()
+        return self._index
+
+    def supports(self, qgraph: BaseQueryGraph) -> bool:
+        """Check whether every QNode and QEdge of a query graph can be served"""
+        index = self.index
+        if not all(index.supports_qnode(qnode) for qnode in qgraph.nodes.values()):
+            return False
+        return all(
+            index.supports_qedge(qedge, qgraph)
+            for qedge in getattr(qgraph, "edges", {}).values()
+        )
+
+
+class MetaKGRegistry:
+    """
+    Inverted index over the MetaKGs of many KPs, for query routing
+
+    Every (subject, predicate, object) pattern maps to the KPs that serve it
+    and the qualifier type sets each of them supports, so finding the KPs
+    for a QEdge costs one lookup per triple regardless of the number of KPs.
+    KPs can be added and removed without rebuilding the index.
+    """
+
+    def __init__(self):
+        self.metakgs: dict[CURIE, MetaKnowledgeGraph] = {}
+        # Indexes as of registration, so removal undoes exactly what was added
+        self._indexes: dict[CURIE, MetaKGIndex] = {}
+        self._kps_by_triple: dict[Triple, dict[CURIE, set[frozenset[CURIE]]]] = {}
+        # prefix -> category -> KPs with that category and prefix
+        self._categories_by_prefix: dict[str, dict[str, set[CURIE]]] = {}
+        # category -> KPs with nodes of that category
+        self._kps_by_category: dict[str, set[CURIE]] = {}
+
+    def __contains__(self, infores: object) -> bool:
+        return infores in self.metakgs
+
+    def __len__(self) -> int:
+        return len(self.metakgs)
+
+    def add(self, infores: CURIE, metakg: MetaKnowledgeGraph) -> None:
+        """Register a KP's MetaKG, replacing any previous one"""
+        if infores in self.metakgs:
+            self.remove(infores)
+        self.metakgs[infores] = metakg
+        index = self._indexes[infores] = MetaKGIndex(metakg)
+        for triple, qualifier_types in index.qualifier_types_by_triple.items():
+            self._kps_by_triple.setdefault(triple, {})[infores] = set(qualifier_types)
+        for prefix, categories in index.categories_by_prefix.items():
+            by_category = self._categories_by_prefix.setdefault(prefix, {})
+            for category in categories:
+                by_category.setdefault(category, set()).add(infores)
+        for category in index.prefixes_by_category:
+            self._kps_by_category.setdefault(category, set()).add(infores)
+
+    def remove(self, infores: CURIE) -> None:
+        """Unregister a KP"""
+        del self.metakgs[infores]
+        index = self._indexes.pop(infores)
+        for triple in index.qualifier_types_by_triple:
+            kps = self._kps_by_triple[triple]
+            del kps[infores]
+            if not kps:
+                del self._kps_by_triple[triple]
+        for prefix, categories in index.categories_by_prefix.items():
+            by_category = self._categories_by_prefix[prefix]
+            for category in categories:
+                by_category[category].discard(infores)
+                if not by_category[category]:
+                    del by_category[category]
+            if not by_category:
+                del self._categories_by_prefix[prefix]
+        for category in index.prefixes_by_category:
+            kps = self._kps_by_category[category]
+            kps.discard(infores)
+            if not kps:
+                del self._kps_by_category[category]
+
+    def kps_for_triple(
+        self,
+        triple: Triple,
+        qualifier_types: Optional[list[frozenset[CURIE]]] = None,
+    ) -> set[CURIE]:
+        kps = self._kps_by_triple.get(triple, {})
+        if not qualifier_types:
+            return set(kps)
+        return {
+            infores
+            for infores, supported in kps.items()
+            if qualifiers_supported(qualifier_types, supported)
+        }
+
+    def _kps_for_ids(
+        self, ids: Iterable[CURIE], categories: Optional[Iterable[str]] = None
+    ) -> set[CURIE]:
+        """Get the KPs with some of the ID prefixes under one of the categories"""
+        kps: set[CURIE] = set()
+        for prefix in {curie_prefix(curie) for curie in ids}:
+            by_category = self._categories_by_prefix.get(prefix, {})
+            for category in by_category if categories is None else categories:
+                kps |= by_category.get(category, set())
+        return kps
+
+    def _kps_for_qnode(self, qnode: QNode) -> Optional[set[CURIE]]:
+        """Get the KPs that serve a QNode, None if any KP does"""
+        if qnode.ids:
+            return self._kps_for_ids(qnode.ids, qnode.categories or None)
+        if qnode.categories:
+            kps: set[CURIE] = set()
+            for category in qnode.categories:
+                kps |= self._kps_by_category.get(category, set())
+            return kps
+        return None
+
+    def kps_for_qedge(self, qedge: QEdge, qgraph: BaseQueryGraph) -> set[CURIE]:
+        """Get the KPs that can serve a QEdge"""
+        qualifier_types = qedge_qualifier_types(qedge)
+        subject = qgraph.nodes.get(qedge.subject)
+        object = qgraph.nodes.get(qedge.object)
+        kps: set[CURIE] = set()
+        for triple in qedge_triples(qedge, qgraph, self._categories_by_prefix):
+            found = self.kps_for_triple(triple, qualifier_types)
+            # The categories of a QNode with IDs only are those of the ID
+            # prefixes of every KP, each KP must map a prefix to them itself
+            for qnode, category in ((subject, triple[0]), (object, triple[2])):
+                if found and qnode is not None and qnode.ids and not qnode.categories:
+                    found &= self._kps_for_ids(qnode.ids, [category])
+            kps |= found
+        qnodes = [qnode for qnode in (subject, object) if qnode is not None]
+        if any(qnode.ids for qnode in qnodes):
+            # Each KP must also serve the IDs themselves
+            for qnode in qnodes:
+                served = self._kps_for_qnode(qnode)
+                if served is not None:
+                    kps &= served
+        return kps
+
+    def route(self, qgraph: BaseQueryGraph) -> dict[str, set[CURIE]]:
+        """Map each QEdge key of a query graph to the KPs that can serve it"""
+        return {
+            qedge_key: self.kps_for_qedge(qedge, qgraph)
+            for qedge_key, qedge in getattr(qgraph, "edges", {}).items()
+        }
@@ -0,0 +1,138 @@
+"""Optional per-phase profiling of validation, normalization and merging.
+
+Instrumented code reports phases to registered listeners:
+
+    from reasoner_pydantic import profiling
+
+    with profiling.profile() as records:
+        message.update(other)
+    print(profiling.summarize(records))
+
+Listeners can also be registered directly with add_listener, e.g. to
+export phases to a metrics system. When no listener is registered, phase()
+returns a shared no-op context manager, so the instrumentation costs one
+function call per phase.
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+
+@dataclass
+class PhaseRecord:
+    """Measurements of one run of a phase"""
+
+    name: str
+    seconds: float
+    items: int = 0
+    # Net traced allocations, only recorded while tracemalloc is tracing
+    allocated_bytes: Optional[int] = None
+
+
+Listener = Callable[[PhaseRecord], None]
+
+_listeners: list[Listener] = []
+
+
+def add_listener(listener: Listener) -> None:
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Listener) -> None:
+    _listeners.remove(listener)
+
+
+class _NullPhase:
+    """Phase used when profiling is off, assignments to items are ignored"""
+
+    __slots__ = ()
+
+    @property
+    def items(self) -> int:
+        return 0
+
+    @items.setter
+    def items(self, _value: int) -> None:
+        pass
+
+    def __enter__(self) -> "_NullPhase":
+        return self
+
+    def __exit__(self, *_args: Any) -> None:
+        return None
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ("name", "items", "_start", "_allocated")
+
+    def __init__(self, name: str, items: int):
+        self.name = name
+        self.items = items
+
+    def __enter__(self) -> "_Phase":
+        self._allocated = (
+            tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        )
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_args: Any) -> None:
+        seconds = time.perf_counter() - self._start
+        allocated = None
+        if self._allocated is not None and tracemalloc.is_tracing():
+            allocated = tracemalloc.get_traced_memory()[0] - self._allocated
+        record = PhaseRecord(self.name, seconds, self.items, allocated)
+        for listener in list(_listeners):
+            listener(record)
+
+
+def phase(name: str, items: int = 0):
+    """
+    Measure a phase of work
+
+    The item count can be given up front or assigned to the items attribute
+    of the returned object inside the with block.
+    """
+    if not _listeners:
+        return _NULL_PHASE
+    return _Phase(name, items)
+
+
+@contextmanager
+def profile(trace_allocations: bool = False) -> Iterator[list[PhaseRecord]]:
+    """Collect the phases run inside the with block"""
+    records: list[PhaseRecord] = []
+    started_tracing = trace_allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    add_listener(records.append)
+    try:
+        yield records
+    finally:
+        remove_listener(records.append)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def summarize(records: list[PhaseRecord]) -> dict[str, dict[str, Any]]:
+    """Aggregate records by phase name"""
+    summary: dict[str, dict[str, Any]] = {}
+    for record in records:
+        totals = summary.setdefault(
+            record.name,
+            {"calls": 0, "seconds": 0.0, "items": 0, "allocated_bytes": None},
+        )
+        totals["calls"] += 1
+        totals["seconds"] += record.seconds
+        totals["items"] += record.items
+        if record.allocated_bytes is not None:
+            totals["allocated_bytes"] = (
+                totals["allocated_bytes"] or 0
+            ) + record.allocated_bytes
+    return summary
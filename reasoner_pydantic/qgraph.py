@@ -1,5 +1,7 @@
 """Query graph models."""
 
+import hashlib
+import json
 from enum import Enum
 
 from typing import Annotated, Any, Optional
@@ -43,7 +45,7 @@ class AttributeConstraint(BaseModel):
     @model_serializer
     def serialize(self):
         """Replace `negated` with `not`."""
-        output = self.__dict__
+        output = dict(self.__dict__)
         output["not"] = output.pop("negated", False)
         return output
 
@@ -175,6 +177,268 @@ class BaseQueryGraph(BaseModel):
 
     model_config = ConfigDict(title="simple query graph", extra="allow")
 
+    def fingerprint(self) -> tuple[str, dict[str, str], dict[str, str]]:
+        """
+        Get a digest of the query graph that doesn't depend on key names
+
+        The digest is the same in every process and for any order of the
+        lists in nodes, edges and paths (ids, categories, predicates and
+        constraints). Also returns mappings from the node keys and from the
+        edge and path keys of this graph to canonical keys (n0, n1, ... and
+        e0, ... or p0, ...), which are the same for every query graph with
+        this digest, see Message.rebind_keys(). Nodes and edges may share
+        key names, so they have separate mappings.
+
+        Graphs with many interchangeable nodes that would take more than
+        MAX_FINGERPRINT_WORK get an approximate digest, starting with
+        APPROXIMATE_FINGERPRINT_PREFIX. It is still the same for equal
+        graphs, but some different graphs share it, and their key mappings
+        don't match.
+        """
+        vertices: list[tuple[str, str]] = []
+        labels: list[str] = []
+        neighbors: list[list[tuple[str, int]]] = []
+        index: dict[tuple[str, str], int] = {}
+        for key, qnode in self.nodes.items():
+            index["n", key] = len(vertices)
+            vertices.append(("n", key))
+            labels.append("n" + _canonical_json(qnode))
+            neighbors.append([])
+        for kind, links in (
+            ("e", getattr(self, "edges", None)),
+            ("p", getattr(self, "paths", None)),
+        ):
+            for key, link in (links or {}).items():
+                vertex = len(vertices)
+                index[kind, key] = vertex
+                vertices.append((kind, key))
+                labels.append(
+                    kind + _canonical_json(link, exclude={"subject", "object"})
+                )
+                neighbors.append([])
+                for role in ("subject", "object"):
+                    # Links may refer to nodes that don't exist
+                    node = index.get(("n", getattr(link, role)))
+                    if node is None:
+                        labels[vertex] += f"|{role}:{getattr(link, role)}"
+                        continue
+                    neighbors[vertex].append((role, node))
+                    neighbors[node].append((f"{role} of", vertex))
+
+        label_ranks = {label: rank for rank, label in enumerate(sorted(set(labels)))}
+        colors = _refine([label_ranks[label] for label in labels], neighbors)
+        result = _canonical_order(colors, labels, neighbors)
+        approximate = result is None
+        if result is None:
+            result = _refined_encoding(colors, labels, neighbors)
+        encoding, order = result
+
+        node_keys: dict[str, str] = {}
+        edge_keys: dict[str, str] = {}
+        counts = {"n": 0, "e": 0, "p": 0}
+        for vertex in order:
+            kind, key = vertices[vertex]
+            mapping = node_keys if kind == "n" else edge_keys
+            mapping[key] = f"{kind}{counts[kind]}"
+            counts[kind] += 1
+        digest = hashlib.sha256(
+            json.dumps([type(self).__name__, encoding]).encode()
+        ).hexdigest()
+        if approximate:
+            digest = APPROXIMATE_FINGERPRINT_PREFIX + digest
+        return digest, node_keys, edge_keys
+
+
+# Bound on the work of fingerprint(), in vertices colored over all
+# refinements. Query graphs need a few hundred, or a few thousand with many
+# interchangeable nodes. Past the bound, graphs get an approximate digest.
+MAX_FINGERPRINT_WORK = 50_000
+APPROXIMATE_FINGERPRINT_PREFIX = "approx-"
+
+
+def _sort_lists(value: Any) -> Any:
+    """Sort lists recursively, except constraint values, to ignore their order"""
+    if isinstance(value, dict):
+        return {k: v if k == "value" else _sort_lists(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return sorted(
+            (_sort_lists(v) for v in value),
+            key=lambda v: json.dumps(v, sort_keys=True),
+        )
+    return value
+
+
+def _canonical_json(model: BaseModel, exclude: Optional[set[str]] = None) -> str:
+    return json.dumps(
+        _sort_lists(model.model_dump(mode="json", exclude=exclude)), sort_keys=True
+    )
+
+
+def _refine(colors: list[int], neighbors: list[list[tuple[str, int]]]) -> list[int]:
+    """
+    Refine vertex colors by the colors of their neighbors until stable
+
+    Colors are ranks of sorted signatures, so they don't depend on the
+    order of the vertices.
+    """
+    while True:
+        signatures = [
+            (colors[v], sorted((role, colors[u]) for role, u in neighbors[v]))
+            for v in range(len(colors))
+        ]
+        ranks = {
+            signature: rank
+            for rank, signature in enumerate(
+                sorted(set((c, tuple(n)) for c, n in signatures))
+            )
+        }
+        refined = [ranks[c, tuple(n)] for c, n in signatures]
+        if len(set(refined)) == len(set(colors)):
+            return refined
+        colors = refined
+
+
+def _canonical_order(
+    colors: list[int],
+    labels: list[str],
+    neighbors: list[list[tuple[str, int]]],
+) -> Optional[tuple[list, list[int]]]:
+    """
+    Find the smallest encoding of the graph over all ways to break ties
+
+    Vertices with the same color after refinement are interchangeable so
+    far. Each one is tried first in turn, recursively, and the order giving
+    the smallest encoding wins. Two orders with the same encoding give an
+    automorphism of the graph. Vertices it maps to a vertex already tried
+    are skipped, and a branch giving the first encoding again is left, as
+    its other orders are images of those already seen.
+
+    Get None if that takes more than MAX_FINGERPRINT_WORK.
+    """
+    best: Optional[tuple[list, list[int]]] = None
+    first: Optional[tuple[list, list[int]]] = None
+    first_path: list[int] = []
+    # Automorphisms found, as the vertices they move
+    automorphisms: list[dict[int, int]] = []
+    work = 0
+    stack = [_SearchNode(colors, [])]
+    while stack:
+        node = stack[-1]
+        if node.cell:
+            vertex = node.next_vertex(automorphisms)
+            if vertex is None:
+                stack.pop()
+                continue
+            individualized = [2 * color + 1 for color in node.colors]
+            individualized[vertex] -= 1
+            work += len(individualized)
+            if work > MAX_FINGERPRINT_WORK:
+                return None
+            refined = _refine(individualized, neighbors)
+            stack.append(_SearchNode(refined, [*node.path, vertex]))
+            continue
+
+        stack.pop()
+        order = sorted(range(len(node.colors)), key=node.colors.__getitem__)
+        encoding = _encode(order, labels, neighbors)
+        if first is None or best is None:
+            first = best = (encoding, order)
+            first_path = node.path
+            continue
+        for known_encoding, known_order in (first, best):
+            if encoding == known_encoding:
+                automorphisms.append(
+                    {u: v for u, v in zip(known_order, order) if u != v}
+                )
+        if encoding == first[0]:
+            # Leave the branch, back to where it parted from the first path
+            common = 0
+            while node.path[common] == first_path[common]:
+                common += 1
+            del stack[common + 1 :]
+        elif encoding < best[0]:
+            best = (encoding, order)
+    assert best is not None
+    return best
+
+
+class _SearchNode:
+    """Colors of the graph after individualizing the vertices of path"""
+
+    __slots__ = ("colors", "path", "fixed", "cell", "done", "orbits", "merged")
+
+    def __init__(self, colors: list[int], path: list[int]):
+        self.colors = colors
+        self.path = path
+        self.fixed = set(path)
+        # Vertices of the smallest color shared by several, to try in turn
+        classes: dict[int, list[int]] = {}
+        for vertex, color in enumerate(colors):
+            classes.setdefault(color, []).append(vertex)
+        self.cell = next(
+            (members for _, members in sorted(classes.items()) if len(members) > 1),
+            [],
+        )
+        self.done: list[int] = []
+        # Orbits of the automorphisms fixing path, as a union-find forest,
+        # and the number of automorphisms looked at
+        self.orbits: dict[int, int] = {}
+        self.merged = 0
+
+    def _find(self, vertex: int) -> int:
+        orbits = self.orbits
+        while vertex in orbits:
+            vertex = orbits[vertex]
+        return vertex
+
+    def next_vertex(self, automorphisms: list[dict[int, int]]) -> Optional[int]:
+        """Get the next vertex of cell to try, skipping images of tried ones"""
+        if not self.done:
+            self.done.append(self.cell[0])
+            return self.cell[0]
+        for automorphism in automorphisms[self.merged :]:
+            if self.fixed.isdisjoint(automorphism):
+                for u, v in automorphism.items():
+                    u, v = self._find(u), self._find(v)
+                    if u != v:
+                        self.orbits[max(u, v)] = min(u, v)
+        self.merged = len(automorphisms)
+        seen = {self._find(vertex) for vertex in self.done}
+        for vertex in self.cell:
+            if self._find(vertex) not in seen:
+                self.done.append(vertex)
+                return vertex
+        return None
+
+
+def _encode(
+    order: list[int], labels: list[str], neighbors: list[list[tuple[str, int]]]
+) -> list:
+    """Encode the graph with vertices numbered by their place in order"""
+    position = {vertex: i for i, vertex in enumerate(order)}
+    return [
+        [labels[v], sorted((role, position[u]) for role, u in neighbors[v])]
+        for v in order
+    ]
+
+
+def _refined_encoding(
+    colors: list[int], labels: list[str], neighbors: list[list[tuple[str, int]]]
+) -> tuple[list, list[int]]:
+    """
+    Encode the graph by its refined colors, which need no tie-breaking
+
+    The encoding is the same for equal graphs, but also for some different
+    graphs that color refinement can't tell apart. Vertices with the same
+    color are ordered as in the graph.
+    """
+    order = sorted(range(len(colors)), key=lambda v: (colors[v], v))
+    encoding = sorted(
+        [labels[v], colors[v], sorted((role, colors[u]) for role, u in neighbors[v])]
+        for v in order
+    )
+    return [["refined", encoding]], order
+
 
 class QueryGraph(BaseQueryGraph):
     """Traditional query graph."""
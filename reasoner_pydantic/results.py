@@ -1,11 +1,14 @@
 """Results models."""
 
 import copy
-from typing import Annotated, Optional, Union
+import hashlib
+import json
+from typing import Annotated, Iterable, Optional, Union
 
-from pydantic import ConfigDict, Field, model_validator
+from pydantic import ConfigDict, Field, PrivateAttr, model_validator
 
 from .base_model import BaseModel
+from .profiling import phase
 from .utils import HashableMapping, HashableSet, HashableSequence
 from .shared import Attribute, CURIE, EdgeIdentifier
 
@@ -199,6 +202,19 @@ class Result(BaseModel):
     def __hash__(self) -> int:
         return hash(self.node_bindings)
 
+    def get_key(self) -> str:
+        """
+        Get a digest of the bound node IDs that is the same in every process
+
+        Unlike hash(), it can be used to match results across processes.
+        Binding attributes are not included.
+        """
+        bindings = sorted(
+            (qnode_key, sorted((nb.id, nb.query_id or "") for nb in node_bindings))
+            for qnode_key, node_bindings in self.node_bindings.items()
+        )
+        return hashlib.blake2b(json.dumps(bindings).encode(), digest_size=8).hexdigest()
+
     def combine_analyses_by_resource_id(self):
         # Useful when a service unintentionally adds multiple analyses to a single result
         # Combines all of those analyses
@@ -222,21 +238,113 @@ class Result(BaseModel):
         self.analyses = combined_analyses
 
 
+class ResultsIndex:
+    """
+    Lookup of results by bound node CURIE and by bound edge ID
+
+    Entries are only added: results that are updated are indexed again,
+    and removing results requires a new index.
+    """
+
+    def __init__(self, results: list[Result]):
+        self.root = results
+        self.count = 0
+        # Keyed by id() to index each result or analysis once per CURIE or ID
+        self.nodes: dict[CURIE, dict[int, Result]] = {}
+        self.edges: dict[
+            EdgeIdentifier, dict[tuple[int, int], tuple[Result, Analysis]]
+        ] = {}
+        self.add_new()
+
+    def __deepcopy__(self, memo: dict) -> None:
+        # Copies of Results build their own index when needed
+        return None
+
+    def add(self, result: Result) -> None:
+        """Index a new or updated result"""
+        for node_bindings in result.node_bindings.values():
+            for node_binding in node_bindings:
+                self.nodes.setdefault(node_binding.id, {})[id(result)] = result
+        for analysis in result.analyses:
+            if not isinstance(analysis, Analysis):
+                continue
+            for edge_bindings in analysis.edge_bindings.values():
+                for edge_binding in edge_bindings:
+                    self.edges.setdefault(edge_binding.id, {})[
+                        (id(result), id(analysis))
+                    ] = (result, analysis)
+
+    def add_new(self) -> None:
+        """Index results appended to the list since the last call"""
+        for result in self.root[self.count :]:
+            self.add(result)
+        self.count = len(self.root)
+
+    def node_results(self, node_id: CURIE) -> list[Result]:
+        """Get the results binding a node"""
+        return list(self.nodes.get(node_id, {}).values())
+
+    def edge_analyses(self, edge_id: EdgeIdentifier) -> list[tuple[Result, Analysis]]:
+        """Get the results and analyses binding an edge"""
+        return list(self.edges.get(edge_id, {}).values())
+
+
 class Results(HashableSequence[Result]):
     """Results."""
 
     model_config = ConfigDict(title="allow")
 
+    _index: Optional[ResultsIndex] = PrivateAttr(default=None)
+
+    def compile(self) -> ResultsIndex:
+        """(Re)build the lookup index, call this after removing bindings"""
+        self._index = ResultsIndex(self.root)
+        return self._index
+
+    @property
+    def lookup(self) -> ResultsIndex:
+        """
+        Lookup index by node and edge, built on first use
+
+        It follows append, add and update, results appended to the list
+        directly, and a new list of results being set.
+        """
+        index = self._current_index()
+        if index is None:
+            return self.compile()
+        index.add_new()
+        return index
+
+    def _current_index(self) -> Optional[ResultsIndex]:
+        """Get the index if it was built for the current list of results"""
+        index = self._index
+        if index is None or index.root is not self.root or index.count > len(self.root):
+            return None
+        return index
+
+    def _reindex(self, results: Iterable[Result]) -> None:
+        """Index new or updated results, if the index is in use"""
+        index = self._current_index()
+        if index is None:
+            return
+        index.add_new()
+        for result in results:
+            index.add(result)
+
     def append(self, value: Result):
         self.root.append(value)
+        self._reindex(())
 
     def add(self, result: Result):
         results = self.root
         try:
             # this is slow for larger results
-            results[results.index(result)].update(result)
+            existing = results[results.index(result)]
         except ValueError:
-            results.append(result)
+            self.append(result)
+        else:
+            existing.update(result)
+            self._reindex([existing])
 
     def __len__(self):
         return len(self.root)
@@ -251,30 +359,47 @@ class Results(HashableSequence[Result]):
         return self.root.__getitem__(i)
 
     def update(self, other: object):
-        results = HashableMapping[int, Result](
-            {hash(result): result for result in self.root}
-        )
-        for result in other:
-            if not isinstance(result, Result):
-                result = Result.model_validate(result)
-            result_hash = hash(result)
-            if result_hash in results:
-                results[result_hash].update(result)
-            else:
-                results[hash(result)] = result
-        self.root.clear()
-        self.root.extend(results.values())
+        with phase("Results.update") as p:
+            results = HashableMapping[int, Result](
+                {hash(result): result for result in self.root}
+            )
+            updated: list[Result] = []
+            added = 0
+            count = 0
+            for result in other:
+                count += 1
+                if not isinstance(result, Result):
+                    result = Result.model_validate(result)
+                result_hash = hash(result)
+                if result_hash in results:
+                    results[result_hash].update(result)
+                    updated.append(results[result_hash])
+                else:
+                    results[hash(result)] = result
+                    added += 1
+            # Assigned once, as other may be an iterator of unknown length
+            p.items = count
+            index = self._current_index()
+            if index is not None and len(results) - added != len(self.root):
+                # Duplicates in the list were merged, so positions changed
+                index = self._index = None
+            self.root.clear()
+            self.root.extend(results.values())
+            if index is not None:
+                # Results kept their position and new ones are appended
+                self._reindex(updated)
 
     @model_validator(mode="after")
     def merge_results(self):
-        results: dict[int, Result] = {}
-        for result in self.root:
-            result_hash = hash(result)
-            if result_hash in results:
-                results[result_hash].update(result)
-            else:
-                results[result_hash] = result
-
-        self.root.clear()
-        self.root.extend(results.values())
+        with phase("Results.merge_results", len(self.root)):
+            results: dict[int, Result] = {}
+            for result in self.root:
+                result_hash = hash(result)
+                if result_hash in results:
+                    results[result_hash].update(result)
+                else:
+                    results[result_hash] = result
+
+            self.root.clear()
+            self.root.extend(results.values())
         return self
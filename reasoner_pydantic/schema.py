@@ -0,0 +1,134 @@
+"""Cached JSON schemas of the models, for OpenAPI documents.
+
+    from reasoner_pydantic.schema import openapi_components
+
+    openapi["components"] = openapi_components(cache_dir="/var/cache/trapi")
+
+The schemas of the package components are generated once per process. With
+a cache_dir, they are also stored on disk under a key made of the package
+and pydantic versions, so later processes load them instead of generating
+them again.
+"""
+
+import copy
+import hashlib
+import importlib.metadata
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Literal, Optional
+
+import pydantic
+from pydantic import TypeAdapter
+from pydantic.json_schema import GenerateJsonSchema
+
+JsonSchemaMode = Literal["validation", "serialization"]
+
+REF_TEMPLATE = "#/components/schemas/{model}"
+
+
+@lru_cache(maxsize=None)
+def schema_version_key() -> str:
+    """
+    Get the key identifying the schemas of this installation
+
+    Installations without package metadata, e.g. a source checkout, are
+    identified by a digest of the package sources.
+    """
+    try:
+        version = importlib.metadata.version("reasoner-pydantic")
+    except importlib.metadata.PackageNotFoundError:
+        digest = hashlib.sha256()
+        for path in sorted(Path(__file__).parent.glob("*.py")):
+            digest.update(path.read_bytes())
+        version = "dev-" + digest.hexdigest()[:16]
+    return f"{version}-pydantic{pydantic.VERSION}"
+
+
+def _generate_components(mode: JsonSchemaMode) -> dict[str, Any]:
+    from . import _COMPONENTS
+
+    generator = GenerateJsonSchema(ref_template=REF_TEMPLATE)
+    references, definitions = generator.generate_definitions(
+        [
+            (name, mode, TypeAdapter(component).core_schema)
+            for name, component in _COMPONENTS.items()
+        ]
+    )
+    schemas = dict(definitions)
+    # Components without a definition of their own, e.g. CURIE, are inlined
+    # or refer to a definition under another name
+    for (name, _), schema in references.items():
+        if schema != {"$ref": REF_TEMPLATE.format(model=name)}:
+            schemas[name] = schema
+    return {"schemas": dict(sorted(schemas.items()))}
+
+
+def _load(path: str) -> Optional[dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store(path: str, value: dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file first so readers never see partial data
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@lru_cache(maxsize=None)
+def _components(mode: JsonSchemaMode, cache_dir: Optional[str]) -> dict[str, Any]:
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, f"components-{mode}-{schema_version_key()}.json")
+        stored = _load(path)
+        if stored is not None:
+            return stored
+    value = _generate_components(mode)
+    if path is not None:
+        _store(path, value)
+    return value
+
+
+def openapi_components(
+    mode: JsonSchemaMode = "validation", cache_dir: Optional[str] = None
+) -> dict[str, Any]:
+    """
+    Get an OpenAPI components object with the schemas of the components
+
+    References between schemas point to #/components/schemas. The result
+    is a copy, changing it doesn't affect later calls.
+    """
+    return copy.deepcopy(_components(mode, cache_dir))
+
+
+@lru_cache(maxsize=None)
+def _json_schema(model: type, mode: JsonSchemaMode, ref_template: str) -> dict:
+    return TypeAdapter(model).json_schema(mode=mode, ref_template=ref_template)
+
+
+def json_schema(
+    model: type,
+    mode: JsonSchemaMode = "validation",
+    ref_template: str = "#/$defs/{model}",
+) -> dict[str, Any]:
+    """Get a copy of the JSON schema of a model, generated once per process"""
+    return copy.deepcopy(_json_schema(model, mode, ref_template))
+
+
+def clear_cache() -> None:
+    """Forget the schemas generated in this process"""
+    _components.cache_clear()
+    _json_schema.cache_clear()
@@ -2,18 +2,30 @@
 
 from __future__ import annotations
 
+import heapq
+import operator
 import re
+from collections import deque
 from datetime import datetime
 from enum import Enum
-from typing import Annotated, Hashable, Optional
+from typing import Annotated, Any, ClassVar, Hashable, Iterable, Optional, Union
 
-from pydantic import BeforeValidator, ConfigDict, Field
+from pydantic import (
+    BeforeValidator,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    SerializerFunctionWrapHandler,
+    ValidationInfo,
+    ValidatorFunctionWrapHandler,
+    model_serializer,
+    model_validator,
+)
 from pydantic.types import StringConstraints
 
 from .base_model import BaseModel
 from .utils import HashableSequence, make_hashable
 
-
 # TODO: potential add validation for structure of CURIE
 CURIE = str
 
@@ -88,3 +100,270 @@ class LogEntry(BaseModel):
     code: Optional[str] = None
     message: str = ""
     model_config = ConfigDict(extra="allow")
+
+
+# Severity of each level, for filtering by minimum level
+LOG_LEVEL_SEVERITY = {
+    LogLevel.DEBUG: 0,
+    LogLevel.INFO: 1,
+    LogLevel.WARNING: 2,
+    LogLevel.ERROR: 3,
+}
+
+
+_LOG_LEVELS = {level.value: level for level in LogLevel}
+
+
+def _get_level(value: Any) -> Optional[LogLevel]:
+    """Get the level of a log entry or of a level name, None if unknown"""
+    if isinstance(value, LogEntry):
+        return value.level
+    if isinstance(value, dict):
+        value = value.get("level")
+    if isinstance(value, LogLevel):
+        return value
+    return _LOG_LEVELS.get(value) if isinstance(value, str) else None
+
+
+class LogBuffer(HashableSequence[LogEntry]):
+    """
+    Log entries, keeping only the newest ones of each level
+
+    At most limits[level] entries are kept per level, DEFAULT_LIMIT if not
+    set, with entries without a known level under None. Levels without a
+    limit are not limited, and none are by default. Entries below min_level
+    are not kept at all. The numbers of entries left out are in dropped.
+    Both can be set from the validation context, and are then applied
+    before the entries are validated:
+
+        Response.model_validate(
+            data, context={"min_log_level": "INFO", "log_limits": {"DEBUG": 100}}
+        )
+
+    For a hard cap on every buffer of the process, whatever the context,
+    set a default limit with LogBuffer.set_default_limit().
+
+    Parsing, append, extend and merge keep exactly the limits. With limits,
+    each level is kept in a ring buffer, so append takes constant time
+    whatever the other levels hold. The entries are put back in order when
+    they are next read.
+    """
+
+    DEFAULT_LIMIT: ClassVar[Optional[int]] = None
+
+    _min_level: Optional[LogLevel] = PrivateAttr(default=None)
+    _limits: dict[Optional[LogLevel], int] = PrivateAttr(default_factory=dict)
+    _default_limit: Optional[int] = PrivateAttr(
+        default_factory=lambda: LogBuffer.DEFAULT_LIMIT
+    )
+    _dropped: dict[Optional[LogLevel], int] = PrivateAttr(default_factory=dict)
+    # With limits, entries of each level and their position, oldest first.
+    # None when nothing is limited, then root is kept up to date directly.
+    _queues: Optional[dict[Optional[LogLevel], deque[tuple[int, LogEntry]]]] = (
+        PrivateAttr(default=None)
+    )
+    _next: int = PrivateAttr(default=0)
+    # Whether root misses the changes made to the queues
+    _stale: bool = PrivateAttr(default=False)
+
+    @classmethod
+    def set_default_limit(cls, limit: Optional[int]) -> None:
+        """
+        Set the limit of levels without one, None for no limit
+
+        It applies to the buffers created afterwards in the process,
+        including those of responses parsed without a log_limits context.
+        """
+        cls.DEFAULT_LIMIT = limit
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def limit_entries(
+        cls, data: Any, handler: ValidatorFunctionWrapHandler, info: ValidationInfo
+    ) -> "LogBuffer":
+        context = info.context if isinstance(info.context, dict) else {}
+        min_level = _get_level(context.get("min_log_level"))
+        limits = {
+            _get_level(level): limit
+            for level, limit in (context.get("log_limits") or {}).items()
+        }
+        if isinstance(data, HashableSequence) and not isinstance(data, LogBuffer):
+            data = list(data.root)
+        if not isinstance(data, list):
+            return handler(data)
+        dropped: dict[Optional[LogLevel], int] = {}
+        data = cls._select(data, min_level, limits, cls.DEFAULT_LIMIT, dropped)
+        logs = handler(data)
+        logs._min_level = min_level
+        logs._limits = limits
+        logs._default_limit = cls.DEFAULT_LIMIT
+        logs._dropped = dropped
+        logs._load()
+        return logs
+
+    @staticmethod
+    def _select(
+        entries: list[Any],
+        min_level: Optional[LogLevel],
+        limits: dict[Optional[LogLevel], int],
+        default_limit: Optional[int],
+        dropped: dict[Optional[LogLevel], int],
+    ) -> list[Any]:
+        """Get the newest entries of each level, counting the others"""
+        if min_level is None and not limits and default_limit is None:
+            # Nothing to leave out, and no limit to count entries against
+            return list(entries)
+        min_severity = LOG_LEVEL_SEVERITY[min_level] if min_level else -1
+        counts: dict[Optional[LogLevel], int] = {}
+        selected = []
+        for entry in reversed(entries):
+            level = _get_level(entry)
+            count = counts.get(level, 0)
+            limit = limits.get(level, default_limit)
+            if (level is not None and LOG_LEVEL_SEVERITY[level] < min_severity) or (
+                limit is not None and count >= limit
+            ):
+                dropped[level] = dropped.get(level, 0) + 1
+                continue
+            counts[level] = count + 1
+            selected.append(entry)
+        selected.reverse()
+        return selected
+
+    def _load(self) -> None:
+        """Put the entries of root in the queues, if anything is limited"""
+        self._stale = False
+        self._next = 0
+        if not self._limits and self._default_limit is None:
+            self._queues = None
+            return
+        self._queues = {}
+        for entry in self.root:
+            self._push(entry)
+
+    def _push(self, entry: LogEntry) -> None:
+        """Add an entry to the queue of its level, dropping the oldest one"""
+        level = entry.level
+        queue = self._queues.get(level)
+        if queue is None:
+            queue = self._queues[level] = deque(
+                maxlen=self._limits.get(level, self._default_limit)
+            )
+        if len(queue) == queue.maxlen:
+            self._dropped[level] = self._dropped.get(level, 0) + 1
+            self._stale = True
+        queue.append((self._next, entry))
+        self._next += 1
+
+    def _sync(self) -> None:
+        """Put the entries of the queues back in root, in order"""
+        if self._stale:
+            self.root = [
+                entry
+                for _, entry in heapq.merge(
+                    *self._queues.values(), key=operator.itemgetter(0)
+                )
+            ]
+            self._stale = False
+
+    @property
+    def dropped(self) -> dict[Optional[LogLevel], int]:
+        """Numbers of entries left out, by level"""
+        return dict(self._dropped)
+
+    def set_retention(
+        self,
+        min_level: Optional[Union[LogLevel, str]] = None,
+        limits: Optional[dict[Optional[Union[LogLevel, str]], int]] = None,
+    ) -> None:
+        """Set the minimum level and the limits, and apply them"""
+        self._sync()
+        self._min_level = _get_level(min_level)
+        self._limits = {
+            _get_level(level): limit for level, limit in (limits or {}).items()
+        }
+        self.root = self._select(
+            self.root,
+            self._min_level,
+            self._limits,
+            self._default_limit,
+            self._dropped,
+        )
+        self._load()
+
+    def compact(self) -> None:
+        """Bring the list of entries up to date after appending"""
+        self._sync()
+
+    def append(self, value: LogEntry) -> None:
+        level = value.level
+        if (
+            level is not None
+            and self._min_level is not None
+            and LOG_LEVEL_SEVERITY[level] < LOG_LEVEL_SEVERITY[self._min_level]
+        ):
+            self._dropped[level] = self._dropped.get(level, 0) + 1
+            return
+        if self._queues is None:
+            self.root.append(value)
+            return
+        stale = self._stale
+        self._push(value)
+        if not stale and not self._stale:
+            self.root.append(value)
+
+    def extend(self, values: Iterable[LogEntry]) -> None:
+        for value in values:
+            self.append(value)
+
+    def merge(self, other: Iterable[LogEntry]) -> None:
+        """Add the entries of other, and its dropped counts if any"""
+        if isinstance(other, LogBuffer):
+            for level, count in other._dropped.items():
+                self._dropped[level] = self._dropped.get(level, 0) + count
+        self.extend(other)
+
+    # Reading the entries puts them back in order first
+
+    @model_serializer(mode="wrap")
+    def serialize_entries(self, handler: SerializerFunctionWrapHandler):
+        self._sync()
+        return handler(self)
+
+    def __contains__(self, v: object) -> bool:
+        self._sync()
+        return v in self.root
+
+    def __getitem__(self, i):
+        self._sync()
+        return self.root[i]
+
+    def __iter__(self):
+        self._sync()
+        return iter(self.root)
+
+    def __len__(self):
+        if self._stale:
+            return sum(len(queue) for queue in self._queues.values())
+        return len(self.root)
+
+    def __hash__(self):
+        self._sync()
+        return hash(tuple(self.root))
+
+    # Other changes are made to root, then the queues are filled again
+
+    def __setitem__(self, i, v) -> None:
+        self._sync()
+        self.root[i] = v
+        self._load()
+
+    def __delitem__(self, i):
+        self._sync()
+        del self.root[i]
+        self._load()
+
+    def insert(self, index, value):
+        self._sync()
+        self.root.insert(index, value)
+        self._load()
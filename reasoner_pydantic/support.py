@@ -0,0 +1,238 @@
+"""Expansion of support graphs.
+
+An analysis or an inferred edge is supported by auxiliary graphs, whose
+edges may in turn be supported by other auxiliary graphs. SupportIndex
+follows these references for a message, see Message.expand_support.
+"""
+
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Union
+
+from .auxgraphs import AuxiliaryGraph
+from .kgraph import Edge
+from .results import PathfinderAnalysis, Result
+from .shared import EdgeIdentifier
+from .utils import HashableMapping
+
+
+def get_edge_support_graphs(edge: Edge) -> list[str]:
+    """Get the auxiliary graph IDs in the support_graphs attributes of an edge"""
+    aux_ids: list[str] = []
+    for attribute in edge.attributes or []:
+        if attribute.attribute_type_id != "biolink:support_graphs":
+            continue
+        if isinstance(attribute.value, str):
+            aux_ids.append(attribute.value)
+        elif isinstance(attribute.value, Iterable):
+            aux_ids.extend(v for v in attribute.value if isinstance(v, str))
+    return aux_ids
+
+
+@dataclass
+class SupportExpansion:
+    """Auxiliary graphs and edges supporting a result or an edge"""
+
+    aux_graph_ids: set[str] = field(default_factory=set)
+    edge_ids: set[EdgeIdentifier] = field(default_factory=set)
+    # Auxiliary graphs that support themselves through other graphs
+    cyclic_aux_graph_ids: set[str] = field(default_factory=set)
+    # Whether the depth limit left supporting graphs out
+    truncated: bool = False
+
+
+@dataclass(frozen=True)
+class _Closure:
+    """Everything an auxiliary graph depends on, itself included"""
+
+    aux_graph_ids: frozenset[str]
+    edge_ids: frozenset[EdgeIdentifier]
+    cyclic_aux_graph_ids: frozenset[str]
+
+
+class SupportIndex:
+    """
+    Support graph lookups for a message, with memoized closures
+
+    The closure of an auxiliary graph is computed once and shared by every
+    graph of the same strongly connected component, so support cycles are
+    expanded once as well.
+    """
+
+    def __init__(
+        self,
+        edges: HashableMapping[EdgeIdentifier, Edge],
+        auxiliary_graphs: HashableMapping[str, AuxiliaryGraph],
+    ):
+        self.edges = edges
+        self.auxiliary_graphs = auxiliary_graphs
+        self.key = self.get_key(edges, auxiliary_graphs)
+        self._edge_support: dict[EdgeIdentifier, tuple[str, ...]] = {}
+        self._children: dict[str, tuple[str, ...]] = {}
+        self._closures: dict[str, _Closure] = {}
+        self._cyclic: set[str] = set()
+
+    @staticmethod
+    def get_key(
+        edges: HashableMapping[EdgeIdentifier, Edge],
+        auxiliary_graphs: HashableMapping[str, AuxiliaryGraph],
+    ) -> tuple[int, int, int, int]:
+        """Identify the containers an index was built for"""
+        return (
+            id(edges.root),
+            len(edges),
+            id(auxiliary_graphs.root),
+            len(auxiliary_graphs),
+        )
+
+    def __deepcopy__(self, memo: dict) -> None:
+        # Copies of a message build their own index when needed
+        return None
+
+    def edge_support(self, edge_id: EdgeIdentifier) -> tuple[str, ...]:
+        """Get the IDs of the auxiliary graphs supporting an edge"""
+        support = self._edge_support.get(edge_id)
+        if support is None:
+            edge = self.edges.get(edge_id, None)
+            support = self._edge_support[edge_id] = tuple(
+                get_edge_support_graphs(edge) if edge is not None else ()
+            )
+        return support
+
+    def children(self, aux_id: str) -> tuple[str, ...]:
+        """Get the IDs of the auxiliary graphs supporting edges of a graph"""
+        children = self._children.get(aux_id)
+        if children is None:
+            found: dict[str, None] = {}
+            for edge_id in self.auxiliary_graphs[aux_id].edges:
+                for child in self.edge_support(edge_id):
+                    if child in self.auxiliary_graphs:
+                        found[child] = None
+            children = self._children[aux_id] = tuple(found)
+        return children
+
+    def closure(self, aux_id: str) -> _Closure:
+        """Get the closure of an auxiliary graph, computing it if needed"""
+        closure = self._closures.get(aux_id)
+        if closure is not None:
+            return closure
+
+        # Iterative Tarjan, closures are set as components complete
+        index: dict[str, int] = {aux_id: 0}
+        low: dict[str, int] = {aux_id: 0}
+        stack = [aux_id]
+        on_stack = {aux_id}
+        work = [(aux_id, iter(self.children(aux_id)))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child in self._closures:
+                    continue
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(self.children(child))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    members = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        members.append(member)
+                        if member == node:
+                            break
+                    self._close_component(members)
+        return self._closures[aux_id]
+
+    def _close_component(self, members: list[str]) -> None:
+        member_set = set(members)
+        aux_graph_ids = set(members)
+        edge_ids: set[EdgeIdentifier] = set()
+        cyclic: set[str] = set()
+        if len(members) > 1 or members[0] in self.children(members[0]):
+            cyclic.update(members)
+            self._cyclic.update(members)
+        for member in members:
+            edge_ids.update(self.auxiliary_graphs[member].edges)
+            for child in self.children(member):
+                if child in member_set:
+                    continue
+                child_closure = self._closures[child]
+                aux_graph_ids.update(child_closure.aux_graph_ids)
+                edge_ids.update(child_closure.edge_ids)
+                cyclic.update(child_closure.cyclic_aux_graph_ids)
+        closure = _Closure(
+            frozenset(aux_graph_ids), frozenset(edge_ids), frozenset(cyclic)
+        )
+        for member in members:
+            self._closures[member] = closure
+
+    def roots(self, item: Union[Result, Edge, EdgeIdentifier]) -> list[str]:
+        """Get the auxiliary graphs a result or an edge refers to directly"""
+        aux_ids: dict[str, None] = {}
+        if isinstance(item, Result):
+            for analysis in item.analyses:
+                aux_ids.update(dict.fromkeys(analysis.support_graphs or ()))
+                if isinstance(analysis, PathfinderAnalysis):
+                    for path_bindings in analysis.path_bindings.values():
+                        aux_ids.update(dict.fromkeys(pb.id for pb in path_bindings))
+                else:
+                    for edge_bindings in analysis.edge_bindings.values():
+                        for eb in edge_bindings:
+                            aux_ids.update(dict.fromkeys(self.edge_support(eb.id)))
+        elif isinstance(item, Edge):
+            aux_ids.update(dict.fromkeys(get_edge_support_graphs(item)))
+        else:
+            aux_ids.update(dict.fromkeys(self.edge_support(item)))
+        return [aux_id for aux_id in aux_ids if aux_id in self.auxiliary_graphs]
+
+    def expand(
+        self,
+        item: Union[Result, Edge, EdgeIdentifier],
+        max_depth: Optional[int] = None,
+    ) -> SupportExpansion:
+        """See Message.expand_support"""
+        expansion = SupportExpansion()
+        roots = self.roots(item)
+        if max_depth is None:
+            for aux_id in roots:
+                closure = self.closure(aux_id)
+                expansion.aux_graph_ids.update(closure.aux_graph_ids)
+                expansion.edge_ids.update(closure.edge_ids)
+                expansion.cyclic_aux_graph_ids.update(closure.cyclic_aux_graph_ids)
+            return expansion
+
+        if max_depth < 1:
+            expansion.truncated = bool(roots)
+            return expansion
+        # Breadth first, so each graph is reached at its lowest depth
+        level = roots
+        expansion.aux_graph_ids.update(level)
+        depth = 1
+        while True:
+            found: dict[str, None] = {}
+            for aux_id in level:
+                expansion.edge_ids.update(self.auxiliary_graphs[aux_id].edges)
+                for child in self.children(aux_id):
+                    if child not in expansion.aux_graph_ids:
+                        found[child] = None
+            if not found:
+                break
+            if depth == max_depth:
+                expansion.truncated = True
+                break
+            level = list(found)
+            expansion.aux_graph_ids.update(level)
+            depth += 1
+        # Components are found by the closures
+        for aux_id in roots:
+            self.closure(aux_id)
+        expansion.cyclic_aux_graph_ids = expansion.aux_graph_ids & self._cyclic
+        return expansion
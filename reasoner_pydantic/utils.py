@@ -1,4 +1,6 @@
 import collections.abc
+import hashlib
+import sys
 from typing import Any, Collection, Generic, Iterable, Optional, TypeVar, cast
 
 from pydantic import RootModel, model_serializer
@@ -27,6 +29,9 @@ class HashableMapping(
     def __len__(self) -> int:
         return len(self.root)
 
+    def __contains__(self, k: object) -> bool:
+        return k in self.root
+
     def __setitem__(self, k: KeyType, v: ValueType) -> None:
         self.root[k] = v
 
@@ -149,3 +154,91 @@ def make_hashable(o: object):
         return HashableSequence([make_hashable(v) for v in cast(list[Any], o)])
 
     return o
+
+
+def deep_sizeof(o: object, seen: set[int]) -> tuple[int, int]:
+    """
+    Estimate the retained size of an object graph
+
+    Returns the number of bytes and the number of objects reachable from o,
+    skipping objects whose id is in seen and adding the ones visited to it.
+    Sharing a seen set across calls attributes each object only once.
+    """
+    size = 0
+    count = 0
+    stack = [o]
+    while stack:
+        obj = stack.pop()
+        if obj is None or obj is True or obj is False or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        count += 1
+
+        if isinstance(obj, (str, bytes, int, float)):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__pydantic_fields_set__"):
+            stack.append(obj.__dict__)
+            stack.append(obj.__pydantic_fields_set__)
+            stack.append(getattr(obj, "__pydantic_extra__", None))
+            stack.append(getattr(obj, "__pydantic_private__", None))
+    return size, count
+
+
+def deep_hash(o: object) -> int:
+    """
+    Hash an object graph by its full content
+
+    Unlike hash(), every field of every model is included, and hashes that
+    sets stored when items were added are not reused, since they go stale
+    when an item is changed in place.
+    """
+    if isinstance(o, (set, frozenset)):
+        return hash(frozenset(deep_hash(v) for v in o))
+    if isinstance(o, (list, tuple)):
+        return hash(tuple(deep_hash(v) for v in o))
+    if isinstance(o, dict):
+        return hash(tuple((k, deep_hash(v)) for k, v in o.items()))
+    if hasattr(o, "__pydantic_fields_set__"):
+        return hash(
+            (
+                type(o).__name__,
+                deep_hash(o.__dict__),
+                deep_hash(getattr(o, "__pydantic_extra__", None) or {}),
+            )
+        )
+    return hash(o)
+
+
+def _canonical(o: object) -> object:
+    """Convert an object graph to nested tuples, with sets and dicts sorted"""
+    if isinstance(o, (set, frozenset)):
+        return ("set", *sorted((_canonical(v) for v in o), key=repr))
+    if isinstance(o, (list, tuple)):
+        return ("list", *(_canonical(v) for v in o))
+    if isinstance(o, dict):
+        return ("dict", *sorted(((k, _canonical(v)) for k, v in o.items()), key=repr))
+    if hasattr(o, "__pydantic_fields_set__"):
+        return (
+            type(o).__name__,
+            _canonical(o.__dict__),
+            _canonical(getattr(o, "__pydantic_extra__", None) or {}),
+        )
+    return o
+
+
+def deep_digest(o: object, digest_size: int = 8) -> str:
+    """
+    Digest an object graph by its full content
+
+    Like deep_hash(), but the same in every process: sets and dicts are
+    sorted, so the order of their items doesn't matter.
+    """
+    return hashlib.blake2b(
+        repr(_canonical(o)).encode("utf-8", "surrogatepass"), digest_size=digest_size
+    ).hexdigest()
@@ -197,7 +197,7 @@ class TopOrBottomEnum(str, Enum):
 
 class FilterKgraphTopNParameters(BaseModel):
     edge_attribute: str
-    max_edges: Annotated[int, Field(le=0)] = 50
+    max_edges: Annotated[int, Field(ge=0)] = 50
     remove_top_or_bottom: TopOrBottomEnum = TopOrBottomEnum.top
     qedge_keys: Optional[HashableSequence[str]] = None
     qnode_keys: HashableSequence[str] = Field(
@@ -403,40 +403,57 @@ operations = [
     OperationSortResultsScore,
 ]
 
-Operation = RootModel[
-    Union[
-        OperationAnnotate,
-        OperationAnnotateEdges,
-        OperationAnnotateNodes,
-        OperationBind,
-        OperationCompleteResults,
-        OperationEnrichResults,
-        OperationFill,
-        OperationFilterKgraph,
-        OperationFilterKgraphContinuousKedgeAttribute,
-        OperationFilterKgraphDiscreteKedgeAttribute,
-        OperationFilterKgraphDiscreteKnodeAttribute,
-        OperationFilterKgraphOrphans,
-        OperationFilterKgraphPercentile,
-        OperationFilterKgraphStdDev,
-        OperationFilterKgraphTopN,
-        OperationFilterResults,
-        OperationFilterResultsTopN,
-        OperationLookup,
-        OperationLookupAndScore,
-        OperationOverlay,
-        OperationOverlayComputeJaccard,
-        OperationOverlayComputeNgd,
-        OperationOverlayConnectKnodes,
-        OperationOverlayFisherExactTest,
-        OperationRestate,
-        OperationScore,
-        OperationSortResults,
-        OperationSortResultsEdgeAttribute,
-        OperationSortResultsNodeAttribute,
-        OperationSortResultsScore,
+
+# Operations are tagged by their id, so each step is validated against
+# exactly one model instead of trying every member of the union
+class Operation(
+    RootModel[
+        Annotated[
+            Union[
+                OperationAnnotate,
+                OperationAnnotateEdges,
+                OperationAnnotateNodes,
+                OperationBind,
+                OperationCompleteResults,
+                OperationEnrichResults,
+                OperationFill,
+                OperationFilterKgraph,
+                OperationFilterKgraphContinuousKedgeAttribute,
+                OperationFilterKgraphDiscreteKedgeAttribute,
+                OperationFilterKgraphDiscreteKnodeAttribute,
+                OperationFilterKgraphOrphans,
+                OperationFilterKgraphPercentile,
+                OperationFilterKgraphStdDev,
+                OperationFilterKgraphTopN,
+                OperationFilterResults,
+                OperationFilterResultsTopN,
+                OperationLookup,
+                OperationLookupAndScore,
+                OperationOverlay,
+                OperationOverlayComputeJaccard,
+                OperationOverlayComputeNgd,
+                OperationOverlayConnectKnodes,
+                OperationOverlayFisherExactTest,
+                OperationRestate,
+                OperationScore,
+                OperationSortResults,
+                OperationSortResultsEdgeAttribute,
+                OperationSortResultsNodeAttribute,
+                OperationSortResultsScore,
+            ],
+            Field(discriminator="id"),
+        ]
     ]
-]
+):
+    pass
+
+
+# Keep the name of the untagged RootModel[Union[...]], so the $defs keys of
+# the schemas don't change, and build the schema again under that name
+Operation.__name__ = Operation.__qualname__ = "RootModel[Union[{}]]".format(
+    ", ".join(operation.__name__ for operation in operations)
+)
+Operation.model_rebuild(force=True)
 
 
 Workflow = HashableSequence[Operation]
@@ -19,6 +19,10 @@ setup(
     packages=["reasoner_pydantic"],
     include_package_data=True,
     install_requires=["pydantic>=2,<3"],
+    extras_require={"numpy": ["numpy"], "orjson": ["orjson"]},
+    entry_points={
+        "console_scripts": ["reasoner-pydantic = reasoner_pydantic.cli:main"]
+    },
     zip_safe=False,
     license="MIT",
     python_requires=">=3.9",
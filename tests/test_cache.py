@@ -0,0 +1,165 @@
+import copy
+
+from reasoner_pydantic import Query, Response
+from reasoner_pydantic.cache import DiskBackend, ResponseCache, query_cache_key
+
+from .test_models import EXAMPLE_MESSAGE
+
+
+def make_query(**kwargs):
+    return Query.model_validate(
+        {"message": {"query_graph": EXAMPLE_MESSAGE["query_graph"]}, **kwargs}
+    )
+
+
+def make_response():
+    return Response.model_validate({"message": EXAMPLE_MESSAGE})
+
+
+def renamed_query(**kwargs):
+    """The example query with other keys"""
+    qgraph = copy.deepcopy(EXAMPLE_MESSAGE["query_graph"])
+    qgraph["nodes"] = {"drug": qgraph["nodes"]["n1"], "disease": qgraph["nodes"]["n2"]}
+    edge = qgraph["edges"].pop("n1n2")
+    qgraph["edges"]["treats"] = {**edge, "subject": "drug", "object": "disease"}
+    return Query.model_validate({"message": {"query_graph": qgraph}, **kwargs})
+
+
+def test_cache_hit_rebinds_keys():
+    """Check that queries differing in key names share an entry"""
+    cache = ResponseCache()
+    cache.put(make_query(), make_response())
+
+    response = cache.get(renamed_query())
+    assert response is not None
+    assert set(response.message.query_graph.nodes) == {"drug", "disease"}
+    assert set(response.message.results[0].node_bindings) == {"drug", "disease"}
+    assert cache.hits == 1
+
+    # Responses are copies
+    response.message.results.root.clear()
+    assert len(cache.get(make_query()).message.results) == 1
+
+    # Other workflows and log levels are other queries
+    assert cache.get(make_query(workflow=[{"id": "lookup"}])) is None
+    assert cache.get(make_query(log_level="DEBUG")) is None
+
+
+def test_cache_eviction_and_expiry():
+    """Check eviction by size, expiry and bypass_cache"""
+    now = [0.0]
+    cache = ResponseCache(ttl=10, clock=lambda: now[0])
+    calls = []
+
+    def compute(query):
+        calls.append(query)
+        return make_response()
+
+    cache.get_or_compute(make_query(), compute)
+    cache.get_or_compute(make_query(), compute)
+    assert len(calls) == 1
+    cache.get_or_compute(make_query(bypass_cache=True), compute)
+    assert len(calls) == 2
+
+    now[0] = 11
+    assert cache.get(make_query()) is None
+    assert len(cache) == 0 and cache.current_bytes == 0
+
+    cache.put(make_query(), make_response())
+    cache.max_bytes = cache.current_bytes
+    cache.put(make_query(log_level="INFO"), make_response())
+    assert len(cache) == 1
+    assert cache.evictions == 1
+    assert cache.get(make_query()) is None
+    assert cache.get(make_query(log_level="INFO")) is not None
+
+
+def test_disk_backend(tmp_path):
+    """Check that entries on disk are found by a new cache"""
+    cache = ResponseCache(backend=DiskBackend(str(tmp_path)))
+    cache.put(make_query(), make_response())
+
+    cache = ResponseCache(backend=DiskBackend(str(tmp_path)))
+    assert len(cache) == 1
+    assert cache.get(make_query()) == make_response()
+    cache.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_cache_key_workflow_keys():
+    """Check that workflow parameters are keyed with canonical keys"""
+    drug = {"categories": ["biolink:Drug"]}
+    disease = {"categories": ["biolink:Disease"]}
+
+    def query(nodes, subject, object, qnode_key):
+        return Query.model_validate(
+            {
+                "message": {
+                    "query_graph": {
+                        "nodes": nodes,
+                        "edges": {"e0": {"subject": subject, "object": object}},
+                    }
+                },
+                "workflow": [
+                    {
+                        "id": "sort_results_node_attribute",
+                        "parameters": {
+                            "node_attribute": "biolink:score",
+                            "ascending_or_descending": "descending",
+                            "qnode_keys": [qnode_key],
+                        },
+                    }
+                ],
+            }
+        )
+
+    sort_drugs = query({"n0": drug, "n1": disease}, "n0", "n1", "n0")
+    sort_diseases = query({"n0": disease, "n1": drug}, "n1", "n0", "n0")
+    renamed = query({"a": drug, "b": disease}, "a", "b", "a")
+    key, _ = query_cache_key(sort_drugs)
+    assert query_cache_key(sort_diseases)[0] != key
+    assert query_cache_key(renamed)[0] == key
+
+    cache = ResponseCache()
+    cache.put(sort_drugs, make_response())
+    assert cache.get(sort_diseases) is None
+    assert cache.get(renamed) is not None
+
+
+def test_cache_key_result_keys():
+    """Check that results given with a query are keyed with canonical keys"""
+    query = make_query()
+    query.message.results = make_response().message.results
+    renamed = renamed_query()
+    renamed.message.results = make_response().message.results
+    renamed.message.rebind_keys({"n1": "drug", "n2": "disease"}, {"n1n2": "treats"})
+    assert query_cache_key(query)[0] == query_cache_key(renamed)[0]
+    assert query_cache_key(query)[0] != query_cache_key(make_query())[0]
+
+
+def test_cache_approximate_fingerprint():
+    """Check that queries with an approximate fingerprint aren't cached"""
+    query = Query.model_validate(
+        {
+            "message": {
+                "query_graph": {
+                    "nodes": {f"n{i}": {} for i in range(100)},
+                    "edges": {},
+                }
+            }
+        }
+    )
+    assert query_cache_key(query)[0] is None
+    cache = ResponseCache()
+    calls = []
+
+    def compute(query):
+        calls.append(query)
+        return make_response()
+
+    cache.get_or_compute(query, compute)
+    cache.get_or_compute(query, compute)
+    cache.put(query, make_response())
+    assert len(calls) == 2
+    assert len(cache) == 0
+    assert cache.get(query) is None
@@ -0,0 +1,134 @@
+"""Test the command line tools."""
+
+import json
+
+from reasoner_pydantic import Message, Response
+from reasoner_pydantic.cli import main
+
+
+def make_response(subjects):
+    """Build a response with one edge and result per subject"""
+    return {
+        "message": {
+            "query_graph": {"nodes": {}, "edges": {}},
+            "knowledge_graph": {
+                "nodes": {},
+                "edges": {
+                    f"e{subject}": {
+                        "subject": f"CHEBI:{subject}",
+                        "object": "MONDO:0",
+                        "predicate": "biolink:treats",
+                        "sources": [
+                            {
+                                "resource_id": "kp0",
+                                "resource_role": "primary_knowledge_source",
+                            }
+                        ],
+                        "attributes": [],
+                    }
+                    for subject in subjects
+                },
+            },
+            "results": [
+                {
+                    "node_bindings": {
+                        "n0": [{"id": f"CHEBI:{subject}", "attributes": []}]
+                    },
+                    "analyses": [
+                        {
+                            "resource_id": "ara0",
+                            "edge_bindings": {
+                                "e0": [{"id": f"e{subject}", "attributes": []}]
+                            },
+                        }
+                    ],
+                }
+                for subject in subjects
+            ],
+        },
+        "logs": [{"message": f"{len(subjects)} results"}],
+    }
+
+
+RECORDS = [make_response([0, 1]), make_response([1, 2]), make_response([3])]
+
+
+def test_merge(tmp_path):
+    """Test that merging a JSONL file gives the same as Message.update"""
+    input_path = tmp_path / "responses.jsonl"
+    lines = [json.dumps(record) for record in RECORDS]
+    input_path.write_text("\n".join([lines[0], "", "{}", *lines[1:]]) + "\n")
+
+    expected = Message.model_validate(RECORDS[0]["message"])
+    for record in RECORDS[1:]:
+        expected.update(Message.model_validate(record["message"]))
+
+    for workers in ("1", "2"):
+        output_path = tmp_path / f"merged-{workers}.json"
+        stats_path = tmp_path / f"stats-{workers}.jsonl"
+        assert (
+            main(
+                [
+                    "merge",
+                    str(input_path),
+                    "-o",
+                    str(output_path),
+                    "--stats",
+                    str(stats_path),
+                    "--workers",
+                    workers,
+                ]
+            )
+            == 0
+        )
+
+        merged = Response.load_json(output_path.read_bytes())
+        assert merged.message == expected
+        assert len(merged.logs) == 3
+
+        stats = [json.loads(line) for line in stats_path.read_text().splitlines()]
+        assert [record["line"] for record in stats] == [1, 3, 4, 5]
+        assert [record["status"] for record in stats] == [
+            "ok",
+            "invalid",
+            "ok",
+            "ok",
+        ]
+        assert [record.get("edges") for record in stats] == [2, None, 2, 1]
+
+
+def test_merge_errors(tmp_path):
+    """Test that a record failing with any error is skipped"""
+    broken = make_response([4])
+    broken["message"]["auxiliary_graphs"] = {
+        "a0": {"edges": ["missing"], "attributes": []}
+    }
+    input_path = tmp_path / "responses.jsonl"
+    input_path.write_text(
+        "\n".join(json.dumps(record) for record in [RECORDS[0], broken]) + "\n"
+    )
+    output_path = tmp_path / "merged.json"
+    stats_path = tmp_path / "stats.jsonl"
+
+    for workers in ("1", "2"):
+        assert (
+            main(
+                [
+                    "merge",
+                    str(input_path),
+                    "-o",
+                    str(output_path),
+                    "--stats",
+                    str(stats_path),
+                    "--workers",
+                    workers,
+                ]
+            )
+            == 0
+        )
+
+        merged = Response.load_json(output_path.read_bytes())
+        assert merged.message == Message.model_validate(RECORDS[0]["message"])
+        stats = [json.loads(line) for line in stats_path.read_text().splitlines()]
+        assert [record["status"] for record in stats] == ["ok", "error"]
+        assert "missing" in stats[1]["error"]
@@ -0,0 +1,165 @@
+"""Test the in-process workflow executor."""
+
+import time
+
+from reasoner_pydantic import Message, Workflow
+from reasoner_pydantic.executor import WorkflowExecutor
+
+
+def make_message(scores):
+    """Build a message with one edge and one scored result per score"""
+    nodes = {"MONDO:0": {"categories": ["biolink:Disease"], "attributes": []}}
+    edges = {}
+    results = []
+    for i, score in enumerate(scores):
+        nodes[f"CHEBI:{i}"] = {
+            "categories": ["biolink:Drug"],
+            "attributes": [{"attribute_type_id": "biolink:weight", "value": -i}],
+        }
+        edges[f"e{i}"] = {
+            "subject": f"CHEBI:{i}",
+            "object": "MONDO:0",
+            "predicate": "biolink:treats",
+            "sources": [
+                {"resource_id": "kp0", "resource_role": "primary_knowledge_source"}
+            ],
+            "attributes": [
+                {"attribute_type_id": "biolink:score", "value": score},
+                {"attribute_type_id": "biolink:evidence", "value": i % 2 == 0},
+            ],
+        }
+        results.append(
+            {
+                "node_bindings": {
+                    "n0": [{"id": f"CHEBI:{i}", "attributes": []}],
+                    "n1": [{"id": "MONDO:0", "attributes": []}],
+                },
+                "analyses": [
+                    {
+                        "resource_id": "ara0",
+                        "score": score,
+                        "edge_bindings": {"e0": [{"id": f"e{i}", "attributes": []}]},
+                    }
+                ],
+            }
+        )
+    return Message.model_validate(
+        {
+            "knowledge_graph": {"nodes": nodes, "edges": edges},
+            "results": results,
+        },
+        context={"normalize": False},
+    )
+
+
+def bound_curies(message):
+    return [next(iter(result.node_bindings["n0"])).id for result in message.results]
+
+
+def test_sort_and_top_n():
+    """Test that sort followed by top-n is fused and keeps the best results"""
+    message = make_message([0.1, 0.9, 0.5, 0.7])
+    workflow = Workflow.model_validate(
+        [
+            {
+                "id": "sort_results_score",
+                "parameters": {"ascending_or_descending": "descending"},
+            },
+            {"id": "filter_results_top_n", "parameters": {"max_results": 2}},
+            {"id": "bind"},
+        ]
+    )
+    reports = WorkflowExecutor().run(workflow, message)
+
+    assert bound_curies(message) == ["CHEBI:1", "CHEBI:3"]
+    assert [report.status for report in reports] == [
+        "done",
+        "done",
+        "not_implemented",
+    ]
+    assert reports[0].fused == (0, 1)
+    assert reports[2].seconds == 0.0
+
+
+def test_fused_seconds():
+    """Test that the time of a fused pass is counted once"""
+    message = make_message([(i * 7919 % 2000) / 2000 for i in range(2000)])
+    workflow = Workflow.model_validate(
+        [
+            {
+                "id": "sort_results_score",
+                "parameters": {"ascending_or_descending": "descending"},
+            },
+            {"id": "filter_results_top_n", "parameters": {"max_results": 1000}},
+            {
+                "id": "sort_results_edge_attribute",
+                "parameters": {
+                    "edge_attribute": "biolink:score",
+                    "ascending_or_descending": "ascending",
+                },
+            },
+        ]
+    )
+    start = time.perf_counter()
+    reports = WorkflowExecutor().run(workflow, message)
+    elapsed = time.perf_counter() - start
+
+    assert [report.fused for report in reports] == [(0, 1, 2)] * 3
+    assert reports[0].seconds > 0
+    assert [report.seconds for report in reports[1:]] == [0.0, 0.0]
+    assert sum(report.seconds for report in reports) <= elapsed
+
+
+def test_sort_attributes():
+    """Test sorting by edge and node attributes, with later sorts taking priority"""
+    message = make_message([0.1, 0.9, 0.5, 0.7])
+    workflow = Workflow.model_validate(
+        [
+            {
+                "id": "sort_results_edge_attribute",
+                "parameters": {
+                    "edge_attribute": "biolink:score",
+                    "ascending_or_descending": "ascending",
+                },
+            },
+        ]
+    )
+    WorkflowExecutor().run(workflow, message)
+    assert bound_curies(message) == ["CHEBI:0", "CHEBI:2", "CHEBI:3", "CHEBI:1"]
+
+    workflow = Workflow.model_validate(
+        [
+            {
+                "id": "sort_results_node_attribute",
+                "parameters": {
+                    "node_attribute": "biolink:weight",
+                    "ascending_or_descending": "ascending",
+                },
+            },
+        ]
+    )
+    WorkflowExecutor().run(workflow, message)
+    assert bound_curies(message) == ["CHEBI:3", "CHEBI:2", "CHEBI:1", "CHEBI:0"]
+
+
+def test_discrete_kedge_attribute_and_orphans():
+    """Test removing edges by a discrete value, then orphaned nodes"""
+    message = make_message([0.1, 0.9, 0.5, 0.7])
+    message.knowledge_graph.nodes["CHEBI:99"] = message.knowledge_graph.nodes["CHEBI:0"]
+    workflow = Workflow.model_validate(
+        [
+            {
+                "id": "filter_kgraph_discrete_kedge_attribute",
+                "parameters": {
+                    "edge_attribute": "biolink:evidence",
+                    "remove_value": True,
+                },
+            },
+            {"id": "filter_kgraph_orphans"},
+        ]
+    )
+    WorkflowExecutor().run(workflow, message)
+
+    assert set(message.knowledge_graph.edges) == {"e1", "e3"}
+    assert bound_curies(message) == ["CHEBI:1", "CHEBI:3"]
+    assert set(message.knowledge_graph.nodes) == {"MONDO:0", "CHEBI:1", "CHEBI:3"}
@@ -0,0 +1,182 @@
+"""Test attribute-based knowledge graph filters."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from reasoner_pydantic import Message
+from reasoner_pydantic.filters import (
+    filter_kgraph_continuous_kedge_attribute,
+    filter_kgraph_percentile,
+    filter_kgraph_std_dev,
+    filter_kgraph_top_n,
+)
+from reasoner_pydantic.workflow import (
+    FilterKgraphContinuousKedgeAttributeParameters,
+    FilterKgraphPercentileParameters,
+    FilterKgraphStdDevParameters,
+    FilterKgraphTopNParameters,
+)
+
+
+def make_message(values):
+    """Build a message with one edge and one result per attribute value"""
+    nodes = {"MONDO:0": {"categories": ["biolink:Disease"], "attributes": []}}
+    edges = {}
+    results = []
+    for i, value in enumerate(values):
+        nodes[f"CHEBI:{i}"] = {"categories": ["biolink:Drug"], "attributes": []}
+        edges[f"e{i}"] = {
+            "subject": f"CHEBI:{i}",
+            "object": "MONDO:0",
+            "predicate": "biolink:treats",
+            "sources": [
+                {"resource_id": "kp0", "resource_role": "primary_knowledge_source"}
+            ],
+            "attributes": [{"attribute_type_id": "biolink:score", "value": value}],
+        }
+        results.append(
+            {
+                "node_bindings": {
+                    "n0": [{"id": f"CHEBI:{i}", "attributes": []}],
+                    "n1": [{"id": "MONDO:0", "attributes": []}],
+                },
+                "analyses": [
+                    {
+                        "resource_id": "ara0",
+                        "edge_bindings": {"e0": [{"id": f"e{i}", "attributes": []}]},
+                    }
+                ],
+            }
+        )
+    return Message.model_validate(
+        {
+            "knowledge_graph": {"nodes": nodes, "edges": edges},
+            "results": results,
+        },
+        context={"normalize": False},
+    )
+
+
+def remaining_values(message):
+    return sorted(
+        next(iter(edge.attributes)).value
+        for edge in message.knowledge_graph.edges.values()
+    )
+
+
+def test_filter_continuous():
+    """Test that edges above a threshold are removed along with their results"""
+    message = make_message([1, 2, 3, 4, 5])
+    removed = filter_kgraph_continuous_kedge_attribute(
+        message,
+        FilterKgraphContinuousKedgeAttributeParameters(
+            edge_attribute="biolink:score",
+            threshold=3,
+            remove_above_or_below="above",
+            qnode_keys=["n0"],
+        ),
+    )
+    assert removed == 2
+    assert remaining_values(message) == [1, 2, 3]
+    assert len(message.results) == 3
+    # Orphaned nodes bound to n0 are removed, n1 is kept
+    assert set(message.knowledge_graph.nodes) == {
+        "MONDO:0",
+        "CHEBI:0",
+        "CHEBI:1",
+        "CHEBI:2",
+    }
+
+
+def test_filter_percentile():
+    message = make_message(list(range(100)))
+    filter_kgraph_percentile(
+        message,
+        FilterKgraphPercentileParameters(edge_attribute="biolink:score", threshold=90),
+    )
+    assert remaining_values(message) == list(range(90, 100))
+    assert len(message.results) == 10
+
+
+def test_filter_std_dev():
+    message = make_message([0, 0, 0, 0, 10])
+    filter_kgraph_std_dev(
+        message,
+        FilterKgraphStdDevParameters(
+            edge_attribute="biolink:score", remove_above_or_below="above"
+        ),
+    )
+    assert remaining_values(message) == [0, 0, 0, 0]
+
+
+def test_filter_top_n():
+    message = make_message([5, 1, 4, 2, 3])
+    filter_kgraph_top_n(
+        message,
+        FilterKgraphTopNParameters(
+            edge_attribute="biolink:score", max_edges=2, remove_top_or_bottom="bottom"
+        ),
+    )
+    assert remaining_values(message) == [4, 5]
+
+    message = make_message([5, 1, 4, 2, 3])
+    filter_kgraph_top_n(
+        message,
+        FilterKgraphTopNParameters(edge_attribute="biolink:score", max_edges=2),
+    )
+    assert remaining_values(message) == [1, 2]
+
+
+def test_filter_qedge_keys():
+    """Test that only edges bound to the given qedge keys are considered"""
+    message = make_message([1, 2, 3])
+    removed = filter_kgraph_continuous_kedge_attribute(
+        message,
+        FilterKgraphContinuousKedgeAttributeParameters(
+            edge_attribute="biolink:score",
+            threshold=10,
+            remove_above_or_below="below",
+            qedge_keys=["other"],
+        ),
+    )
+    assert removed == 0
+    assert len(message.knowledge_graph.edges) == 3
+
+
+def test_filter_no_kgraph():
+    """Test that a message without a knowledge graph is left as it is"""
+    message = Message.model_validate({}, context={"normalize": False})
+    removed = filter_kgraph_continuous_kedge_attribute(
+        message,
+        FilterKgraphContinuousKedgeAttributeParameters(
+            edge_attribute="biolink:score",
+            threshold=10,
+            remove_above_or_below="below",
+        ),
+    )
+    assert removed == 0
+    assert message.knowledge_graph is None
+
+
+def test_filter_support_graphs():
+    """Test that analyses stay in their set when a support graph is removed"""
+    data = make_message([1, 2]).model_dump()
+    data["auxiliary_graphs"] = {"a0": {"edges": ["e0"], "attributes": []}}
+    data["results"][1]["analyses"][0]["support_graphs"] = ["a0"]
+    message = Message.model_validate(data, context={"normalize": False})
+
+    filter_kgraph_continuous_kedge_attribute(
+        message,
+        FilterKgraphContinuousKedgeAttributeParameters(
+            edge_attribute="biolink:score",
+            threshold=1.5,
+            remove_above_or_below="below",
+        ),
+    )
+    assert "a0" not in message.auxiliary_graphs
+    assert len(message.results) == 1
+    result = message.results[0]
+    analysis = next(iter(result.analyses))
+    assert not analysis.support_graphs
+    assert analysis in result.analyses
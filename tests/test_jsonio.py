@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from reasoner_pydantic import Message, Query, Response, jsonio
+
+from .test_models import EXAMPLE_MESSAGE
+
+
+def test_load_dump_json():
+    """Check that models round-trip through JSON bytes"""
+    data = json.dumps({"message": EXAMPLE_MESSAGE}).encode()
+    for value in (data, bytearray(data), memoryview(data), data.decode()):
+        response = Response.load_json(value)
+        assert response == Response.model_validate_json(data)
+    assert response.dump_json() == response.model_dump_json().encode()
+    assert response.dump_json(exclude_none=True) == (
+        response.model_dump_json(exclude_none=True).encode()
+    )
+    assert Response.load_json(response.dump_json()) == response
+
+    query = Query.load_json(data, context={"normalize": False})
+    assert query.message == Message.model_validate(
+        EXAMPLE_MESSAGE, context={"normalize": False}
+    )
+
+
+@pytest.mark.parametrize("name", list(jsonio.BACKENDS))
+def test_backends(name):
+    """Check that every backend reads and writes compact UTF-8 JSON"""
+    backend = jsonio.get_backend()
+    jsonio.set_backend(name)
+    try:
+        assert jsonio.get_backend().name == name
+        assert jsonio.dumps({"a": [1, "café"]}) == '{"a":[1,"café"]}'.encode()
+        value = {"message": EXAMPLE_MESSAGE}
+        data = jsonio.dumps(value)
+        assert jsonio.loads(data) == value
+        assert jsonio.loads(memoryview(data)) == value
+    finally:
+        jsonio.set_backend(backend.name)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        jsonio.set_backend("simdjson")
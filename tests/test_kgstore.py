@@ -0,0 +1,57 @@
+import copy
+
+from reasoner_pydantic import KnowledgeGraph, Message, Node
+from reasoner_pydantic.kgstore import MappedStore, mapped_knowledge_graph
+
+from .test_models import EXAMPLE_MESSAGE
+
+
+def test_mapped_store(tmp_path):
+    """Check that models are written back and read lazily"""
+    kgraph = Message.model_validate(EXAMPLE_MESSAGE).knowledge_graph
+    with MappedStore(Node, str(tmp_path / "nodes.store"), cache_size=1) as store:
+        store.update(kgraph.nodes)
+        assert len(store) == len(kgraph.nodes)
+        assert set(store) == set(kgraph.nodes)
+        for key, node in kgraph.nodes.items():
+            assert store[key] == node
+
+        # Changes made in place are kept after eviction
+        key = next(iter(store))
+        store[key].name = "changed"
+        for other in store.values():
+            pass
+        assert store[key].name == "changed"
+        assert store.garbage_bytes > 0
+
+        del store[key]
+        assert key not in store
+        store.compact()
+        assert store.garbage_bytes == 0
+        for other_key, node in kgraph.nodes.items():
+            if other_key != key:
+                assert store[other_key] == node
+
+
+def test_mapped_knowledge_graph():
+    """Check that a mapped knowledge graph works like an in-memory one"""
+    expected = Message.model_validate(EXAMPLE_MESSAGE)
+    expected.update(Message.model_validate(EXAMPLE_MESSAGE))
+
+    message = Message.model_validate(EXAMPLE_MESSAGE)
+    message.knowledge_graph = mapped_knowledge_graph(
+        message.knowledge_graph, cache_size=1
+    )
+    message.update(Message.model_validate(EXAMPLE_MESSAGE))
+
+    assert message == expected
+    assert KnowledgeGraph.model_validate_json(
+        message.knowledge_graph.model_dump_json()
+    ) == KnowledgeGraph.model_validate_json(expected.knowledge_graph.model_dump_json())
+    assert Message.model_validate(message.model_dump()) == expected
+    assert message.get_bound_node_ids() == expected.get_bound_node_ids()
+
+    # Copies are kept in memory
+    copied = copy.deepcopy(message.knowledge_graph)
+    assert type(copied.nodes.root) is dict
+    assert copied == expected.knowledge_graph
@@ -0,0 +1,113 @@
+"""Test the bounded log buffer."""
+
+from reasoner_pydantic import LogBuffer, LogEntry, LogLevel, Response
+
+
+def make_logs(level, count):
+    return [{"level": level, "message": f"{level} {i}"} for i in range(count)]
+
+
+def test_log_limits_on_parse():
+    """Test that entries are filtered and limited before validation"""
+    data = {
+        "message": {},
+        "logs": [
+            *make_logs("DEBUG", 5),
+            *make_logs("ERROR", 2),
+            {"message": "no level"},
+            *make_logs("INFO", 3),
+        ],
+    }
+    response = Response.model_validate(
+        data, context={"min_log_level": "INFO", "log_limits": {"INFO": 2}}
+    )
+    assert [entry.message for entry in response.logs] == [
+        "ERROR 0",
+        "ERROR 1",
+        "no level",
+        "INFO 1",
+        "INFO 2",
+    ]
+    assert response.logs.dropped == {LogLevel.DEBUG: 5, LogLevel.INFO: 1}
+
+    response = Response.model_validate(data)
+    assert len(response.logs) == 11
+    assert response.logs.dropped == {}
+
+    # Without limits, nothing is left out
+    data["logs"] = make_logs("DEBUG", 20_000)
+    response = Response.model_validate(data)
+    assert len(response.logs) == 20_000
+    assert response.logs.dropped == {}
+    for i in range(3):
+        response.logs.append(LogEntry(level=LogLevel.DEBUG, message=str(i)))
+    assert len(response.logs) == 20_003
+
+
+def test_log_buffer():
+    """Test that appending and merging keep the limits"""
+    logs = LogBuffer()
+    logs.set_retention(LogLevel.INFO, {LogLevel.WARNING: 3})
+    for i in range(10):
+        logs.append(LogEntry(level=LogLevel.WARNING, message=str(i)))
+        logs.append(LogEntry(level=LogLevel.DEBUG, message=str(i)))
+        assert len(logs) <= 3
+    logs.compact()
+    assert [entry.message for entry in logs] == ["7", "8", "9"]
+    assert logs.dropped == {LogLevel.DEBUG: 10, LogLevel.WARNING: 7}
+
+    other = LogBuffer.model_validate(
+        make_logs("WARNING", 4), context={"log_limits": {"WARNING": 1}}
+    )
+    logs.merge(other)
+    assert [entry.message for entry in logs] == ["8", "9", "WARNING 3"]
+    assert logs.dropped == {LogLevel.DEBUG: 10, LogLevel.WARNING: 11}
+    assert LogBuffer.model_validate(logs.model_dump()) == logs
+
+
+def test_log_buffer_order():
+    """Test that entries stay in order when older ones are dropped"""
+    logs = LogBuffer.model_validate(
+        make_logs("INFO", 2), context={"log_limits": {"DEBUG": 2}}
+    )
+    for i in range(4):
+        logs.append(LogEntry(level=LogLevel.DEBUG, message=f"DEBUG {i}"))
+        logs.append(LogEntry(level=LogLevel.INFO, message=f"INFO {i + 2}"))
+        assert len(logs) == 3 + i + min(i + 1, 2)
+    assert [entry["message"] for entry in logs.model_dump()] == [
+        "INFO 0",
+        "INFO 1",
+        "INFO 2",
+        "INFO 3",
+        "DEBUG 2",
+        "INFO 4",
+        "DEBUG 3",
+        "INFO 5",
+    ]
+    assert logs.dropped == {LogLevel.DEBUG: 2}
+
+
+def test_log_default_limit():
+    """Test that a default limit applies to responses parsed without limits"""
+    LogBuffer.set_default_limit(2)
+    try:
+        response = Response.model_validate(
+            {"message": {}, "logs": [*make_logs("DEBUG", 5), *make_logs("INFO", 1)]}
+        )
+        response.logs.append(LogEntry(level=LogLevel.INFO, message="INFO 1"))
+        response.logs.append(LogEntry(level=LogLevel.INFO, message="INFO 2"))
+    finally:
+        LogBuffer.set_default_limit(None)
+    assert [entry.message for entry in response.logs] == [
+        "DEBUG 3",
+        "DEBUG 4",
+        "INFO 1",
+        "INFO 2",
+    ]
+    assert response.logs.dropped == {LogLevel.DEBUG: 3, LogLevel.INFO: 1}
+    assert (
+        len(
+            Response.model_validate({"message": {}, "logs": make_logs("DEBUG", 5)}).logs
+        )
+        == 5
+    )
@@ -0,0 +1,199 @@
+"""Test MetaKnowledgeGraph lookups."""
+
+import random
+
+from reasoner_pydantic import MetaKGRegistry, MetaKnowledgeGraph, QueryGraph
+
+METAKG = {
+    "nodes": {
+        "biolink:SmallMolecule": {"id_prefixes": ["CHEBI", "PUBCHEM.COMPOUND"]},
+        "biolink:Disease": {"id_prefixes": ["MONDO"]},
+        "biolink:Gene": {"id_prefixes": ["NCBIGene"]},
+    },
+    "edges": [
+        {
+            "subject": "biolink:SmallMolecule",
+            "predicate": "biolink:treats",
+            "object": "biolink:Disease",
+        },
+        {
+            "subject": "biolink:SmallMolecule",
+            "predicate": "biolink:affects",
+            "object": "biolink:Gene",
+            "qualifiers": [
+                {"qualifier_type_id": "biolink:object_aspect_qualifier"},
+                {"qualifier_type_id": "biolink:object_direction_qualifier"},
+            ],
+        },
+    ],
+}
+
+
+def make_qgraph(subject, predicate, object, qualifier_set=None):
+    qgraph = {
+        "nodes": {"n0": subject, "n1": object},
+        "edges": {"e0": {"subject": "n0", "object": "n1"}},
+    }
+    if predicate:
+        qgraph["edges"]["e0"]["predicates"] = [predicate]
+    if qualifier_set:
+        qgraph["edges"]["e0"]["qualifier_constraints"] = [
+            {"qualifier_set": qualifier_set}
+        ]
+    return QueryGraph.model_validate(qgraph)
+
+
+def test_metakg_index():
+    metakg = MetaKnowledgeGraph.model_validate(METAKG)
+    index = metakg.index
+    assert len(index.get_edges("biolink:SmallMolecule")) == 2
+    assert len(index.get_edges(predicate="biolink:treats")) == 1
+    assert index.get_edges("biolink:Gene", "biolink:treats") == []
+    assert len(index.edges_by_qualifier_type["biolink:object_aspect_qualifier"]) == 1
+    assert index.categories_by_prefix["CHEBI"] == {"biolink:SmallMolecule"}
+
+
+def test_metakg_supports():
+    metakg = MetaKnowledgeGraph.model_validate(METAKG)
+
+    drug = {"categories": ["biolink:SmallMolecule"]}
+    disease = {"ids": ["MONDO:0005148"], "categories": ["biolink:Disease"]}
+    gene = {"categories": ["biolink:Gene"]}
+
+    assert metakg.supports(make_qgraph(drug, "biolink:treats", disease))
+    # Unconstrained categories and predicates match anything
+    assert metakg.supports(make_qgraph({}, None, {"ids": ["MONDO:0005148"]}))
+    assert not metakg.supports(make_qgraph(drug, "biolink:treats", gene))
+    assert not metakg.supports(
+        make_qgraph(drug, "biolink:treats", {"ids": ["HP:0000001"]})
+    )
+
+    aspect = {
+        "qualifier_type_id": "biolink:object_aspect_qualifier",
+        "qualifier_value": "activity",
+    }
+    assert metakg.supports(make_qgraph(drug, "biolink:affects", gene, [aspect]))
+    assert not metakg.supports(make_qgraph(drug, "biolink:treats", disease, [aspect]))
+
+
+def test_metakg_recompile():
+    metakg = MetaKnowledgeGraph.model_validate(METAKG)
+    qgraph = make_qgraph(
+        {"categories": ["biolink:Gene"]},
+        "biolink:treats",
+        {"categories": ["biolink:Disease"]},
+    )
+    assert not metakg.supports(qgraph)
+    metakg.edges.append(metakg.edges[0].model_copy(update={"subject": "biolink:Gene"}))
+    metakg.compile()
+    assert metakg.supports(qgraph)
+
+
+def test_metakg_registry():
+    registry = MetaKGRegistry()
+    registry.add("infores:kp0", MetaKnowledgeGraph.model_validate(METAKG))
+    registry.add(
+        "infores:kp1",
+        MetaKnowledgeGraph.model_validate(
+            {
+                "nodes": {"biolink:Drug": {"id_prefixes": ["CHEBI"]}},
+                "edges": [
+                    {
+                        "subject": "biolink:Drug",
+                        "predicate": "biolink:treats",
+                        "object": "biolink:Disease",
+                    }
+                ],
+            }
+        ),
+    )
+
+    gene = {"categories": ["biolink:Gene"]}
+    qgraph = make_qgraph({"ids": ["CHEBI:6801"]}, "biolink:treats", {})
+    assert registry.route(qgraph) == {"e0": {"infores:kp0", "infores:kp1"}}
+
+    aspect = {
+        "qualifier_type_id": "biolink:object_aspect_qualifier",
+        "qualifier_value": "activity",
+    }
+    qgraph = make_qgraph({"ids": ["CHEBI:6801"]}, None, gene, [aspect])
+    assert registry.route(qgraph) == {"e0": {"infores:kp0"}}
+
+    registry.remove("infores:kp0")
+    assert "infores:kp0" not in registry
+    assert registry.route(qgraph) == {"e0": set()}
+    qgraph = make_qgraph({"ids": ["CHEBI:6801"]}, "biolink:treats", {})
+    assert registry.route(qgraph) == {"e0": {"infores:kp1"}}
+
+
+def test_metakg_registry_prefixes():
+    """Test that KPs are only routed IDs with prefixes they serve"""
+    registry = MetaKGRegistry()
+    metakgs = {
+        "infores:kp0": METAKG,
+        "infores:kp1": {
+            "nodes": {
+                "biolink:SmallMolecule": {"id_prefixes": ["PUBCHEM.COMPOUND"]},
+                "biolink:Disease": {"id_prefixes": ["MONDO"]},
+            },
+            "edges": [METAKG["edges"][0]],
+        },
+    }
+    for infores, metakg in metakgs.items():
+        registry.add(infores, MetaKnowledgeGraph.model_validate(metakg))
+
+    drug = {"categories": ["biolink:SmallMolecule"]}
+    for subject in (
+        {"ids": ["CHEBI:6801"]},
+        {"ids": ["CHEBI:6801"], **drug},
+        {"ids": ["PUBCHEM.COMPOUND:4091"]},
+        drug,
+    ):
+        qgraph = make_qgraph(subject, "biolink:treats", {})
+        assert registry.route(qgraph)["e0"] == {
+            infores for infores in metakgs if registry.metakgs[infores].supports(qgraph)
+        }
+    qgraph = make_qgraph({"ids": ["CHEBI:6801"]}, "biolink:treats", {})
+    assert registry.route(qgraph) == {"e0": {"infores:kp0"}}
+
+
+def test_metakg_registry_pinned():
+    """Test that routing pinned QNodes agrees with each KP's MetaKG"""
+    rng = random.Random(0)
+    categories = ["biolink:SmallMolecule", "biolink:Disease", "biolink:Gene"]
+    prefixes = ["CHEBI", "PUBCHEM.COMPOUND", "MONDO", "NCBIGene"]
+    predicates = ["biolink:treats", "biolink:affects"]
+    registry = MetaKGRegistry()
+    for i in range(50):
+        metakg = {
+            "nodes": {
+                category: {"id_prefixes": rng.sample(prefixes, rng.randint(1, 2))}
+                for category in rng.sample(categories, rng.randint(1, 3))
+            },
+            "edges": [
+                {
+                    "subject": rng.choice(categories),
+                    "predicate": rng.choice(predicates),
+                    "object": rng.choice(categories),
+                }
+                for _ in range(rng.randint(1, 3))
+            ],
+        }
+        registry.add(f"infores:kp{i}", MetaKnowledgeGraph.model_validate(metakg))
+
+    qnodes = [{}, {"categories": ["biolink:Disease"]}] + [
+        {"ids": [f"{prefix}:1"], **extra}
+        for prefix in prefixes
+        for extra in ({}, {"categories": ["biolink:Gene"]})
+    ]
+    for subject in qnodes:
+        for object in qnodes:
+            if not subject.get("ids") and not object.get("ids"):
+                continue
+            for predicate in (None, *predicates):
+                qgraph = make_qgraph(subject, predicate, object)
+                assert registry.route(qgraph)["e0"] == {
+                    infores
+                    for infores, metakg in registry.metakgs.items()
+                    if metakg.supports(qgraph)
+                }
@@ -1,6 +1,22 @@
+import itertools
+import random
+import time
+
+import pytest
 from pydantic import ValidationError
+from reasoner_pydantic.qgraph import APPROXIMATE_FINGERPRINT_PREFIX
 from reasoner_pydantic.shared import Attribute, BiolinkEntity
-from reasoner_pydantic import Message, QNode, QEdge, QueryGraph, Result, Response
+from reasoner_pydantic.utils import deep_digest, deep_hash
+from reasoner_pydantic import (
+    Message,
+    MessageDelta,
+    Node,
+    QNode,
+    QEdge,
+    QueryGraph,
+    Result,
+    Response,
+)
 
 
 def test_qnode_null_properties():
@@ -509,3 +525,371 @@ def test_invalid_pathfinder_query():
         _ = Message.model_validate(INVALID_PATHFINDER_QUERY)
     except Exception as e:
         assert isinstance(e, ValidationError)
+
+
+def test_memory_report():
+    """
+    Test that memory is reported per section without double counting
+    """
+    response = Response.model_validate(
+        {"message": EXAMPLE_MESSAGE, "logs": [{"message": "hello"}]}
+    )
+    report = response.memory_report()
+    sections = [name for name in report if name != "total"]
+    assert sections == [
+        "attributes",
+        "nodes",
+        "edges",
+        "analyses",
+        "results",
+        "auxiliary_graphs",
+        "query_graph",
+        "logs",
+    ]
+    for name in ("nodes", "edges", "analyses", "results", "query_graph", "logs"):
+        assert report[name]["bytes"] > 0
+    assert report["total"]["bytes"] > sum(report[name]["bytes"] for name in sections)
+
+    # Sharing an object between sections doesn't count it twice
+    message = response.message
+    before = message.memory_report()
+    node = next(iter(message.knowledge_graph.nodes.values()))
+    message.knowledge_graph.nodes["shared:node"] = node
+    after = message.memory_report()
+    assert after["nodes"]["objects"] - before["nodes"]["objects"] <= 1
+
+
+def test_shard_reassemble():
+    """
+    Test that shards hold what their results reference and reassemble losslessly
+    """
+
+    def edge(subject, object, support_graph=None):
+        attributes = []
+        if support_graph:
+            attributes.append(
+                {
+                    "attribute_type_id": "biolink:support_graphs",
+                    "value": [support_graph],
+                }
+            )
+        return {
+            "subject": subject,
+            "object": object,
+            "predicate": "biolink:related_to",
+            "sources": [
+                {
+                    "resource_id": "infores:kp",
+                    "resource_role": "primary_knowledge_source",
+                }
+            ],
+            "attributes": attributes,
+        }
+
+    def result(subject, object, edge_id, support_graph=None):
+        analysis = {
+            "resource_id": "infores:ara",
+            "edge_bindings": {"e": [{"id": edge_id, "attributes": []}]},
+        }
+        if support_graph:
+            analysis["support_graphs"] = [support_graph]
+        return {
+            "node_bindings": {
+                "n0": [{"id": subject, "attributes": []}],
+                "n1": [{"id": object, "attributes": []}],
+            },
+            "analyses": [analysis],
+        }
+
+    message = Message.model_validate(
+        {
+            "query_graph": {
+                "nodes": {"n0": {}, "n1": {}},
+                "edges": {"e": {"subject": "n0", "object": "n1"}},
+            },
+            "knowledge_graph": {
+                "nodes": {
+                    f"CURIE:{i}": {"categories": ["biolink:Gene"], "attributes": []}
+                    for i in range(7)
+                },
+                "edges": {
+                    "e01": edge("CURIE:0", "CURIE:1"),
+                    "e23": edge("CURIE:2", "CURIE:3"),
+                    "e45": edge("CURIE:4", "CURIE:5", support_graph="aux2"),
+                    "e56": edge("CURIE:5", "CURIE:6"),
+                },
+            },
+            "results": [
+                result("CURIE:0", "CURIE:1", "e01"),
+                result("CURIE:2", "CURIE:3", "e23", support_graph="aux1"),
+            ],
+            "auxiliary_graphs": {
+                "aux1": {"edges": ["e45"], "attributes": []},
+                "aux2": {"edges": ["e56"], "attributes": []},
+            },
+        }
+    )
+    edge_ids = list(message.knowledge_graph.edges)
+
+    first, second = message.shard(2)
+    assert set(first.knowledge_graph.nodes) == {"CURIE:0", "CURIE:1"}
+    assert set(first.knowledge_graph.edges) == {edge_ids[0]}
+    assert len(first.auxiliary_graphs) == 0
+    assert set(second.knowledge_graph.nodes) == {f"CURIE:{i}" for i in range(2, 7)}
+    assert set(second.knowledge_graph.edges) == set(edge_ids[1:])
+    assert set(second.auxiliary_graphs) == {"aux1", "aux2"}
+
+    reassembled = Message.reassemble([first, second])
+    assert reassembled == message
+    assert list(reassembled.results) == list(message.results)
+
+    assert len(message.shard(3)) == 3
+    with pytest.raises(ValueError):
+        message.shard(0)
+
+
+def test_diff_apply_patch():
+    """
+    Test that a patch made by diff brings an old copy up to date
+    """
+    message = Message.model_validate(EXAMPLE_MESSAGE)
+    first_result = message.results[0]
+    old = message.model_copy(deep=True)
+
+    # Unchanged message
+    delta = message.diff(old)
+    assert not (delta.nodes or delta.edges or delta.results)
+    assert delta.result_order is None
+
+    message.knowledge_graph.nodes["CHEBI:6801"].name = "changed"
+    message.knowledge_graph.nodes["CURIE:new"] = Node(
+        categories=["biolink:Gene"], attributes=[]
+    )
+    del message.knowledge_graph.nodes["CHEBI:6802"]
+    edge_id = next(iter(message.knowledge_graph.edges))
+    message.knowledge_graph.edges[edge_id].attributes.add(
+        Attribute(attribute_type_id="biolink:score", value=1)
+    )
+    # Change an analysis in place
+    analysis = next(iter(first_result.analyses))
+    analysis.score = 1.0
+    message.results.append(
+        Result.model_validate(
+            {
+                "node_bindings": {
+                    "n1": [{"id": "CURIE:new", "attributes": []}],
+                    "n2": [{"id": "MONDO:5148", "attributes": []}],
+                },
+                "analyses": [],
+            }
+        )
+    )
+
+    delta = message.diff(old)
+    assert set(delta.nodes) == {"CHEBI:6801", "CURIE:new"}
+    assert set(delta.removed_nodes) == {"CHEBI:6802"}
+    assert set(delta.edges) == {edge_id}
+    assert len(delta.results) == 2
+
+    patched = old.model_copy(deep=True)
+    patched.apply_patch(MessageDelta.model_validate_json(delta.model_dump_json()))
+    assert deep_hash(patched) == deep_hash(message)
+
+    # Reordered results are sent in order
+    message.results.root.reverse()
+    delta = message.diff(old)
+    patched = old.model_copy(deep=True)
+    patched.apply_patch(delta)
+    assert [result.get_key() for result in patched.results] == [
+        result.get_key() for result in message.results
+    ]
+
+
+def test_query_graph_fingerprint():
+    """
+    Test that fingerprints ignore key names and list order
+    """
+    qgraph = QueryGraph.model_validate(EXAMPLE_MESSAGE["query_graph"])
+    renamed = QueryGraph.model_validate(
+        {
+            "nodes": {
+                "disease": {"categories": ["biolink:Disease"]},
+                "drug": {"categories": ["biolink:ChemicalSubstance"]},
+            },
+            "edges": {
+                "treats": {
+                    "subject": "drug",
+                    "object": "disease",
+                    "predicates": ["biolink:related_to"],
+                }
+            },
+        }
+    )
+    digest, node_keys, edge_keys = qgraph.fingerprint()
+    renamed_digest, renamed_node_keys, renamed_edge_keys = renamed.fingerprint()
+    assert digest == renamed_digest
+    assert node_keys["n1"] == renamed_node_keys["drug"]
+    assert edge_keys["n1n2"] == renamed_edge_keys["treats"] == "e0"
+
+    # Reversing the edge makes another query
+    reversed_qgraph = qgraph.model_copy(deep=True)
+    reversed_qgraph.edges["n1n2"].subject = "n2"
+    reversed_qgraph.edges["n1n2"].object = "n1"
+    assert reversed_qgraph.fingerprint()[0] != digest
+
+    # Symmetric graphs: a cycle of four untyped nodes
+    cycle = QueryGraph.model_validate(
+        {
+            "nodes": {key: {} for key in "abcd"},
+            "edges": {
+                "ab": {"subject": "a", "object": "b"},
+                "bc": {"subject": "b", "object": "c"},
+                "cd": {"subject": "c", "object": "d"},
+                "da": {"subject": "d", "object": "a"},
+            },
+        }
+    )
+    shuffled = QueryGraph.model_validate(
+        {
+            "nodes": {key: {} for key in "zyxw"},
+            "edges": {
+                "1": {"subject": "x", "object": "w"},
+                "2": {"subject": "z", "object": "y"},
+                "3": {"subject": "w", "object": "z"},
+                "4": {"subject": "y", "object": "x"},
+            },
+        }
+    )
+    assert cycle.fingerprint()[0] == shuffled.fingerprint()[0]
+
+
+def shuffled_query_graph(node_count, links, seed):
+    """Make a query graph with random keys, in random order"""
+    rng = random.Random(seed)
+    keys = [f"q{rng.random():.8f}" for _ in range(node_count)]
+    nodes = [(key, {"categories": ["biolink:Gene"]}) for key in keys]
+    edges = [
+        (f"e{rng.random():.8f}", {"subject": keys[a], "object": keys[b]})
+        for a, b in links
+    ]
+    rng.shuffle(nodes)
+    rng.shuffle(edges)
+    return QueryGraph.model_validate({"nodes": dict(nodes), "edges": dict(edges)})
+
+
+def test_query_graph_fingerprint_worst_case():
+    """
+    Test that symmetric query graphs are fingerprinted quickly and invariantly
+    """
+    # Complete graph with edges both ways, and two triangles vs a hexagon
+    complete = list(itertools.permutations(range(8), 2))
+    hexagon = [(i, (i + 1) % 6) for i in range(6)]
+    triangles = [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3)]
+    digests = {}
+    for name, node_count, links in [
+        ("complete", 8, complete),
+        ("hexagon", 6, hexagon),
+        ("triangles", 6, triangles),
+    ]:
+        found = set()
+        for seed in range(3):
+            qgraph = shuffled_query_graph(node_count, links, seed)
+            start = time.perf_counter()
+            found.add(qgraph.fingerprint()[0])
+            assert time.perf_counter() - start < 1
+        assert len(found) == 1
+        digests[name] = found.pop()
+        assert not digests[name].startswith(APPROXIMATE_FINGERPRINT_PREFIX)
+    assert digests["hexagon"] != digests["triangles"]
+
+    # Past the bound on the work, digests are approximate but still invariant
+    found = set()
+    for seed in range(3):
+        qgraph = shuffled_query_graph(100, [], seed)
+        start = time.perf_counter()
+        found.add(qgraph.fingerprint()[0])
+        assert time.perf_counter() - start < 1
+    assert len(found) == 1
+    assert found.pop().startswith(APPROXIMATE_FINGERPRINT_PREFIX)
+
+
+def test_rebind_keys():
+    """
+    Test that a message rebound to canonical keys can be rebound back
+    """
+    message = Message.model_validate(EXAMPLE_MESSAGE)
+    # Sets may come out in another order once rebuilt, so contents are compared
+    expected = deep_digest(message)
+    _, node_keys, edge_keys = message.query_graph.fingerprint()
+    message.rebind_keys(node_keys, edge_keys)
+    assert set(message.query_graph.nodes) == {"n0", "n1"}
+    assert set(message.query_graph.edges) == {"e0"}
+    assert set(message.results[0].node_bindings) == {"n0", "n1"}
+    for analysis in message.results[0].analyses:
+        assert set(analysis.edge_bindings) == {"e0"}
+        assert analysis in message.results[0].analyses
+
+    message.rebind_keys(
+        {v: k for k, v in node_keys.items()}, {v: k for k, v in edge_keys.items()}
+    )
+    assert deep_digest(message) == expected
+    for analysis in message.results[0].analyses:
+        assert analysis in message.results[0].analyses
+
+
+def test_rebind_keys_shared_names():
+    """
+    Test that nodes and edges with the same key are renamed separately
+    """
+    qgraph = QueryGraph.model_validate(
+        {
+            "nodes": {"a": {"categories": ["biolink:Drug"]}, "b": {}},
+            "edges": {"a": {"subject": "a", "object": "b"}},
+        }
+    )
+    _, node_keys, edge_keys = qgraph.fingerprint()
+    assert node_keys == {"a": "n0", "b": "n1"}
+    assert edge_keys == {"a": "e0"}
+
+    message = Message.model_validate(
+        {
+            "query_graph": qgraph.model_dump(),
+            "results": [
+                {
+                    "node_bindings": {
+                        "a": [{"id": "CHEBI:0", "attributes": []}],
+                        "b": [{"id": "MONDO:0", "attributes": []}],
+                    },
+                    "analyses": [
+                        {
+                            "resource_id": "ara0",
+                            "edge_bindings": {"a": [{"id": "e0", "attributes": []}]},
+                        }
+                    ],
+                }
+            ],
+        }
+    )
+    message.rebind_keys(node_keys, edge_keys)
+    assert set(message.query_graph.edges) == {"e0"}
+    assert message.query_graph.edges["e0"].subject == "n0"
+    result = message.results[0]
+    assert set(result.node_bindings) == {"n0", "n1"}
+    analysis = next(iter(result.analyses))
+    assert set(analysis.edge_bindings) == {"e0"}
+    assert analysis in result.analyses
+
+
+def test_constraint_dump_keeps_negation():
+    """
+    Test that dumping an attribute constraint doesn't modify it
+    """
+    qnode = QNode.model_validate(
+        {
+            "constraints": [
+                {"name": "n", "id": "a:b", "not": True, "operator": "==", "value": 1}
+            ]
+        }
+    )
+    assert qnode.model_dump()["constraints"][0]["not"] is True
+    assert qnode.model_dump()["constraints"][0]["not"] is True
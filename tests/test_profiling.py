@@ -0,0 +1,74 @@
+"""Test per-phase profiling."""
+
+from reasoner_pydantic import Message, profiling
+
+from .test_update import ATTRIBUTE_A
+
+MESSAGE = {
+    "knowledge_graph": {
+        "nodes": {
+            "MONDO:1": {"categories": ["biolink:Disease"], "attributes": []},
+            "CHEBI:1": {"categories": ["biolink:Drug"], "attributes": []},
+        },
+        "edges": {
+            "ke0": {
+                "subject": "CHEBI:1",
+                "object": "MONDO:1",
+                "predicate": "biolink:treats",
+                "attributes": [ATTRIBUTE_A],
+                "sources": [
+                    {"resource_id": "kp0", "resource_role": "primary_knowledge_source"}
+                ],
+            }
+        },
+    },
+    "results": [
+        {
+            "node_bindings": {"n0": [{"id": "CHEBI:1", "attributes": []}]},
+            "analyses": [
+                {
+                    "resource_id": "ara0",
+                    "edge_bindings": {"e0": [{"id": "ke0", "attributes": []}]},
+                }
+            ],
+        }
+    ],
+}
+
+
+def test_profile_update():
+    """Test that merging reports each of its phases"""
+    m = Message.model_validate(MESSAGE)
+    # Normalized messages are merged without normalizing them again
+    other = Message.model_validate(MESSAGE, context={"normalize": False})
+
+    with profiling.profile(trace_allocations=True) as records:
+        m.update(other)
+
+    summary = profiling.summarize(records)
+    for name in (
+        "Message.update",
+        "Message.update.copy",
+        "Message.update_kg_edge_ids.edges",
+        "KnowledgeGraph.update.nodes",
+        "KnowledgeGraph.update.edges",
+        "Results.update",
+    ):
+        assert summary[name]["calls"] == 1
+        assert summary[name]["allocated_bytes"] is not None
+    assert summary["KnowledgeGraph.update.nodes"]["items"] == 2
+    assert summary["Results.update"]["items"] == 1
+
+
+def test_profile_off():
+    """Test that nothing is reported once the listener is removed"""
+    records = []
+    profiling.add_listener(records.append)
+    Message.model_validate(MESSAGE)
+    profiling.remove_listener(records.append)
+    count = len(records)
+    assert count > 0
+
+    Message.model_validate(MESSAGE)
+    assert len(records) == count
+    assert profiling.phase("anything") is profiling.phase("anything else")
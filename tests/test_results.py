@@ -0,0 +1,129 @@
+"""Test the results index."""
+
+import copy
+
+from reasoner_pydantic import Message, Result
+from reasoner_pydantic.results import Results
+
+
+def make_result(node_ids, edge_ids, resource_id="ara0"):
+    return {
+        "node_bindings": {
+            f"n{i}": [{"id": node_id, "attributes": []}]
+            for i, node_id in enumerate(node_ids)
+        },
+        "analyses": [
+            {
+                "resource_id": resource_id,
+                "edge_bindings": {
+                    "e0": [{"id": edge_id, "attributes": []} for edge_id in edge_ids]
+                },
+            }
+        ],
+    }
+
+
+def test_results_index():
+    """Test lookups by node and edge, and that they follow changes"""
+    results = Results.model_validate(
+        [
+            make_result(["CHEBI:1", "MONDO:1"], ["ke1"]),
+            make_result(["CHEBI:2", "MONDO:1"], ["ke2", "ke3"]),
+        ]
+    )
+    first, second = results
+    index = results.lookup
+    # The sequence API is unchanged
+    assert results.index(second) == 1
+    assert index.node_results("MONDO:1") == [first, second]
+    assert index.node_results("CHEBI:2") == [second]
+    assert index.node_results("CHEBI:9") == []
+    assert [
+        (result, analysis.resource_id)
+        for result, analysis in index.edge_analyses("ke3")
+    ] == [(second, "ara0")]
+
+    # Same nodes as the first result, so it's merged into it
+    results.add(
+        Result.model_validate(make_result(["CHEBI:1", "MONDO:1"], ["ke4"], "ara1"))
+    )
+    assert [
+        (result, analysis.resource_id)
+        for result, analysis in results.lookup.edge_analyses("ke4")
+    ] == [(first, "ara1")]
+
+    results.update(
+        [
+            Result.model_validate(make_result(["CHEBI:3", "MONDO:1"], ["ke5"])),
+            Result.model_validate(make_result(["CHEBI:2", "MONDO:1"], ["ke6"], "ara1")),
+        ]
+    )
+    third = results[2]
+    assert results.lookup is index
+    assert index.node_results("MONDO:1") == [first, second, third]
+    assert [result for result, _ in index.edge_analyses("ke6")] == [second]
+
+    results.append(Result.model_validate(make_result(["CHEBI:4"], ["ke7"])))
+    assert index.node_results("CHEBI:4") == [results[3]]
+
+    # A new list of results gets a new index
+    results.root = [second]
+    assert results.lookup.node_results("MONDO:1") == [second]
+    assert copy.deepcopy(results).lookup.node_results("MONDO:1") == [results[0]]
+
+
+def test_results_index_after_message_update():
+    """Test that merging messages keeps the index of the results"""
+    message = Message.model_validate(
+        {"results": [make_result(["CHEBI:1", "MONDO:1"], ["ke1"])]}
+    )
+    index = message.results.lookup
+    message.update(
+        Message.model_validate(
+            {
+                "results": [
+                    make_result(["CHEBI:1", "MONDO:1"], ["ke2"], "ara1"),
+                    make_result(["CHEBI:2", "MONDO:1"], ["ke3"]),
+                ]
+            }
+        )
+    )
+    assert message.results.lookup is index
+    assert len(index.node_results("MONDO:1")) == 2
+    assert [result for result, _ in index.edge_analyses("ke2")] == [message.results[0]]
+
+
+def test_results_index_after_normalize():
+    """Test that normalizing edge IDs updates the index"""
+    message = Message.model_validate(
+        {
+            "knowledge_graph": {
+                "nodes": {},
+                "edges": {
+                    "ke1": {
+                        "subject": "CHEBI:1",
+                        "object": "MONDO:1",
+                        "predicate": "biolink:treats",
+                        "sources": [
+                            {
+                                "resource_id": "kp0",
+                                "resource_role": "primary_knowledge_source",
+                            }
+                        ],
+                        "attributes": [],
+                    }
+                },
+            },
+            "results": [make_result(["CHEBI:1", "MONDO:1"], ["ke1"])],
+        },
+        context={"normalize": False},
+    )
+    assert len(message.results.lookup.edge_analyses("ke1")) == 1
+
+    message.normalize()
+    (edge_id,) = message.knowledge_graph.edges
+    assert edge_id != "ke1"
+    assert message.results.lookup.edge_analyses("ke1") == []
+    assert [result for result, _ in message.results.lookup.edge_analyses(edge_id)] == [
+        message.results[0]
+    ]
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from reasoner_pydantic import Query, components
+from reasoner_pydantic import schema
+from reasoner_pydantic.schema import json_schema, openapi_components
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    schema.clear_cache()
+    yield
+    schema.clear_cache()
+
+
+def test_openapi_components():
+    """Check that every component has a schema with resolvable references"""
+    schemas = openapi_components()["schemas"]
+    assert len(schemas) > len(components)
+    assert schemas["CURIE"] == {"type": "string"}
+    assert schemas["Query"]["properties"]["message"] == {
+        "$ref": "#/components/schemas/Message"
+    }
+    refs = set()
+
+    def collect(value):
+        if isinstance(value, dict):
+            if "$ref" in value:
+                refs.add(value["$ref"].rsplit("/", 1)[1])
+            for v in value.values():
+                collect(v)
+        elif isinstance(value, list):
+            for v in value:
+                collect(v)
+
+    collect(schemas)
+    assert refs <= set(schemas)
+
+
+def test_openapi_components_copies():
+    """Check that changing a result doesn't change the cached schemas"""
+    first = openapi_components()
+    first["schemas"].clear()
+    assert openapi_components()["schemas"]
+
+
+def test_openapi_components_disk_cache(tmp_path, monkeypatch):
+    """Check that schemas stored on disk are loaded instead of generated"""
+    expected = openapi_components(cache_dir=str(tmp_path))
+    (path,) = tmp_path.iterdir()
+    assert schema.schema_version_key() in path.name
+    assert json.loads(path.read_text()) == expected
+
+    schema.clear_cache()
+
+    def fail(_mode):
+        raise AssertionError("schemas were generated again")
+
+    monkeypatch.setattr(schema, "_generate_components", fail)
+    assert openapi_components(cache_dir=str(tmp_path)) == expected
+
+
+def test_json_schema():
+    assert json_schema(Query) == Query.model_json_schema()
+    assert json_schema(Query) is not json_schema(Query)
@@ -0,0 +1,107 @@
+"""Test support graph expansion."""
+
+from reasoner_pydantic import Message
+
+
+def make_edge(subject, support_graphs=()):
+    attributes = []
+    if support_graphs:
+        attributes.append(
+            {
+                "attribute_type_id": "biolink:support_graphs",
+                "value": list(support_graphs),
+            }
+        )
+    return {
+        "subject": subject,
+        "object": "MONDO:0",
+        "predicate": "biolink:related_to",
+        "sources": [
+            {"resource_id": "kp0", "resource_role": "primary_knowledge_source"}
+        ],
+        "attributes": attributes,
+    }
+
+
+# Result -> e0 -> a0 -> {e1 -> a1 -> e3, e2 -> a2 -> {e4 -> a1, e5 -> a3 -> e6 -> a2}}
+MESSAGE = {
+    "knowledge_graph": {
+        "nodes": {},
+        "edges": {
+            "e0": make_edge("CHEBI:0", ["a0"]),
+            "e1": make_edge("CHEBI:1", ["a1"]),
+            "e2": make_edge("CHEBI:2", ["a2"]),
+            "e3": make_edge("CHEBI:3"),
+            "e4": make_edge("CHEBI:4", ["a1"]),
+            "e5": make_edge("CHEBI:5", ["a3"]),
+            "e6": make_edge("CHEBI:6", ["a2", "missing"]),
+        },
+    },
+    "auxiliary_graphs": {
+        "a0": {"edges": ["e1", "e2"], "attributes": []},
+        "a1": {"edges": ["e3"], "attributes": []},
+        "a2": {"edges": ["e4", "e5"], "attributes": []},
+        "a3": {"edges": ["e6"], "attributes": []},
+    },
+    "results": [
+        {
+            "node_bindings": {"n0": [{"id": "CHEBI:0", "attributes": []}]},
+            "analyses": [
+                {
+                    "resource_id": "ara0",
+                    "edge_bindings": {"q0": [{"id": "e0", "attributes": []}]},
+                }
+            ],
+        }
+    ],
+}
+
+
+def test_expand_support():
+    """Test expansion of results and edges, with cycles and depth limits"""
+    message = Message.model_validate(MESSAGE, context={"normalize": False})
+    result = next(iter(message.results))
+
+    expansion = message.expand_support(result)
+    assert expansion.aux_graph_ids == {"a0", "a1", "a2", "a3"}
+    assert expansion.edge_ids == {"e1", "e2", "e3", "e4", "e5", "e6"}
+    assert expansion.cyclic_aux_graph_ids == {"a2", "a3"}
+    assert not expansion.truncated
+
+    edge_expansion = message.expand_support("e5")
+    assert edge_expansion.aux_graph_ids == {"a1", "a2", "a3"}
+    assert message.expand_support(message.knowledge_graph.edges["e5"]) == (
+        edge_expansion
+    )
+    assert message.expand_support("e3") == message.expand_support("unknown")
+    assert message.expand_support("e3").edge_ids == set()
+
+    limited = message.expand_support(result, max_depth=2)
+    assert limited.aux_graph_ids == {"a0", "a1", "a2"}
+    assert limited.edge_ids == {"e1", "e2", "e3", "e4", "e5"}
+    assert limited.cyclic_aux_graph_ids == {"a2"}
+    assert limited.truncated
+    assert message.expand_support(result, max_depth=3) == expansion
+    assert message.expand_support(result, max_depth=0).truncated
+
+
+def test_support_cache():
+    """Test that closures are computed once and dropped on changes"""
+    message = Message.model_validate(MESSAGE, context={"normalize": False})
+    message.expand_support("e0")
+    index = message._support_index
+    closure = index.closure("a2")
+    assert index.closure("a3") is closure
+    message.expand_support("e1")
+    assert message._support_index is index
+
+    message.remove_kg_edges(["e5"])
+    expansion = message.expand_support("e0")
+    assert message._support_index is not index
+    assert expansion.aux_graph_ids == {"a0", "a1", "a2"}
+    assert expansion.cyclic_aux_graph_ids == set()
+
+    message.normalize()
+    assert message.expand_support(
+        message.knowledge_graph.edges[next(iter(message.knowledge_graph.edges))]
+    ).aux_graph_ids == {"a0", "a1", "a2"}
@@ -1,5 +1,17 @@
-from reasoner_pydantic import Attribute, Message
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+
+import pytest
 
+from reasoner_pydantic import Attribute, Message
+from reasoner_pydantic.message import (
+    EDGE_ID_SCHEME,
+    edge_digest,
+    parallel_edge_digests,
+)
 
 # Some sample attributes
 ATTRIBUTE_A = Attribute.model_validate(
@@ -406,6 +418,162 @@ def test_normalize_knowledge_graph_edges():
     assert next(iter(analysis.edge_bindings["qe0"])).id == edge_id
 
 
+def normalization_message(count: int) -> dict:
+    """Make a message with count edges, an auxiliary graph and a result"""
+    edges = {
+        f"e{index}": {
+            "subject": f"MONDO:{index}",
+            "object": "CHEBI:1",
+            "predicate": "biolink:treated_by",
+            "qualifiers": [
+                {
+                    "qualifier_type_id": "biolink:object_aspect_qualifier",
+                    "qualifier_value": "activity",
+                },
+                {
+                    "qualifier_type_id": "biolink:object_direction_qualifier",
+                    "qualifier_value": "increased",
+                },
+            ],
+            "attributes": [],
+            "sources": [
+                {"resource_id": "kp0", "resource_role": "primary_knowledge_source"}
+            ],
+        }
+        for index in range(count)
+    }
+    return {
+        "knowledge_graph": {"nodes": {}, "edges": edges},
+        "auxiliary_graphs": {"a0": {"edges": ["e0", "e1"], "attributes": []}},
+        "results": [
+            {
+                "node_bindings": {},
+                "analyses": [
+                    {
+                        "resource_id": "ara0",
+                        "edge_bindings": {"qe0": [{"id": "e2", "attributes": []}]},
+                    }
+                ],
+            }
+        ],
+    }
+
+
+def test_normalize_references():
+    """Test that normalizing later renames the references to edges"""
+    data = normalization_message(25)
+    expected = Message.model_validate(data)
+    assert len(expected.knowledge_graph.edges) == 25
+
+    message = Message.model_validate(data, context={"normalize": False})
+    message.normalize()
+    assert message == expected
+    assert list(message.knowledge_graph.edges) == list(expected.knowledge_graph.edges)
+
+    edge_ids = list(expected.knowledge_graph.edges)
+    assert set(expected.auxiliary_graphs["a0"].edges) == set(edge_ids[:2])
+    analysis = next(iter(next(iter(expected.results)).analyses))
+    assert next(iter(analysis.edge_bindings["qe0"])).id == edge_ids[2]
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="Parallel normalization forks processes",
+)
+def test_normalize_in_parallel():
+    """Test that edge IDs computed by forked workers are those of the serial path"""
+    data = normalization_message(25)
+    expected = Message.model_validate(data)
+
+    edges = list(
+        Message.model_validate(
+            data, context={"normalize": False}
+        ).knowledge_graph.edges.values()
+    )
+    assert parallel_edge_digests(edges, 2, chunk_size=4) == [
+        edge_digest(edge.get_digest_key()) for edge in edges
+    ]
+
+    message = Message.model_validate(data, context={"normalize": False})
+    message.normalize(workers=2, chunk_size=4)
+    assert message == expected
+    assert list(message.knowledge_graph.edges) == list(expected.knowledge_graph.edges)
+    assert message.is_normalized()
+
+
+def test_edge_ids_independent_of_hash_seed():
+    """Test that edge IDs don't depend on the process computing them"""
+    script = (
+        "import json, sys; "
+        "from reasoner_pydantic import Message; "
+        "message = Message.model_validate(json.load(sys.stdin)); "
+        "print(json.dumps(list(message.knowledge_graph.edges)))"
+    )
+    data = json.dumps(normalization_message(3))
+    edge_ids = [
+        subprocess.run(
+            [sys.executable, "-c", script],
+            input=data,
+            capture_output=True,
+            check=True,
+            text=True,
+            env={**os.environ, "PYTHONHASHSEED": seed},
+        ).stdout
+        for seed in ("1", "2")
+    ]
+    assert edge_ids[0] == edge_ids[1]
+    assert json.loads(edge_ids[0]) == list(
+        Message.model_validate(json.loads(data)).knowledge_graph.edges
+    )
+
+
+def test_incremental_normalization():
+    """Test that only new or replaced edges are normalized again"""
+    message = Message.model_validate(normalization_message(3))
+    assert message.is_normalized()
+    assert message.edge_id_scheme == EDGE_ID_SCHEME
+    edges = message.knowledge_graph.edges
+    edge_ids = list(edges)
+
+    # Changing an edge in place isn't noticed
+    edges[edge_ids[0]].subject = "MONDO:9"
+    message.normalize()
+    assert list(edges) == edge_ids
+
+    # Adding or replacing one is
+    edges["added"] = edges[edge_ids[1]].model_copy()
+    edges[edge_ids[2]] = edges[edge_ids[2]].model_copy()
+    assert not message.is_normalized()
+    message.normalize()
+    assert message.is_normalized()
+    assert list(edges) == edge_ids
+
+    message.normalize(force=True)
+    assert list(edges)[1:] == edge_ids[1:]
+    assert list(edges)[0] not in edge_ids
+
+    # A copy keeps track of its own edges
+    assert message.model_copy(deep=True).is_normalized()
+
+
+def test_update_normalized():
+    """Test that merged messages keep track of their normalized edges"""
+    data = normalization_message(3)
+    message = Message.model_validate(data)
+    message.update(Message.model_validate(normalization_message(5)))
+    assert message.is_normalized()
+    assert len(message.knowledge_graph.edges) == 5
+
+    message.update(Message.model_validate(data, context={"normalize": False}))
+    assert message.is_normalized()
+    assert len(message.knowledge_graph.edges) == 5
+
+    message.update(
+        Message.model_validate(data, context={"normalize": False}), normalize=False
+    )
+    assert not message.is_normalized()
+
+
 def test_merge_identical_attributes():
     """
     Tests that identical attributes are merged
@@ -552,3 +720,152 @@ def test_merge_knowledge_graph_edges():
         if source.resource_id == "ara0":
             assert source.upstream_resource_ids is not None
             assert len(source.upstream_resource_ids) == 2
+
+
+def support_message(aux_graphs: dict, result_support: list) -> dict:
+    """Make a message with an inferred edge and a pathfinder-free result"""
+    edges = {
+        f"e{index}": {
+            "subject": f"CHEBI:{index}",
+            "object": "MONDO:0",
+            "predicate": "biolink:related_to",
+            "sources": [
+                {"resource_id": "kp0", "resource_role": "primary_knowledge_source"}
+            ],
+            "attributes": [],
+        }
+        for index in range(3)
+    }
+    edges["inferred"] = {
+        "subject": "CHEBI:9",
+        "object": "MONDO:0",
+        "predicate": "biolink:treats",
+        "sources": [
+            {"resource_id": "ara0", "resource_role": "primary_knowledge_source"}
+        ],
+        "attributes": [
+            {
+                "attribute_type_id": "biolink:support_graphs",
+                "value": list(aux_graphs),
+            }
+        ],
+    }
+    return {
+        "knowledge_graph": {"nodes": {}, "edges": edges},
+        "auxiliary_graphs": {
+            aux_id: {"edges": aux_edges, "attributes": []}
+            for aux_id, aux_edges in aux_graphs.items()
+        },
+        "results": [
+            {
+                "node_bindings": {"n0": [{"id": "CHEBI:9", "attributes": []}]},
+                "analyses": [
+                    {
+                        "resource_id": "ara0",
+                        "support_graphs": result_support,
+                        "edge_bindings": {"q0": [{"id": "inferred", "attributes": []}]},
+                    }
+                ],
+            }
+        ],
+    }
+
+
+def get_support_references(message: Message) -> tuple[list, list]:
+    """Get the support graphs of the inferred edge and of the analyses"""
+    edge = next(
+        edge
+        for edge in message.knowledge_graph.edges.values()
+        if edge.predicate == "biolink:treats"
+    )
+    edge_support = {
+        aux_id for attribute in edge.attributes for aux_id in attribute.value
+    }
+    analysis_support = {
+        aux_id
+        for analysis in next(iter(message.results)).analyses
+        for aux_id in analysis.support_graphs
+    }
+    return sorted(edge_support), sorted(analysis_support)
+
+
+def test_deduplicate_auxiliary_graphs():
+    """Test that identical auxiliary graphs are merged along with references"""
+    message = Message.model_validate(
+        support_message(
+            {"a0": ["e0", "e1"], "a1": ["e2"], "a2": ["e1", "e0"]}, ["a1", "a2"]
+        )
+    )
+    assert message.deduplicate_auxiliary_graphs() == {"a2": "a0"}
+    assert list(message.auxiliary_graphs) == ["a0", "a1"]
+    assert get_support_references(message) == (["a0", "a1"], ["a0", "a1"])
+    assert message.deduplicate_auxiliary_graphs() == {}
+
+
+def test_deduplicate_auxiliary_graphs_rehash():
+    """Test that sets holding renamed references are rehashed"""
+    data = support_message({"a0": ["e0", "e1"], "a1": ["e1", "e0"]}, ["a0"])
+    data["knowledge_graph"]["edges"]["inferred"]["attributes"] = [
+        {"attribute_type_id": "biolink:support_graphs", "value": [aux_id]}
+        for aux_id in ("a0", "a1")
+    ]
+    analyses = data["results"][0]["analyses"]
+    analyses.append({**analyses[0], "support_graphs": ["a1"]})
+    data["results"].append(
+        {
+            "node_bindings": {"n0": [{"id": "CHEBI:8", "attributes": []}]},
+            "analyses": [
+                {
+                    "resource_id": "ara0",
+                    "path_bindings": {
+                        "p0": [
+                            {"id": "a0", "attributes": []},
+                            {"id": "a1", "attributes": []},
+                        ]
+                    },
+                }
+            ],
+        }
+    )
+    message = Message.model_validate(data)
+    assert message.deduplicate_auxiliary_graphs() == {"a1": "a0"}
+
+    (attributes,) = (
+        edge.attributes
+        for edge in message.knowledge_graph.edges.values()
+        if edge.predicate == "biolink:treats"
+    )
+    assert len(attributes) == 1
+    assert all(attribute in attributes for attribute in list(attributes))
+
+    result, pathfinder_result = message.results
+    assert len(result.analyses) == 1
+    assert all(analysis in result.analyses for analysis in list(result.analyses))
+
+    (analysis,) = pathfinder_result.analyses
+    assert analysis in pathfinder_result.analyses
+    path_bindings = analysis.path_bindings["p0"]
+    assert [path_binding.id for path_binding in path_bindings] == ["a0"]
+    assert all(path_binding in path_bindings for path_binding in list(path_bindings))
+
+
+def test_update_auxiliary_graph_conflicts():
+    """Test that different auxiliary graphs under the same key are kept"""
+    message = Message.model_validate(support_message({"a0": ["e0"]}, ["a0"]))
+    other = Message.model_validate(
+        support_message({"a0": ["e1"], "a1": ["e2"]}, ["a0"])
+    )
+    message.update(other)
+
+    renamed = f"a0-{other.auxiliary_graphs['a0'].get_digest()}"
+    assert sorted(message.auxiliary_graphs) == sorted(["a0", "a1", renamed])
+    assert get_support_references(message) == (
+        sorted(["a0", "a1", renamed]),
+        sorted(["a0", renamed]),
+    )
+    # The message merged in is left as it was
+    assert list(other.auxiliary_graphs) == ["a0", "a1"]
+
+    # The same graph gets the same key again
+    message.update(other)
+    assert len(message.auxiliary_graphs) == 3
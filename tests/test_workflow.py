@@ -1,6 +1,12 @@
 """Test workflow things."""
 
-from reasoner_pydantic import Query
+import re
+
+from pydantic import ValidationError
+import pytest
+
+from reasoner_pydantic import Operation, Query, Workflow
+from reasoner_pydantic.workflow import operations
 
 query = {
     "workflow": [
@@ -124,3 +130,35 @@ def test_workflow2():
     query_obj = Query(**query)
     query_dict = query_obj.model_dump()
     assert "parameters" in query_dict["workflow"][0].keys()
+
+
+def test_workflow_discriminator():
+    """Test that each step is validated only against the model for its id."""
+    with pytest.raises(ValidationError) as e:
+        Workflow.model_validate([{"id": "filter_results_top_n", "parameters": {}}])
+    errors = e.value.errors()
+    assert len(errors) == 1
+    assert errors[0]["loc"][:2] == (0, "filter_results_top_n")
+
+    with pytest.raises(ValidationError) as e:
+        Workflow.model_validate([{"id": "not_an_operation"}])
+    assert e.value.errors()[0]["type"] == "union_tag_invalid"
+
+
+def test_workflow_schema():
+    """Test that the operation schema references every operation model."""
+    schema = Operation.model_json_schema()
+    refs = {ref["$ref"] for ref in schema["oneOf"]}
+    assert refs == {f"#/$defs/{op.__name__}" for op in operations}
+    assert schema["discriminator"]["propertyName"] == "id"
+
+
+def test_workflow_schema_names():
+    """Test that tagging the union kept the $defs names of the schemas."""
+    union = "RootModel[Union[{}]]".format(", ".join(op.__name__ for op in operations))
+    operation_key = re.sub(r"[^\w-]", "_", union)
+    defs = Query.model_json_schema()["$defs"]
+    assert operation_key in defs
+    assert f"HashableSequence_{operation_key}_" in defs
+    assert not any("Annotated_Union" in key or "FieldInfo" in key for key in defs)
+    assert Operation.model_json_schema()["title"] == union